@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for the backend (not part of the deployed apps)
+"""
@@ -0,0 +1,343 @@
+"""
+Rendering benchmarks for agenda PDF/DOCX/packet, ICS and RSS generation
+
+Seeds a throwaway test database with meetings of 10, 100 and 1000 agenda
+items, with and without sections and PDF attachments, then measures each
+generator on each meeting:
+
+- wall time (min/median/max over ``--repeat`` runs, after a warm-up run),
+  each rendering from scratch with the render and Django caches emptied
+- peak Python memory (tracemalloc, measured in a separate run)
+- database queries
+
+and writes a JSON report. Compare a report against one from another commit
+to see what got slower:
+
+    cd backend
+    python -m benchmarks.rendering --output before.json
+    git checkout my-branch
+    python -m benchmarks.rendering --output after.json --compare before.json
+
+With ``--compare`` the exit status is 1 if any case is slower (median wall
+time) or uses more memory than the baseline by more than ``--threshold``
+percent, or runs more queries.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, time as dtime, timedelta, timezone as dt_timezone
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'escribe.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.core.files.base import ContentFile  # noqa: E402
+from django.core.files.storage import default_storage  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext, override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from documents.models import Attachment  # noqa: E402
+from meetings.models import Meeting, AgendaSection, AgendaItem  # noqa: E402
+from users.models import User  # noqa: E402
+
+REPORT_VERSION = 1
+
+SIZES = [10, 100, 1000]
+
+SECTIONS_PER_MEETING = 5
+
+ATTACHMENT_PAGES = 2
+
+
+def _attachment_pdf() -> bytes:
+    """Build the PDF every seeded attachment points at."""
+    from io import BytesIO
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(ATTACHMENT_PAGES):
+        pdf.drawString(72, 720, f'Staff report page {page + 1}')
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def seed_meeting(user, items: int, sections: bool, attachment_file: str) -> Meeting:
+    """
+    Create a published meeting with ``items`` agenda items.
+
+    Rows are bulk-created (no signals), so seeding 1000 items stays fast.
+    Every item gets one PDF attachment if ``attachment_file`` is given.
+    """
+    meeting = Meeting.objects.create(
+        title=f"Benchmark meeting ({items} items{', sections' if sections else ''}"
+              f"{', attachments' if attachment_file else ''})",
+        meeting_type='regular',
+        status='published',
+        date=date.today() + timedelta(days=7),
+        time=dtime(19, 0),
+        location='Council Chambers',
+        description='Regular meeting of the council',
+        created_by=user,
+        published_at=timezone.now(),
+    )
+    section_rows = []
+    if sections:
+        section_rows = AgendaSection.objects.bulk_create([
+            AgendaSection(meeting=meeting, title=f'Section {index + 1}', order=index)
+            for index in range(SECTIONS_PER_MEETING)
+        ])
+    agenda_items = AgendaItem.objects.bulk_create([
+        AgendaItem(
+            meeting=meeting,
+            section=section_rows[index % len(section_rows)] if section_rows else None,
+            title=f'Consider approval of agenda item {index + 1}',
+            description='Staff recommends approval. ' * 8,
+            order=index,
+            number=str(index + 1),
+            submitted_by=user,
+            department='Public Works',
+        )
+        for index in range(items)
+    ])
+    if attachment_file:
+        size = default_storage.size(attachment_file)
+        Attachment.objects.bulk_create([
+            Attachment(
+                agenda_item=item,
+                name=f'Staff report {item.number}.pdf',
+                file=attachment_file,
+                file_type='pdf',
+                file_size=size,
+                mime_type='application/pdf',
+                uploaded_by=user,
+            )
+            for item in agenda_items
+        ])
+    return meeting
+
+
+def _run(func):
+    """Run ``func`` once and return its wall time in milliseconds."""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(func, repeat: int, reset=None) -> dict:
+    """
+    Measure ``func``: wall times, then peak memory and query count.
+
+    ``reset`` is called before every run (e.g. to empty the caches so each
+    run renders from scratch).
+    """
+    reset = reset or (lambda: None)
+    reset()
+    func()  # Warm up module imports and per-process style caches
+
+    times = []
+    for _ in range(repeat):
+        reset()
+        times.append(_run(func))
+
+    reset()
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'wall_ms': {
+            'min': round(min(times), 2),
+            'median': round(statistics.median(times), 2),
+            'max': round(max(times), 2),
+        },
+        'peak_memory_kib': round(peak / 1024, 1),
+        'queries': len(queries.captured_queries),
+    }
+
+
+def get_cases(meeting: Meeting, plain: bool) -> dict:
+    """
+    The generators to benchmark on one meeting, by name.
+
+    The calendar entry and feed item do not depend on the agenda's sections
+    or attachments, so they only run on ``plain`` meetings (neither).
+    """
+    from meetings.services import generate_rss_feed
+    from meetings.utils import (
+        generate_agenda_pdf, generate_agenda_docx, generate_agenda_packet, generate_meeting_ics,
+    )
+
+    def fresh():
+        # Re-fetch so no generator benefits from another's cached relations
+        return Meeting.objects.get(pk=meeting.pk)
+
+    cases = {
+        'agenda_pdf': lambda: generate_agenda_pdf(fresh()),
+        'agenda_docx': lambda: generate_agenda_docx(fresh()),
+        'agenda_packet_pdf': lambda: generate_agenda_packet(fresh(), format='pdf', include_attachments=True),
+    }
+    if plain:
+        cases['meeting_ics'] = lambda: generate_meeting_ics(fresh())
+        cases['rss_feed'] = lambda: generate_rss_feed(
+            Meeting.objects.filter(pk=meeting.pk).select_related('published_snapshot')
+        )
+    return cases
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_benchmarks(sizes, generators=None, repeat: int = 3, log=print) -> dict:
+    """
+    Seed the test database and benchmark every generator on every meeting.
+
+    Returns the report as a dict.
+    """
+    work_dir = tempfile.mkdtemp(prefix='render-bench-')
+    cache_dir = os.path.join(work_dir, 'render_cache')
+
+    def empty_caches():
+        # Both the rendered files and the Django cache (feed items, calendar
+        # events), or every run after the warm-up is a cache hit
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        cache.clear()
+
+    results = []
+    with override_settings(MEDIA_ROOT=os.path.join(work_dir, 'media'), AGENDA_RENDER_CACHE_DIR=cache_dir):
+        try:
+            user = User.objects.create_user(username='benchmark', password='benchmark', role='clerk')
+            attachment_file = default_storage.save('benchmark/staff_report.pdf', ContentFile(_attachment_pdf()))
+            for items in sizes:
+                for sections in (False, True):
+                    for attachments in (False, True):
+                        meeting = seed_meeting(user, items, sections, attachment_file if attachments else '')
+                        for name, func in get_cases(meeting, plain=not (sections or attachments)).items():
+                            if generators and name not in generators:
+                                continue
+                            case = {'generator': name, 'items': items, 'sections': sections, 'attachments': attachments}
+                            log(f"{name:<18} items={items:<5} sections={sections!s:<5} attachments={attachments!s:<5}",
+                                end=' ', flush=True)
+                            case.update(measure(func, repeat, reset=empty_caches))
+                            log(f"{case['wall_ms']['median']:>10.1f} ms {case['peak_memory_kib']:>10.1f} KiB "
+                                f"{case['queries']:>3} queries")
+                            results.append(case)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'version': REPORT_VERSION,
+        'created_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def _case_key(case: dict) -> tuple:
+    return case['generator'], case['items'], case['sections'], case['attachments']
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare ``report`` with ``baseline``.
+
+    Returns a list of (case key, message, regressed) rows for cases
+    present in both reports.
+    """
+    previous = {_case_key(case): case for case in baseline['results']}
+    rows = []
+    for case in report['results']:
+        old = previous.get(_case_key(case))
+        if old is None:
+            continue
+        time_change = case['wall_ms']['median'] / old['wall_ms']['median'] - 1 if old['wall_ms']['median'] else 0
+        memory_change = case['peak_memory_kib'] / old['peak_memory_kib'] - 1 if old['peak_memory_kib'] else 0
+        regressed = (
+            time_change * 100 > threshold
+            or memory_change * 100 > threshold
+            or case['queries'] > old['queries']
+        )
+        message = (
+            f"time {time_change:+.0%}, memory {memory_change:+.0%}, "
+            f"queries {old['queries']} -> {case['queries']}"
+        )
+        rows.append((_case_key(case), message, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark agenda, calendar and feed rendering')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help='Comma-separated agenda item counts (default: %(default)s)')
+    parser.add_argument('--generators', help='Comma-separated generators to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (default: %(default)s)')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    parser.add_argument('--compare', help='Baseline report to compare against')
+    parser.add_argument('--threshold', type=float, default=20,
+                        help='Percent slowdown or memory growth counted as a regression (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    generators = [name.strip() for name in args.generators.split(',')] if args.generators else None
+    log = (lambda *a, **kw: print(*a, file=sys.stderr, **kw))
+
+    # Run against a throwaway database so seeding never touches real data
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        report = run_benchmarks(sizes, generators, args.repeat, log=log)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = 0
+        log(f"\nCompared with {baseline.get('commit') or args.compare}:")
+        for key, message, regressed in compare(report, baseline, args.threshold):
+            regressions += regressed
+            log(f"{'REGRESSED' if regressed else 'ok':<10} {key[0]:<18} items={key[1]:<5} "
+                f"sections={key[2]!s:<5} attachments={key[3]!s:<5} {message}")
+        if regressions:
+            log(f"{regressions} regressions over {args.threshold:g}%")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,6 +12,7 @@ pip install -r requirements.txt
 # Run database migrations
 echo "Running database migrations..."
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 # Collect static files
 echo "Collecting static files..."
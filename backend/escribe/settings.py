@@ -97,6 +97,37 @@ else:
         }
     }
 
+# Cache
+# Rendered public responses are shared between workers, so production should
+# use a shared backend (a system check warns about locmem without DEBUG).
+# CACHE_BACKEND=database uses the django_cache table (created by
+# `manage.py createcachetable`); redis needs REDIS_URL.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+elif CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# How long rendered meeting responses stay cached (seconds)
+MEETING_CACHE_TIMEOUT = int(os.environ.get('MEETING_CACHE_TIMEOUT', 60 * 60 * 24))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -130,6 +161,53 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rendered agenda PDFs/DOCX (see meetings.render_cache)
+AGENDA_RENDER_CACHE_DIR = Path(os.environ.get('AGENDA_RENDER_CACHE_DIR', MEDIA_ROOT / 'render_cache'))
+AGENDA_RENDER_CACHE_MAX_BYTES = int(os.environ.get('AGENDA_RENDER_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Agenda document look (see meetings.styles)
+AGENDA_LETTERHEAD = os.environ.get('AGENDA_LETTERHEAD', '')
+AGENDA_PDF_FONT = os.environ.get('AGENDA_PDF_FONT', '')  # Path to a .ttf
+AGENDA_PDF_BOLD_FONT = os.environ.get('AGENDA_PDF_BOLD_FONT', '')
+AGENDA_DOCX_TEMPLATE = os.environ.get('AGENDA_DOCX_TEMPLATE', '')  # Path to a .docx with letterhead
+
+# Public URL of this API, used in links pre-rendered at publish time
+PUBLIC_BASE_URL = os.environ.get('PUBLIC_BASE_URL', 'https://escribe-backend.onrender.com').rstrip('/')
+
+# Days of past meetings kept in the calendar subscription feed
+CALENDAR_FEED_PAST_DAYS = int(os.environ.get('CALENDAR_FEED_PAST_DAYS', 90))
+
+# Email (SMTP unless EMAIL_BACKEND says otherwise)
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', '')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@example.com')
+
+# Email outbox (see meetings.outbox and manage.py send_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_RATE_LIMIT = float(os.environ.get('EMAIL_OUTBOX_RATE_LIMIT', 10))  # Messages per second, 0 for no limit
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_TIMEOUT = int(os.environ.get('EMAIL_OUTBOX_TIMEOUT', 10 * 60))  # Seconds before a claimed batch is released
+
+# Notification coalescing and digests (see meetings.notifications)
+NOTIFICATION_COALESCE_MINUTES = int(os.environ.get('NOTIFICATION_COALESCE_MINUTES', 15))
+NOTIFICATION_DIGEST_HOUR = int(os.environ.get('NOTIFICATION_DIGEST_HOUR', 7))  # Local hour daily digests go out
+MEETING_REMINDER_HOURS = int(os.environ.get('MEETING_REMINDER_HOURS', 24))  # Remind subscribers this long before a meeting
+
+# Background jobs (see meetings.jobs and manage.py run_jobs)
+JOB_MAX_RUNNING = int(os.environ.get('JOB_MAX_RUNNING', 2))  # Across all workers
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 1))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 30 * 60))  # Seconds without progress before a running job is retried
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 0)) or None  # Packet export processes (default: CPUs)
+# Export ZIPs and their work directories, kept apart from the LRU-pruned render cache (see meetings.exports)
+EXPORT_DIR = Path(os.environ.get('EXPORT_DIR', MEDIA_ROOT / 'exports'))
+EXPORT_MAX_AGE = int(os.environ.get('EXPORT_MAX_AGE', 7 * 24 * 60 * 60))  # Seconds an export is kept for download
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
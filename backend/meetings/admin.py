@@ -2,7 +2,10 @@
 Admin configuration for meetings app
 """
 from django.contrib import admin
-from .models import Meeting, AgendaSection, AgendaItem, Minute, Vote
+from django.utils.html import format_html
+from django.utils import timezone
+from .models import Meeting, AgendaSection, AgendaItem, AgendaSnapshot, Minute, Vote, OutboxMessage
+from .jobs import enqueue
 
 
 @admin.register(Meeting)
@@ -12,6 +15,23 @@ class MeetingAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description']
     readonly_fields = ['created_at', 'updated_at', 'published_at', 'posted_at']
     date_hierarchy = 'date'
+    actions = ['export_packets']
+    
+    @admin.action(description='Export agenda packets (ZIP)')
+    def export_packets(self, request, queryset):
+        job = enqueue('export_packets', {
+            'meetings': sorted(queryset.values_list('id', flat=True)),
+            'format': 'pdf',
+            'include_attachments': True,
+            'live': False,
+        }, user=request.user)
+        self.message_user(
+            request,
+            format_html(
+                'Export queued as job #{}. Download it from <a href="{}">{}</a> once it has finished.',
+                job.id, f'/api/meetings/jobs/{job.id}/download/', f'/api/meetings/jobs/{job.id}/download/'
+            )
+        )
 
 
 @admin.register(AgendaSection)
@@ -29,6 +49,39 @@ class AgendaItemAdmin(admin.ModelAdmin):
     ordering = ['meeting', 'order']
 
 
+@admin.register(AgendaSnapshot)
+class AgendaSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['meeting', 'version', 'content_hash', 'created_by', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['meeting__title']
+    readonly_fields = ['meeting', 'version', 'data', 'content_hash', 'created_by', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to_email', 'status', 'attempts', 'send_after', 'sent_at']
+    list_filter = ['status', 'notification_type', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = [field.name for field in OutboxMessage._meta.fields]
+    actions = ['retry']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Retry failed messages')
+    def retry(self, request, queryset):
+        count = queryset.filter(status='failed').update(
+            status='pending', attempts=0, send_after=timezone.now(), error=''
+        )
+        self.message_user(request, f'{count} messages queued again.')
+
+
 @admin.register(Minute)
 class MinuteAdmin(admin.ModelAdmin):
     list_display = ['agenda_item', 'status', 'version', 'approved_by', 'approved_at', 'created_by']
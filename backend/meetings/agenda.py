@@ -0,0 +1,78 @@
+"""
+Plain-data agenda trees
+
+An agenda tree is the JSON-serializable form of a meeting's agenda
+(meeting details, sections, items and public attachment metadata). It is
+what published snapshots store and what the renderers consume, so a
+snapshot can be rendered exactly as it was posted.
+"""
+import hashlib
+import json
+from documents.models import Attachment
+from .models import Meeting, AgendaSection, AgendaItem
+
+# Bump when the tree layout changes
+AGENDA_TREE_FORMAT = 1
+
+ITEM_FIELDS = ['id', 'section_id', 'number', 'title', 'description', 'order',
+               'department', 'is_consent', 'requires_vote']
+ATTACHMENT_FIELDS = ['id', 'agenda_item_id', 'name', 'file', 'file_type', 'file_size',
+                     'mime_type', 'version', 'public_url']
+
+
+def build_agenda_tree(meeting: Meeting) -> dict:
+    """
+    Build the agenda tree for a meeting from live rows.
+
+    Runs three flat queries (sections, items, attachments) whatever the
+    size of the agenda.
+    """
+    sections = [
+        dict(section, items=[])
+        for section in AgendaSection.objects.filter(meeting=meeting).order_by('order', 'id').values(
+            'id', 'title', 'description', 'order', 'position'
+        )
+    ]
+    items = [
+        dict(item, attachments=[])
+        for item in AgendaItem.objects.filter(meeting=meeting).order_by('order', 'id').values(*ITEM_FIELDS)
+    ]
+
+    items_by_id = {item['id']: item for item in items}
+    attachments = Attachment.objects.filter(
+        agenda_item__meeting=meeting, is_current=True, is_public=True
+    ).order_by('id').values(*ATTACHMENT_FIELDS)
+    for attachment in attachments:
+        items_by_id[attachment.pop('agenda_item_id')]['attachments'].append(attachment)
+
+    sections_by_id = {section['id']: section for section in sections}
+    unsectioned = []
+    for item in items:
+        section = sections_by_id.get(item.pop('section_id'))
+        if section is not None:
+            section['items'].append(item)
+        else:
+            unsectioned.append(item)
+
+    return {
+        'format': AGENDA_TREE_FORMAT,
+        'meeting': {
+            'id': meeting.id,
+            'title': meeting.title,
+            'meeting_type': meeting.meeting_type,
+            'meeting_type_display': meeting.get_meeting_type_display(),
+            'date': meeting.date.isoformat(),
+            'time': meeting.time.isoformat(),
+            'location': meeting.location,
+            'description': meeting.description,
+        },
+        'sections': sections,
+        'items': unsectioned,
+    }
+
+
+def hash_agenda_tree(tree: dict) -> str:
+    """Get a stable SHA-256 of an agenda tree's content."""
+    canonical = json.dumps(tree, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
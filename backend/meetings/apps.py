@@ -8,6 +8,9 @@ class MeetingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meetings'
     verbose_name = 'Meetings'
+    
+    def ready(self):
+        from . import checks, signals  # noqa: F401
 
 
 
@@ -0,0 +1,145 @@
+"""
+Caching helpers for meetings app
+
+Cached entries are keyed by a per-meeting version stamp. Signal handlers
+bump the stamp whenever anything in the meeting's tree changes, which
+orphans every entry rendered from the old state.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def get_cache_timeout():
+    return getattr(settings, 'MEETING_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _version_key(meeting_id):
+    return f'meetings:meeting:{meeting_id}:version'
+
+
+FEEDS_VERSION_KEY = 'meetings:feeds:version'
+
+
+def get_meeting_version(meeting_id):
+    """Get the current cache version stamp for a meeting."""
+    key = _version_key(meeting_id)
+    version = cache.get(key)
+    if version is None:
+        # A fresh stamp (rather than a counter restarting at 1) keeps entries
+        # written before the stamp was evicted from being served again.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_meeting_version(meeting_id):
+    """Invalidate every cached rendering of a meeting, and the feeds listing it."""
+    if meeting_id is not None:
+        version = time.time_ns()
+        cache.set_many({_version_key(meeting_id): version, FEEDS_VERSION_KEY: version}, timeout=None)
+
+
+def get_feeds_version():
+    """
+    Get the version stamp shared by the cached RSS feeds.
+    
+    Bumped with any meeting's version, so a cached feed can be validated
+    without a database query.
+    """
+    version = cache.get(FEEDS_VERSION_KEY)
+    if version is None:
+        cache.add(FEEDS_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(FEEDS_VERSION_KEY)
+    return version
+
+
+def _public_meeting_key(meeting_id, version, variant):
+    return f'meetings:meeting:{meeting_id}:public-response:{version}:{variant}'
+
+
+def get_public_meeting(meeting_id, variant):
+    """
+    Get the cached public response for a meeting, or None.
+    
+    Two cache reads, no database access.
+    """
+    version = cache.get(_version_key(meeting_id))
+    if version is None:
+        return None
+    return cache.get(_public_meeting_key(meeting_id, version, variant))
+
+
+def set_public_meeting(meeting_id, version, variant, content):
+    """
+    Store the public response for a meeting.
+    
+    ``version`` must be read before the body is rendered, so a change that
+    lands mid-render leaves the entry unreachable instead of stale.
+    """
+    cache.set(_public_meeting_key(meeting_id, version, variant), content, timeout=get_cache_timeout())
+
+
+def calendar_event_key(meeting, base_url):
+    """
+    Cache key for a meeting's serialized calendar event.
+    
+    Keyed by the meeting's ``content_updated_at``, which every save bumps,
+    so an edited meeting's event is rebuilt and the old one expires unread.
+    """
+    stamp = meeting.content_updated_at.timestamp() if meeting.content_updated_at else 0
+    host = hashlib.md5(base_url.encode('utf-8')).hexdigest()[:12]
+    return f'meetings:meeting:{meeting.pk}:vevent:{stamp}:{host}'
+
+
+def rss_item_key(meeting, base_url, kind='meeting'):
+    """Cache key for a meeting's serialized RSS item of ``kind``."""
+    stamp = meeting.content_updated_at.timestamp() if meeting.content_updated_at else 0
+    host = hashlib.md5(base_url.encode('utf-8')).hexdigest()[:12]
+    return f'meetings:meeting:{meeting.pk}:rss-{kind}:{stamp}:{meeting.published_snapshot_id}:{host}'
+
+
+def _feed_key(etag):
+    return f'meetings:feed:{etag}'
+
+
+def get_cached_feed(etag):
+    """Get a cached feed (calendar or RSS) by its ETag, or None."""
+    return cache.get(_feed_key(etag))
+
+
+def set_cached_feed(etag, content):
+    cache.set(_feed_key(etag), content, timeout=get_cache_timeout())
+
+
+def make_etag(*parts):
+    """Build a strong ETag from the values that identify a representation."""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def get_not_modified_response(request, etag, last_modified=None):
+    """
+    Check If-None-Match / If-Modified-Since against a representation.
+    
+    Returns a 304 response if the client's copy is current, otherwise None.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ETag and Last-Modified headers to a response."""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
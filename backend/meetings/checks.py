@@ -0,0 +1,26 @@
+"""
+System checks for meetings app
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn when production runs on a per-process cache.
+
+    Signal handlers bump cached meeting versions (see meetings.signals); with
+    locmem, a bump in one gunicorn worker or job process never reaches the
+    others, which keep serving stale details, ETags and feeds until the
+    cache timeout.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if settings.DEBUG or not backend.endswith('LocMemCache'):
+        return []
+    return [Warning(
+        'The default cache is per-process (locmem), so cached meeting responses '
+        'go stale across workers.',
+        hint='Set CACHE_BACKEND=database (after manage.py createcachetable) or CACHE_BACKEND=redis.',
+        id='meetings.W001',
+    )]
@@ -0,0 +1,111 @@
+"""
+File download responses for meetings app
+
+Serves files from disk in fixed-size chunks with Content-Length and
+single-range ``Range`` support, so memory per download stays bounded
+however large the file is and interrupted downloads can resume.
+
+Responses are built from an already open file, so a file deleted while it
+is being served (e.g. pruned from the render cache) is still sent whole.
+"""
+import os
+import re
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from .cache import get_not_modified_response, set_validators
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header: str, size: int):
+    """
+    Parse a single-range ``Range`` header against a file of ``size`` bytes.
+
+    Returns:
+        (start, end) inclusive byte offsets, None if the header should be
+        ignored (missing, malformed or multi-range), or False if the range
+        cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class FileRange:
+    """Chunks of ``length`` bytes of an open file from ``start``; closing it closes the file."""
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.start = start
+        self.length = length
+
+    def __iter__(self):
+        self.file.seek(self.start)
+        remaining = self.length
+        while remaining > 0:
+            chunk = self.file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+def file_response(request, file, filename: str, content_type: str, etag: str = None):
+    """
+    Stream an open binary file as an attachment.
+
+    The response takes ownership of ``file`` and closes it. Honors
+    ``Range`` (answering 206 or 416) and, when ``etag`` is given,
+    ``If-None-Match``/``If-Range``.
+    """
+    if etag is not None:
+        not_modified = get_not_modified_response(request, etag, None)
+        if not_modified is not None:
+            file.close()
+            return not_modified
+
+    size = os.fstat(file.fileno()).st_size
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if byte_range is not None and if_range and if_range != etag:
+        # The client's partial copy is of a different file; send all of it
+        byte_range = None
+
+    if byte_range is False:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            FileRange(file, start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+        response.block_size = CHUNK_SIZE
+
+    response['Accept-Ranges'] = 'bytes'
+    if etag is not None:
+        set_validators(response, etag)
+    return response
@@ -0,0 +1,172 @@
+"""
+Batch export of agenda packets
+
+Renders the packets of many meetings in parallel on a process pool and
+collects them in a directory, optionally zipped. A packet already in the
+output directory is not rendered again, so an interrupted export resumes
+where it stopped when run again with the same directory.
+
+Packets are rendered into the render cache (see meetings.render_cache), so
+the pool workers and later downloads share their output. Export jobs keep
+their work directories and ZIPs in ``settings.EXPORT_DIR`` instead, where
+cache pruning cannot remove them before they are downloaded; they are
+deleted once older than ``settings.EXPORT_MAX_AGE``.
+"""
+import logging
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+from django.conf import settings
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+
+def get_export_dir() -> Path:
+    return Path(getattr(settings, 'EXPORT_DIR', Path(settings.MEDIA_ROOT) / 'exports'))
+
+
+def prune_exports(max_age: int = None) -> int:
+    """
+    Delete export ZIPs and work directories not modified for ``max_age`` seconds.
+
+    Returns the number of entries deleted.
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'EXPORT_MAX_AGE', 7 * 24 * 60 * 60)
+    cutoff = time.time() - max_age
+    deleted = 0
+    try:
+        with os.scandir(get_export_dir()) as it:
+            entries = [entry for entry in it if entry.stat().st_mtime < cutoff]
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            continue  # Pruned concurrently
+        except OSError:
+            continue  # In use (Windows); try again next time
+        deleted += 1
+    if deleted:
+        logger.info(f"Pruned {deleted} expired packet exports")
+    return deleted
+
+
+def _init_worker():
+    """Set up Django in a pool process."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'escribe.settings')
+    import django
+    django.setup()
+
+
+def _render_packet(meeting_id: int, format: str, include_attachments: bool, live: bool) -> str:
+    """Render one meeting's packet (in a pool process) and return its path."""
+    from .agenda import build_agenda_tree
+    from .jobs import render_packet
+    from .models import Meeting
+
+    meeting = Meeting.objects.select_related('published_snapshot').get(pk=meeting_id)
+    if meeting.published_snapshot is not None and not live:
+        agenda = meeting.published_snapshot.data
+    else:
+        agenda = build_agenda_tree(meeting)
+    return str(render_packet(meeting, agenda, format, include_attachments))
+
+
+def export_filename(meeting, format: str) -> str:
+    return f"{meeting.date:%Y-%m-%d}_{meeting.id}_{slugify(meeting.title)[:50]}.{format}"
+
+
+def export_packets(meetings, output_dir, format: str = 'pdf', include_attachments: bool = True,
+                   live: bool = False, workers: int = None, progress=None) -> dict:
+    """
+    Render the packets of ``meetings`` into ``output_dir``.
+
+    Args:
+        meetings: Meetings to export
+        output_dir: Directory to write packets to (created if missing)
+        format: 'pdf' or 'docx'
+        include_attachments: Whether packets include attachments
+        live: Render the live agenda even where a published snapshot exists
+        workers: Pool size (defaults to the number of CPUs)
+        progress: Called with (done, total) as packets finish
+
+    Returns:
+        Dict with 'total', 'exported', 'skipped' (already present) and
+        'failed' (meeting id to error)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    targets = {}
+    skipped = 0
+    for meeting in meetings:
+        target = output_dir / export_filename(meeting, format)
+        if target.exists():
+            skipped += 1
+        else:
+            targets[meeting.id] = target
+
+    total = skipped + len(targets)
+    done = skipped
+    failed = {}
+    if progress:
+        progress(done, total)
+
+    if targets:
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers or os.cpu_count() or 1, len(targets)),
+            mp_context=get_context('spawn'),
+            initializer=_init_worker,
+        )
+        with pool:
+            futures = {
+                pool.submit(_render_packet, meeting_id, format, include_attachments, live): meeting_id
+                for meeting_id in targets
+            }
+            for future in as_completed(futures):
+                meeting_id = futures[future]
+                target = targets[meeting_id]
+                try:
+                    # Copy under a temporary name so a half-written file is
+                    # never taken for a finished one on resume
+                    partial = target.with_name(target.name + '.part')
+                    shutil.copyfile(future.result(), partial)
+                    os.replace(partial, target)
+                except Exception as e:
+                    logger.exception(f"Failed to export packet for meeting {meeting_id}")
+                    failed[meeting_id] = str(e)
+                done += 1
+                if progress:
+                    progress(done, total)
+
+    return {
+        'total': total,
+        'exported': total - skipped - len(failed),
+        'skipped': skipped,
+        'failed': failed,
+    }
+
+
+def write_zip(output_dir, zip_path, format: str = 'pdf') -> Path:
+    """
+    Zip the packets in ``output_dir`` into ``zip_path``.
+
+    Packets are stored uncompressed; PDF and DOCX are compressed already.
+    """
+    zip_path = Path(zip_path)
+    partial = zip_path.with_name(zip_path.name + '.tmp')
+    with zipfile.ZipFile(partial, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path in sorted(Path(output_dir).glob(f'*.{format}')):
+            archive.write(path, path.name)
+    os.replace(partial, zip_path)
+    return zip_path
@@ -0,0 +1,318 @@
+"""
+Database-backed background jobs
+
+Jobs are rows in the ``jobs`` table, picked up by ``manage.py run_jobs``.
+No broker is needed: workers claim a pending job with a conditional
+UPDATE, so any number of workers can share the table.
+
+- Enqueueing a job identical to one the same user (or anonymous users)
+  still has pending or running returns the existing job instead of adding
+  another; a partial unique index on ``dedupe_key`` keeps concurrent
+  requests from queueing duplicates.
+- ``settings.JOB_MAX_RUNNING`` caps how many jobs run at once across all
+  workers: a worker that finds the cap exceeded after claiming a job gives
+  it back.
+- A failing job is retried with exponential backoff up to its
+  ``max_attempts``; a job whose worker died is retried once it has not
+  reported progress for ``settings.JOB_TIMEOUT``.
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+ACTIVE_STATUSES = ['pending', 'running']
+
+# Artifacts rendered from the meeting's fields rather than its snapshot
+TEXT_ARTIFACT_KINDS = ['ics', 'rss_item']
+
+
+def job_handler(kind):
+    """
+    Register a function as the handler for jobs of ``kind``.
+
+    The handler is called with the job's params and a ``progress(done,
+    total)`` callback, and returns the job's result. Each progress report
+    is also the job's heartbeat, so a handler running longer than
+    ``JOB_TIMEOUT`` must report progress at least that often.
+    """
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def make_dedupe_key(kind: str, params: dict, user_id=None) -> str:
+    canonical = json.dumps({'kind': kind, 'params': params, 'user': user_id}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def enqueue(kind: str, params: dict, user=None) -> Job:
+    """
+    Queue a job, or return the identical job already pending or running.
+
+    Jobs are deduplicated per user (anonymous users share theirs), so
+    nobody is handed a job they are not allowed to see.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    created_by = user if user is not None and user.is_authenticated else None
+    dedupe_key = make_dedupe_key(kind, params, created_by.pk if created_by else None)
+    while True:
+        existing = Job.objects.filter(dedupe_key=dedupe_key, status__in=ACTIVE_STATUSES).order_by('id').first()
+        if existing is not None:
+            return existing
+        try:
+            with transaction.atomic():
+                return Job.objects.create(
+                    kind=kind,
+                    params=params,
+                    dedupe_key=dedupe_key,
+                    max_attempts=_setting('JOB_MAX_ATTEMPTS', 3),
+                    created_by=created_by,
+                )
+        except IntegrityError:
+            continue  # Queued concurrently; return that job
+
+
+def requeue_stale_jobs() -> int:
+    """Return jobs whose worker stopped responding to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=_setting('JOB_TIMEOUT', 30 * 60))
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error='Timed out', finished_at=timezone.now()
+    )
+    retried = stale.update(status='pending', error='Timed out', run_after=timezone.now())
+    return failed + retried
+
+
+def claim_job(worker: str):
+    """
+    Claim the next runnable job for ``worker``, or return None.
+
+    Returns None as well when ``JOB_MAX_RUNNING`` jobs are already running.
+    Workers claiming at the same time could each see a free slot, so the
+    count is checked again once the claim is committed; whoever then sees
+    the cap exceeded returns the job to the queue (occasionally both do,
+    and the job waits for the next poll).
+    """
+    max_running = _setting('JOB_MAX_RUNNING', 2)
+    while Job.objects.filter(status='running').count() < max_running:
+        job = Job.objects.filter(
+            status='pending', run_after__lte=timezone.now()
+        ).order_by('run_after', 'id').first()
+        if job is None:
+            return None
+        # Only one worker's UPDATE can match while the job is still pending
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job.pk, status='pending').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+        )
+        if not claimed:
+            continue
+        if Job.objects.filter(status='running').count() > max_running:
+            Job.objects.filter(pk=job.pk, status='running', worker=worker).update(
+                status='pending', worker='', started_at=None, heartbeat_at=None, attempts=F('attempts') - 1
+            )
+            return None
+        job.refresh_from_db()
+        return job
+    return None
+
+
+def run_job(job: Job) -> Job:
+    """Run a claimed job and record its outcome."""
+    def progress(done, total):
+        Job.objects.filter(pk=job.pk).update(
+            progress={'done': done, 'total': total}, heartbeat_at=timezone.now()
+        )
+    
+    try:
+        result = HANDLERS[job.kind](job.params, progress)
+    except Exception as e:
+        logger.exception(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}")
+        job.error = str(e)
+        if job.attempts < job.max_attempts:
+            job.status = 'pending'
+            job.run_after = timezone.now() + timedelta(seconds=30 * 2 ** (job.attempts - 1))
+        else:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+    else:
+        job.status = 'succeeded'
+        job.result = result
+        job.error = ''
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'run_after', 'finished_at'])
+    return job
+
+
+def get_result_path(job: Job) -> Path:
+    """Get where the file named in a finished job's result is stored."""
+    from .exports import get_export_dir
+    from .render_cache import get_cache_dir
+
+    directory = get_export_dir() if job.kind == 'export_packets' else get_cache_dir()
+    return directory / job.result['file']
+
+
+def render_text_artifact(meeting, kind: str) -> str:
+    """Render the calendar entry (``ics``) or RSS item (``rss_item``) artifact of ``meeting``."""
+    from xml.etree import ElementTree as ET
+    from .services import build_rss_item
+    from .utils import generate_meeting_ics
+
+    if kind == 'ics':
+        return generate_meeting_ics(meeting, settings.PUBLIC_BASE_URL)
+    return ET.tostring(build_rss_item(meeting, settings.PUBLIC_BASE_URL), encoding='unicode')
+
+
+def refresh_text_artifacts(meeting) -> int:
+    """
+    Re-render the calendar entry and RSS item of ``meeting``'s published snapshot.
+
+    Unlike the agenda, these come from the meeting's own fields (date, time,
+    location, status), so a meeting rescheduled or moved without being
+    re-published must not keep serving the ones rendered at publish time.
+    Returns how many were updated.
+    """
+    from .models import MeetingArtifact
+
+    artifacts = MeetingArtifact.objects.filter(
+        meeting=meeting, snapshot=F('meeting__published_snapshot'), kind__in=TEXT_ARTIFACT_KINDS
+    )
+    kinds = list(artifacts.values_list('kind', flat=True))
+    for kind in kinds:
+        artifacts.filter(kind=kind).update(content=render_text_artifact(meeting, kind))
+    return len(kinds)
+
+
+def render_packet(meeting, agenda: dict, format: str, include_attachments: bool):
+    """Render an agenda packet into the render cache and return its path."""
+    from .render_cache import get_or_render
+    from .utils import generate_agenda_packet
+
+    return get_or_render(
+        agenda, format,
+        lambda output: generate_agenda_packet(
+            meeting, format=format, include_attachments=include_attachments, agenda=agenda, output=output
+        ),
+        packet=True, include_attachments=include_attachments
+    )
+
+
+@job_handler('agenda_packet')
+def build_agenda_packet(params: dict, progress) -> dict:
+    """
+    Render an agenda packet into the render cache.
+
+    Params: ``meeting`` id, ``format``, ``include_attachments`` and
+    ``snapshot`` (true to render the published snapshot rather than the
+    live agenda).
+    """
+    from .agenda import build_agenda_tree
+    from .models import Meeting
+
+    meeting = Meeting.objects.select_related('published_snapshot').get(pk=params['meeting'])
+    if params['snapshot'] and meeting.published_snapshot is not None:
+        agenda = meeting.published_snapshot.data
+    else:
+        agenda = build_agenda_tree(meeting)
+
+    path = render_packet(meeting, agenda, params['format'], params['include_attachments'])
+    return {
+        'file': path.name,
+        'filename': f"agenda_packet_{meeting.id}.{params['format']}",
+    }
+
+
+@job_handler('publish_artifacts')
+def build_publish_artifacts(params: dict, progress) -> dict:
+    """
+    Pre-render the public downloads of a published ``snapshot``.
+
+    Creates the snapshot's agenda PDF, PDF and DOCX packets, calendar entry
+    and RSS item as MeetingArtifacts, skipping any that already exist.
+    Does nothing if the snapshot has been superseded. The calendar entry and
+    RSS item are re-rendered whenever the meeting is saved (see
+    ``refresh_text_artifacts``).
+    """
+    from django.core.files import File
+    from .models import AgendaSnapshot, MeetingArtifact
+    from .render_cache import get_or_render
+    from .utils import generate_agenda_pdf
+
+    snapshot = AgendaSnapshot.objects.select_related('meeting').get(pk=params['snapshot'])
+    meeting = snapshot.meeting
+    if meeting.published_snapshot_id != snapshot.id:
+        return {'skipped': 'superseded'}
+
+    agenda = snapshot.data
+    renderers = {
+        'agenda_pdf': lambda: get_or_render(
+            agenda, 'pdf', lambda output: generate_agenda_pdf(meeting, agenda, output)
+        ),
+        'packet_pdf': lambda: render_packet(meeting, agenda, 'pdf', True),
+        'packet_docx': lambda: render_packet(meeting, agenda, 'docx', True),
+        'ics': lambda: render_text_artifact(meeting, 'ics'),
+        'rss_item': lambda: render_text_artifact(meeting, 'rss_item'),
+    }
+
+    done = set(snapshot.artifacts.values_list('kind', flat=True))
+    created = []
+    for kind, render in renderers.items():
+        if kind in done:
+            continue
+        artifact = MeetingArtifact(meeting=meeting, snapshot=snapshot, kind=kind)
+        output = render()
+        if isinstance(output, str):
+            artifact.content = output
+            artifact.save()
+        else:
+            with open(output, 'rb') as file:
+                artifact.file.save(f'{kind}_v{snapshot.version}{output.suffix}', File(file))
+        created.append(kind)
+    return {'created': created}
+
+
+@job_handler('export_packets')
+def build_packet_export(params: dict, progress) -> dict:
+    """
+    Export the packets of many meetings as one ZIP in ``settings.EXPORT_DIR``.
+
+    Params: ``meetings`` (ids), ``format``, ``include_attachments`` and
+    ``live``. Packets are collected in a work directory named after the
+    job's params, so a retried job resumes instead of starting over.
+    """
+    import shutil
+    from .exports import export_packets, get_export_dir, prune_exports, write_zip
+    from .models import Meeting
+
+    key = make_dedupe_key('export_packets', params)
+    work_dir = get_export_dir() / key
+    meetings = Meeting.objects.filter(pk__in=params['meetings']).order_by('date', 'id')
+    summary = export_packets(
+        meetings, work_dir, format=params['format'], include_attachments=params['include_attachments'],
+        live=params['live'], workers=_setting('EXPORT_WORKERS', None), progress=progress
+    )
+    if summary['failed']:
+        raise RuntimeError(f"{len(summary['failed'])} packets failed: {summary['failed']}")
+
+    zip_path = write_zip(work_dir, get_export_dir() / f'export_{key[:32]}.zip', params['format'])
+    shutil.rmtree(work_dir, ignore_errors=True)
+    prune_exports()
+    return dict(summary, file=zip_path.name, filename='agenda_packets.zip')
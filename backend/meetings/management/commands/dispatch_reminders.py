@@ -0,0 +1,47 @@
+"""
+Queue reminder emails for upcoming meetings (see meetings.notifications)
+"""
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from meetings.notifications import dispatch_reminders
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Queue reminder emails for published meetings starting soon (run every minute, or with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, checking every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60.0,
+            help='Seconds between checks with --loop'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    for reminder in dispatch_reminders():
+                        self.stdout.write(
+                            f"Reminder for meeting {reminder.meeting_id} at {reminder.starts_at:%Y-%m-%d %H:%M} "
+                            f"queued for {reminder.queued} subscribers"
+                        )
+                except Exception:
+                    if not options['loop']:
+                        raise
+                    # Try again next interval instead of stopping the dispatcher
+                    logger.exception('Dispatching reminders failed')
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping reminder dispatcher')
+        finally:
+            connection.close()
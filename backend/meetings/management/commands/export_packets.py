@@ -0,0 +1,69 @@
+"""
+Export agenda packets for many meetings (see meetings.exports)
+"""
+import tempfile
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from meetings.exports import export_packets, write_zip
+from meetings.models import Meeting
+
+
+class Command(BaseCommand):
+    help = 'Render agenda packets for a date range or list of meetings in parallel'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First meeting date (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last meeting date (YYYY-MM-DD)')
+        parser.add_argument('--meetings', help='Comma-separated meeting ids')
+        parser.add_argument('--format', choices=['pdf', 'docx'], default='pdf')
+        parser.add_argument('--no-attachments', action='store_true', help='Leave attachments out of packets')
+        parser.add_argument('--live', action='store_true',
+                            help='Render live agendas instead of published snapshots')
+        parser.add_argument('--workers', type=int, help='Processes to render with (default: CPUs)')
+        parser.add_argument('--output', help='Directory for the packets; run again with the same one to resume')
+        parser.add_argument('--zip', help='Also write the packets to this ZIP file')
+    
+    def handle(self, *args, **options):
+        meetings = Meeting.objects.order_by('date', 'id')
+        if options['meetings']:
+            try:
+                ids = [int(part) for part in options['meetings'].split(',') if part.strip()]
+            except ValueError:
+                raise CommandError('--meetings must be comma-separated ids')
+            meetings = meetings.filter(pk__in=ids)
+        elif not (options['start'] and options['end']):
+            raise CommandError('Give --meetings or both --start and --end')
+        for option, lookup in [('start', 'date__gte'), ('end', 'date__lte')]:
+            if options[option]:
+                date = parse_date(options[option])
+                if date is None:
+                    raise CommandError(f'--{option} must be YYYY-MM-DD')
+                meetings = meetings.filter(**{lookup: date})
+        if not options['output'] and not options['zip']:
+            raise CommandError('Give --output, --zip or both')
+        
+        output_dir = Path(options['output'] or tempfile.mkdtemp(prefix='packets-'))
+        
+        def progress(done, total):
+            self.stdout.write(f'\r{done}/{total} packets', ending='')
+            self.stdout.flush()
+        
+        summary = export_packets(
+            list(meetings), output_dir, format=options['format'],
+            include_attachments=not options['no_attachments'], live=options['live'],
+            workers=options['workers'], progress=progress
+        )
+        self.stdout.write('')
+        self.stdout.write(
+            f"{summary['exported']} exported, {summary['skipped']} already present, "
+            f"{len(summary['failed'])} failed, in {output_dir}"
+        )
+        for meeting_id, error in summary['failed'].items():
+            self.stderr.write(f'Meeting {meeting_id}: {error}')
+        
+        if options['zip']:
+            if summary['failed']:
+                raise CommandError('Not writing the ZIP while packets are missing; run again to retry them')
+            write_zip(output_dir, options['zip'], options['format'])
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['zip']}"))
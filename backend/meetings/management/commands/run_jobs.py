@@ -0,0 +1,78 @@
+"""
+Worker for database-backed background jobs (see meetings.jobs)
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from meetings.jobs import claim_job, run_job, requeue_stale_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (agenda packets etc.)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=getattr(settings, 'JOB_WORKER_CONCURRENCY', 1),
+            help='Jobs this worker runs at the same time'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty instead of polling'
+        )
+    
+    def handle(self, *args, **options):
+        worker_name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f"Worker {worker_name} starting with concurrency {options['concurrency']}")
+        
+        threads = [
+            threading.Thread(
+                target=self.work, args=(f'{worker_name}:{index}', options), daemon=True
+            )
+            for index in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker')
+    
+    def work(self, worker, options):
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    requeue_stale_jobs()
+                    job = claim_job(worker)
+                    if job is None:
+                        if options['once']:
+                            return
+                        time.sleep(options['poll_interval'])
+                        continue
+                    
+                    started = time.monotonic()
+                    job = run_job(job)
+                except Exception:
+                    # Keep polling; a database outage should not stop the worker for good
+                    logger.exception(f'Job worker {worker} iteration failed')
+                    if options['once']:
+                        raise
+                    time.sleep(options['poll_interval'])
+                    continue
+                self.stdout.write(
+                    f"Job {job.id} ({job.kind}) {job.status} in {time.monotonic() - started:.1f}s"
+                )
+        finally:
+            connection.close()
@@ -0,0 +1,78 @@
+"""
+Worker delivering the email outbox and due notifications (see meetings.outbox and meetings.notifications)
+"""
+import logging
+import os
+import socket
+import time
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from meetings.notifications import dispatch_due_notifications, send_daily_digests
+from meetings.outbox import RateLimiter, claim_batch, requeue_stale_messages, send_batch
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send queued notification emails, coalesced notifications and daily digests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50),
+            help='Messages claimed and sent per batch'
+        )
+        parser.add_argument(
+            '--rate-limit', type=float, default=getattr(settings, 'EMAIL_OUTBOX_RATE_LIMIT', 10),
+            help='Most messages sent per second (0 for no limit)'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds to wait when the outbox is empty'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the outbox is empty instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f"Outbox worker {worker} starting")
+
+        mail = get_connection()
+        rate_limiter = RateLimiter(options['rate_limit'])
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    dispatch_due_notifications()
+                    send_daily_digests()
+                    requeue_stale_messages()
+                    messages = claim_batch(worker, options['batch_size'])
+                except Exception:
+                    # Keep polling; a database outage should not stop the worker for good
+                    logger.exception('Outbox worker iteration failed')
+                    if options['once']:
+                        raise
+                    time.sleep(options['poll_interval'])
+                    continue
+                if not messages:
+                    # Don't hold the SMTP connection open while idle
+                    mail.close()
+                    if options['once']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                started = time.monotonic()
+                counts = send_batch(messages, mail, rate_limiter)
+                self.stdout.write(
+                    f"Sent {counts['sent']}, retrying {counts['retrying']}, failed {counts['failed']} "
+                    f"in {time.monotonic() - started:.1f}s"
+                )
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping outbox worker')
+        finally:
+            mail.close()
+            connection.close()
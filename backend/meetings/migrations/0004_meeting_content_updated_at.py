@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0003_emailsubscription_meeting_video_embed_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='content_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Bumped whenever the meeting or anything on its agenda changes'),
+        ),
+    ]
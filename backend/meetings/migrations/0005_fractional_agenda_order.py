@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:03
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0004_meeting_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='agendasection',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='agendaitem',
+            name='order',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AlterField(
+            model_name='agendasection',
+            name='order',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddIndex(
+            model_name='agendasection',
+            index=models.Index(fields=['meeting', 'order'], name='agenda_sect_meeting_5d5783_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:04
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def initialize_sequences(apps, schema_editor):
+    """Start the counters where the old COUNT-based numbering left off."""
+    Meeting = apps.get_model('meetings', 'Meeting')
+    AgendaSection = apps.get_model('meetings', 'AgendaSection')
+    
+    for meeting in Meeting.objects.annotate(n_items=Count('agenda_items')).iterator():
+        sections = list(AgendaSection.objects.filter(meeting=meeting).annotate(
+            n_items=Count('items')
+        ).order_by('order', 'id'))
+        for position, section in enumerate(sections, start=1):
+            section.position = position
+            section.item_sequence = section.n_items
+        AgendaSection.objects.bulk_update(sections, ['position', 'item_sequence'])
+        Meeting.objects.filter(pk=meeting.pk).update(
+            section_sequence=len(sections), item_sequence=meeting.n_items
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0005_fractional_agenda_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendasection',
+            name='item_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='agendasection',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='item_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='section_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(initialize_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('meetings', '0006_agenda_number_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgendaSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('data', models.JSONField(help_text='Agenda tree, see meetings.agenda')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='agenda_snapshots', to=settings.AUTH_USER_MODEL)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='meetings.meeting')),
+            ],
+            options={
+                'db_table': 'agenda_snapshots',
+                'ordering': ['meeting', '-version'],
+                'unique_together': {('meeting', 'version')},
+            },
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='published_snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='meetings.agendasnapshot'),
+        ),
+    ]
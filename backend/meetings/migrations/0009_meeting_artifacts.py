@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import meetings.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0008_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('agenda_pdf', 'Agenda PDF'), ('packet_pdf', 'Agenda Packet PDF'), ('packet_docx', 'Agenda Packet DOCX'), ('ics', 'Calendar Entry'), ('rss_item', 'RSS Item')], max_length=20)),
+                ('file', models.FileField(blank=True, upload_to=meetings.models.artifact_upload_path)),
+                ('content', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='meetings.meeting')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='meetings.agendasnapshot')),
+            ],
+            options={
+                'db_table': 'meeting_artifacts',
+                'ordering': ['meeting', 'kind'],
+                'unique_together': {('snapshot', 'kind')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0009_meeting_artifacts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='progress',
+            field=models.JSONField(blank=True, help_text='{"done": n, "total": n} while running', null=True),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SUBSCRIPTION_TYPES = ['meeting_published', 'agenda_updated', 'minutes_approved', 'meeting_reminder']
+
+NOTIFICATION_TYPES = {
+    'published': 'meeting_published',
+    'updated': 'agenda_updated',
+    'reminder': 'meeting_reminder',
+}
+
+
+def fill_subscription_types(apps, schema_editor):
+    """Index existing subscriptions, mapping notification type names to subscription types."""
+    EmailSubscription = apps.get_model('meetings', 'EmailSubscription')
+    EmailSubscriptionType = apps.get_model('meetings', 'EmailSubscriptionType')
+    
+    rows = []
+    for subscription in EmailSubscription.objects.iterator(chunk_size=2000):
+        types = []
+        for subscription_type in subscription.subscription_types or []:
+            subscription_type = NOTIFICATION_TYPES.get(subscription_type, subscription_type)
+            if subscription_type in SUBSCRIPTION_TYPES and subscription_type not in types:
+                types.append(subscription_type)
+        if types != subscription.subscription_types:
+            EmailSubscription.objects.filter(pk=subscription.pk).update(subscription_types=types)
+        rows.extend(
+            EmailSubscriptionType(subscription_id=subscription.pk, subscription_type=subscription_type)
+            for subscription_type in types
+        )
+        if len(rows) >= 2000:
+            EmailSubscriptionType.objects.bulk_create(rows)
+            rows = []
+    EmailSubscriptionType.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0011_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailsubscription',
+            name='subscription_types',
+            field=models.JSONField(default=list, help_text='List of subscription types: meeting_published, agenda_updated, minutes_approved, meeting_reminder'),
+        ),
+        migrations.CreateModel(
+            name='EmailSubscriptionType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subscription_type', models.CharField(choices=[('meeting_published', 'Meeting Published'), ('agenda_updated', 'Agenda Updated'), ('minutes_approved', 'Minutes Approved'), ('meeting_reminder', 'Meeting Reminder')], max_length=50)),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='types', to='meetings.emailsubscription')),
+            ],
+            options={
+                'db_table': 'email_subscription_types',
+                'indexes': [models.Index(fields=['subscription_type', 'subscription'], name='email_subsc_subscri_443de5_idx')],
+                'unique_together': {('subscription', 'subscription_type')},
+            },
+        ),
+        migrations.RunPython(fill_subscription_types, migrations.RunPython.noop),
+    ]
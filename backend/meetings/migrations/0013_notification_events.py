@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0012_email_subscription_types'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailsubscription',
+            name='subscription_types',
+            field=models.JSONField(default=list, help_text='List of subscription types: meeting_published, agenda_updated, minutes_approved, meeting_reminder, daily_digest'),
+        ),
+        migrations.AlterField(
+            model_name='emailsubscriptiontype',
+            name='subscription_type',
+            field=models.CharField(choices=[('meeting_published', 'Meeting Published'), ('agenda_updated', 'Agenda Updated'), ('minutes_approved', 'Minutes Approved'), ('meeting_reminder', 'Meeting Reminder'), ('daily_digest', 'Daily Digest')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=1, help_text='Events merged into this one')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_event_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('send_after', models.DateTimeField(help_text='End of the coalescing window')),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('digested_at', models.DateTimeField(blank=True, null=True)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='meetings.meeting')),
+            ],
+            options={
+                'db_table': 'notification_events',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['sent_at', 'send_after'], name='notificatio_sent_at_48ad23_idx'), models.Index(fields=['digested_at', 'created_at'], name='notificatio_digeste_95b11e_idx'), models.Index(fields=['meeting', 'sent_at'], name='notificatio_meeting_b00449_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0013_notification_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('queued', models.PositiveIntegerField(default=0, help_text='Reminder emails queued')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='meetings.meeting')),
+            ],
+            options={
+                'db_table': 'meeting_reminders',
+                'ordering': ['-created_at'],
+                'unique_together': {('meeting', 'starts_at')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+def fail_duplicate_jobs(apps, schema_editor):
+    """Fail all but the oldest active job per dedupe key so the constraint can be added."""
+    Job = apps.get_model('meetings', 'Job')
+    seen = set()
+    duplicates = []
+    active = Job.objects.filter(status__in=['pending', 'running']).order_by('id')
+    for pk, dedupe_key in active.values_list('id', 'dedupe_key'):
+        if dedupe_key in seen:
+            duplicates.append(pk)
+        seen.add(dedupe_key)
+    Job.objects.filter(pk__in=duplicates).update(status='failed', error='Duplicate of an earlier job')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0014_meeting_reminders'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('dedupe_key',), name='jobs_active_dedupe_key'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:03
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_heartbeats(apps, schema_editor):
+    """Running jobs have not reported since they started."""
+    Job = apps.get_model('meetings', 'Job')
+    Job.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0015_job_active_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last claim or progress report; a running job silent for JOB_TIMEOUT is retried', null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 """
 Models for meetings, agendas, and minutes
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
@@ -9,6 +10,39 @@ from django.core.validators import MinValueValidator
 User = get_user_model()
 
 
+def allocate_sequence(model, pk, field, count=1):
+    """
+    Reserve ``count`` consecutive values from a counter column.
+    
+    The increment is a single UPDATE, which holds the row lock until the
+    surrounding transaction ends, so concurrent callers never see the same
+    values. Returns the reserved values as a range.
+    """
+    with transaction.atomic():
+        model.objects.filter(pk=pk).update(**{field: F(field) + count})
+        last = model.objects.filter(pk=pk).values_list(field, flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def exclude_managed_fields(instance, fields, kwargs):
+    """
+    Keep a plain ``save()`` of an existing row from writing ``fields``.
+    
+    Counters and pointers such as those reserved by allocate_sequence are
+    only changed with targeted UPDATEs, so a stale instance saved later
+    would otherwise write their old values back. Saves that name the
+    fields in ``update_fields`` still write them, and new rows are
+    inserted in full. Returns the save() kwargs to use.
+    """
+    if instance._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+        return kwargs
+    kwargs['update_fields'] = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in fields
+    ]
+    return kwargs
+
+
 class Meeting(models.Model):
     """
     Represents a meeting (city council, board, etc.)
@@ -60,6 +94,19 @@ class Meeting(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='created_meetings')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    content_updated_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Bumped whenever the meeting or anything on its agenda changes'
+    )
+    
+    # Agenda as last published (see create_snapshot)
+    published_snapshot = models.ForeignKey(
+        'AgendaSnapshot', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    
+    # Numbering counters (see allocate_sequence)
+    section_sequence = models.PositiveIntegerField(default=0)
+    item_sequence = models.PositiveIntegerField(default=0)  # Items without a section
     
     class Meta:
         db_table = 'meetings'
@@ -72,13 +119,111 @@ class Meeting(models.Model):
     def __str__(self):
         return f"{self.title} - {self.date}"
     
-    def publish(self):
-        """Publish the meeting agenda."""
+    # Written only by allocate_sequence, renumber_agenda and create_snapshot
+    MANAGED_FIELDS = ['section_sequence', 'item_sequence', 'published_snapshot']
+    
+    def save(self, *args, **kwargs):
+        """Bump the content version marker on every save."""
+        kwargs = exclude_managed_fields(self, self.MANAGED_FIELDS, kwargs)
+        self.content_updated_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'content_updated_at'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def touch(cls, meeting_id):
+        """Bump the content version marker after a change to a meeting's agenda."""
+        cls.objects.filter(pk=meeting_id).update(content_updated_at=timezone.now())
+    
+    def renumber_agenda(self):
+        """
+        Renumber sections and items to match the current agenda order.
+        
+        One pass over the sections and items; the counters are reset so new
+        items continue from the renumbered values.
+        """
+        from .signals import meeting_tree_changed
+        
+        sections = list(self.sections.order_by('order', 'id'))
+        by_id = {}
+        for position, section in enumerate(sections, start=1):
+            section.position = position
+            section.item_sequence = 0
+            by_id[section.id] = section
+        
+        items = list(self.agenda_items.order_by('order', 'id'))
+        unsectioned = 0
+        for item in items:
+            section = by_id.get(item.section_id)
+            if section is not None:
+                section.item_sequence += 1
+                item.number = f"{section.position}.{section.item_sequence}"
+            else:
+                unsectioned += 1
+                item.number = str(unsectioned)
+        
+        with transaction.atomic():
+            AgendaSection.objects.bulk_update(sections, ['position', 'item_sequence'])
+            AgendaItem.objects.bulk_update(items, ['number'])
+            Meeting.objects.filter(pk=self.pk).update(
+                section_sequence=len(sections), item_sequence=unsectioned
+            )
+        self.section_sequence = len(sections)
+        self.item_sequence = unsectioned
+        meeting_tree_changed(self.pk)
+    
+    def publish(self, user=None):
+        """
+        Publish the meeting agenda and freeze a snapshot of it.
+        
+        Publishing an already published meeting records an amended snapshot
+        if the agenda has changed since it was last posted.
+        """
         if self.status == 'draft':
             self.status = 'published'
             self.published_at = timezone.now()
             self.posted_at = timezone.now()
             self.save()
+        if self.status == 'published':
+            return self.create_snapshot(user)
+        return None
+    
+    def create_snapshot(self, user=None):
+        """
+        Freeze the current agenda tree as the next snapshot version and
+        queue pre-rendering of its public downloads.
+        
+        Returns the existing latest snapshot instead if nothing changed.
+        """
+        from .agenda import build_agenda_tree, hash_agenda_tree
+        from .signals import meeting_tree_changed
+        
+        data = build_agenda_tree(self)
+        content_hash = hash_agenda_tree(data)
+        
+        with transaction.atomic():
+            # Lock the meeting so concurrent publishes get distinct versions
+            Meeting.objects.select_for_update().filter(pk=self.pk).first()
+            latest = self.snapshots.order_by('-version').first()
+            if latest is not None and latest.content_hash == content_hash:
+                return latest
+            snapshot = AgendaSnapshot.objects.create(
+                meeting=self,
+                version=latest.version + 1 if latest else 1,
+                data=data,
+                content_hash=content_hash,
+                created_by=user,
+            )
+            Meeting.objects.filter(pk=self.pk).update(published_snapshot=snapshot)
+            
+            # Pre-render downloads so the first readers get static files
+            from .jobs import enqueue
+            transaction.on_commit(lambda: enqueue('publish_artifacts', {'snapshot': snapshot.id}, user=user))
+        
+        self.published_snapshot = snapshot
+        meeting_tree_changed(self.pk)
+        return snapshot
     
     def is_published(self):
         """Check if meeting is published."""
@@ -141,16 +286,47 @@ class AgendaSection(models.Model):
     """
     meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='sections')
     title = models.CharField(max_length=200)
-    order = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    order = models.FloatField(default=0, validators=[MinValueValidator(0)])  # Fractional, see ordering.py
     description = models.TextField(blank=True)
+    position = models.PositiveIntegerField(default=0)  # Section number, see Meeting.renumber_agenda
+    item_sequence = models.PositiveIntegerField(default=0)  # Last item number handed out
     
     class Meta:
         db_table = 'agenda_sections'
         ordering = ['order', 'id']
-        unique_together = [['meeting', 'order']]
+        indexes = [
+            models.Index(fields=['meeting', 'order']),
+        ]
     
     def __str__(self):
         return f"{self.meeting.title} - {self.title}"
+    
+    # Written only by allocate_sequence and Meeting.renumber_agenda
+    MANAGED_FIELDS = ['item_sequence']
+    
+    def save(self, *args, **kwargs):
+        """Number new sections after the meeting's existing ones."""
+        if not self.position:
+            self.position = allocate_sequence(Meeting, self.meeting_id, 'section_sequence')[0]
+        kwargs = exclude_managed_fields(self, self.MANAGED_FIELDS, kwargs)
+        super().save(*args, **kwargs)
+
+
+class AgendaItemManager(models.Manager):
+    """Manager for AgendaItem that numbers bulk-created items."""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """Number unnumbered items a block per meeting/section, then insert them."""
+        from .signals import meeting_tree_changed
+        
+        objs = list(objs)
+        with transaction.atomic():
+            AgendaItem.assign_numbers(objs)
+            created = super().bulk_create(objs, *args, **kwargs)
+        # bulk_create sends no post_save, so invalidate here
+        for meeting_id in {obj.meeting_id for obj in objs}:
+            meeting_tree_changed(meeting_id)
+        return created
 
 
 class AgendaItem(models.Model):
@@ -168,7 +344,7 @@ class AgendaItem(models.Model):
     section = models.ForeignKey(AgendaSection, on_delete=models.SET_NULL, null=True, blank=True, related_name='items')
     title = models.CharField(max_length=500)
     description = models.TextField()
-    order = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    order = models.FloatField(default=0, validators=[MinValueValidator(0)])  # Fractional, see ordering.py
     number = models.CharField(max_length=20, blank=True)  # Auto-generated item number
     
     # Submission tracking
@@ -183,6 +359,8 @@ class AgendaItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = AgendaItemManager()
+    
     class Meta:
         db_table = 'agenda_items'
         ordering = ['order', 'id']
@@ -197,17 +375,93 @@ class AgendaItem(models.Model):
     def save(self, *args, **kwargs):
         """Auto-generate item number if not set."""
         if not self.number:
-            # Generate number based on section and order
-            if self.section:
-                section_items = AgendaItem.objects.filter(
-                    meeting=self.meeting,
-                    section=self.section
-                ).exclude(id=self.id).count()
-                self.number = f"{self.section.order + 1}.{section_items + 1}"
-            else:
-                items = AgendaItem.objects.filter(meeting=self.meeting).exclude(id=self.id).count()
-                self.number = str(items + 1)
+            AgendaItem.assign_numbers([self])
         super().save(*args, **kwargs)
+    
+    @staticmethod
+    def assign_numbers(items):
+        """
+        Give unnumbered items the next numbers of their section (or meeting).
+        
+        Numbers are reserved a block per section/meeting, so numbering a
+        batch costs a constant number of queries per block rather than a
+        COUNT per item.
+        """
+        groups = {}
+        for item in items:
+            if not item.number:
+                groups.setdefault((item.meeting_id, item.section_id), []).append(item)
+        if not groups:
+            return
+        
+        section_ids = [section_id for _, section_id in groups if section_id]
+        positions = dict(
+            AgendaSection.objects.filter(pk__in=section_ids).values_list('pk', 'position')
+        )
+        for (meeting_id, section_id), group in groups.items():
+            if section_id:
+                numbers = allocate_sequence(AgendaSection, section_id, 'item_sequence', len(group))
+                prefix = f"{positions[section_id]}."
+            else:
+                numbers = allocate_sequence(Meeting, meeting_id, 'item_sequence', len(group))
+                prefix = ''
+            for item, number in zip(group, numbers):
+                item.number = f"{prefix}{number}"
+
+
+class AgendaSnapshot(models.Model):
+    """
+    Immutable copy of a meeting's agenda tree as it was published.
+    """
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='snapshots')
+    version = models.PositiveIntegerField()
+    data = models.JSONField(help_text='Agenda tree, see meetings.agenda')
+    content_hash = models.CharField(max_length=64)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='agenda_snapshots')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'agenda_snapshots'
+        ordering = ['meeting', '-version']
+        unique_together = [['meeting', 'version']]
+    
+    def __str__(self):
+        return f"{self.meeting.title} - v{self.version}"
+
+
+def artifact_upload_path(instance, filename):
+    """Store artifacts by meeting."""
+    return f"artifacts/{instance.meeting_id}/{filename}"
+
+
+class MeetingArtifact(models.Model):
+    """
+    Output pre-rendered from a published snapshot (see meetings.jobs).
+    
+    Binary artifacts are stored in ``file``, text ones in ``content``.
+    """
+    KIND_CHOICES = [
+        ('agenda_pdf', 'Agenda PDF'),
+        ('packet_pdf', 'Agenda Packet PDF'),
+        ('packet_docx', 'Agenda Packet DOCX'),
+        ('ics', 'Calendar Entry'),
+        ('rss_item', 'RSS Item'),
+    ]
+    
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='artifacts')
+    snapshot = models.ForeignKey(AgendaSnapshot, on_delete=models.CASCADE, related_name='artifacts')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file = models.FileField(upload_to=artifact_upload_path, blank=True)
+    content = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'meeting_artifacts'
+        ordering = ['meeting', 'kind']
+        unique_together = [['snapshot', 'kind']]
+    
+    def __str__(self):
+        return f"{self.meeting.title} - {self.get_kind_display()} (v{self.snapshot.version})"
 
 
 class Minute(models.Model):
@@ -291,12 +545,35 @@ class Vote(models.Model):
 class EmailSubscription(models.Model):
     """
     Email subscription for meeting notifications.
+    
+    ``subscription_types`` is mirrored into EmailSubscriptionType rows on
+    save, which is what notification fan-out queries.
     """
+    SUBSCRIPTION_TYPES = [
+        ('meeting_published', 'Meeting Published'),
+        ('agenda_updated', 'Agenda Updated'),
+        ('minutes_approved', 'Minutes Approved'),
+        ('meeting_reminder', 'Meeting Reminder'),
+        ('daily_digest', 'Daily Digest'),
+    ]
+    
+    # Notification type (see send_meeting_notification) -> subscription type.
+    # Subscribers with ``daily_digest`` get the types in DIGEST_TYPES in one
+    # daily email (see meetings.notifications) instead of one by one.
+    NOTIFICATION_TYPES = {
+        'published': 'meeting_published',
+        'updated': 'agenda_updated',
+        'minutes_approved': 'minutes_approved',
+        'reminder': 'meeting_reminder',
+    }
+    
+    DIGEST_TYPES = ['published', 'updated', 'minutes_approved']
+    
     email = models.EmailField(unique=True)
     is_active = models.BooleanField(default=True)
     subscription_types = models.JSONField(
         default=list,
-        help_text='List of subscription types: meeting_published, agenda_updated, minutes_approved'
+        help_text='List of subscription types: meeting_published, agenda_updated, minutes_approved, meeting_reminder, daily_digest'
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -309,11 +586,158 @@ class EmailSubscription(models.Model):
     def __str__(self):
         return f"{self.email} - {', '.join(self.subscription_types) if self.subscription_types else 'None'}"
     
+    @classmethod
+    def normalize_types(cls, types):
+        """
+        Map ``types`` to known subscription types, in order and without
+        duplicates. Notification type names ('published', ...) are accepted
+        for their subscription type; unknown names are dropped.
+        """
+        known = dict(cls.SUBSCRIPTION_TYPES)
+        normalized = []
+        for subscription_type in types or []:
+            subscription_type = cls.NOTIFICATION_TYPES.get(subscription_type, subscription_type)
+            if subscription_type in known and subscription_type not in normalized:
+                normalized.append(subscription_type)
+        return normalized
+    
     def save(self, *args, **kwargs):
         if not self.unsubscribe_token:
             import secrets
             self.unsubscribe_token = secrets.token_urlsafe(32)
-        super().save(*args, **kwargs)
+        self.subscription_types = self.normalize_types(self.subscription_types)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.sync_types()
+    
+    def sync_types(self):
+        """Make the EmailSubscriptionType rows match ``subscription_types``."""
+        existing = set(self.types.values_list('subscription_type', flat=True))
+        wanted = set(self.subscription_types)
+        if existing - wanted:
+            self.types.filter(subscription_type__in=existing - wanted).delete()
+        if wanted - existing:
+            EmailSubscriptionType.objects.bulk_create([
+                EmailSubscriptionType(subscription=self, subscription_type=subscription_type)
+                for subscription_type in sorted(wanted - existing)
+            ])
+
+
+class EmailSubscriptionType(models.Model):
+    """
+    One subscription type of an EmailSubscription, indexed for fan-out.
+    """
+    subscription = models.ForeignKey(EmailSubscription, on_delete=models.CASCADE, related_name='types')
+    subscription_type = models.CharField(max_length=50, choices=EmailSubscription.SUBSCRIPTION_TYPES)
+    
+    class Meta:
+        db_table = 'email_subscription_types'
+        unique_together = [['subscription', 'subscription_type']]
+        indexes = [
+            models.Index(fields=['subscription_type', 'subscription']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subscription.email} - {self.subscription_type}"
+
+
+class NotificationEvent(models.Model):
+    """
+    Something subscribers are told about a meeting (see meetings.notifications).
+    
+    Events for the same meeting within the coalescing window are merged into
+    one, which is fanned out once ``send_after`` has passed and included in
+    the next daily digest.
+    """
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='notification_events')
+    notification_type = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=1, help_text='Events merged into this one')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_event_at = models.DateTimeField(default=timezone.now)
+    send_after = models.DateTimeField(help_text='End of the coalescing window')
+    sent_at = models.DateTimeField(null=True, blank=True)
+    digested_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_events'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['sent_at', 'send_after']),
+            models.Index(fields=['digested_at', 'created_at']),
+            models.Index(fields=['meeting', 'sent_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.notification_type} - {self.meeting_id} (x{self.count})"
+
+
+class MeetingReminder(models.Model):
+    """
+    A reminder sent for a meeting starting at ``starts_at``.
+    
+    Keeps ``dispatch_reminders`` from reminding twice; a rescheduled meeting
+    gets a new reminder for its new start.
+    """
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='reminders')
+    starts_at = models.DateTimeField()
+    queued = models.PositiveIntegerField(default=0, help_text='Reminder emails queued')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'meeting_reminders'
+        ordering = ['-created_at']
+        unique_together = [['meeting', 'starts_at']]
+    
+    def __str__(self):
+        return f"Reminder for {self.meeting_id} at {self.starts_at}"
+
+
+class OutboxMessage(models.Model):
+    """
+    One email to one recipient, sent by the ``send_outbox`` worker
+    (see meetings.outbox).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    to_email = models.EmailField()
+    subscription = models.ForeignKey(
+        EmailSubscription, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_messages'
+    )
+    meeting = models.ForeignKey(
+        Meeting, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_messages'
+    )
+    notification_type = models.CharField(max_length=50, blank=True)
+    subject = models.CharField(max_length=500)
+    body_text = models.TextField()
+    body_html = models.TextField(blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    send_after = models.DateTimeField(default=timezone.now, help_text='Not sent before this time (retry backoff)')
+    error = models.TextField(blank=True)
+    
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} - {self.status}"
 
 
 class ElectronicSignature(models.Model):
@@ -410,3 +834,54 @@ class DocumentAccessLog(models.Model):
 
 
 
+
+
+class Job(models.Model):
+    """
+    Background job run by the ``run_jobs`` worker (see meetings.jobs).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    dedupe_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text='Not picked up before this time (retry backoff)')
+    
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    progress = models.JSONField(null=True, blank=True, help_text='{"done": n, "total": n} while running')
+    
+    worker = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, help_text='Last claim or progress report; a running job silent for JOB_TIMEOUT is retried'
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+        constraints = [
+            # At most one pending or running job per dedupe key (see jobs.enqueue)
+            models.UniqueConstraint(
+                fields=['dedupe_key'], condition=models.Q(status__in=['pending', 'running']),
+                name='jobs_active_dedupe_key'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.id} - {self.status}"
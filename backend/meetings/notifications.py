@@ -0,0 +1,275 @@
+"""
+Notification events: coalescing and daily digests
+
+Publishing, editing a published meeting and approving minutes record a
+NotificationEvent instead of emailing at once:
+
+- Events for the same meeting within ``settings.NOTIFICATION_COALESCE_MINUTES``
+  of its first pending event are merged into it, so a burst of edits sends
+  one "updated" email (and an update merges into a pending "published").
+- Once the window has passed, ``dispatch_due_notifications`` fans the event
+  out to the outbox (see meetings.services.send_meeting_notification).
+- Subscribers with the ``daily_digest`` type get the day's events in one
+  email instead, sent by ``send_daily_digests`` after
+  ``settings.NOTIFICATION_DIGEST_HOUR`` the next morning.
+
+Both run in the ``send_outbox`` worker loop. Reminders before meetings
+are queued by ``dispatch_reminders`` (``manage.py dispatch_reminders``).
+"""
+import logging
+from datetime import datetime, timedelta
+from itertools import groupby
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.html import escape
+from .models import (
+    Meeting, EmailSubscription, EmailSubscriptionType, NotificationEvent, OutboxMessage, MeetingReminder
+)
+
+logger = logging.getLogger(__name__)
+
+# A pending event of a type listed here absorbs new events of the key type
+COALESCES_INTO = {
+    'published': ['published', 'updated'],
+    'updated': ['published', 'updated'],
+}
+
+# Where an event's type changes on merging, the stronger one is kept
+TYPE_PRECEDENCE = ['published', 'updated']
+
+DIGEST_CHUNK_SIZE = 2000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def record_notification(meeting, notification_type: str) -> NotificationEvent:
+    """
+    Record that subscribers should hear about ``meeting``.
+
+    Merges into the meeting's pending event of a compatible type if there
+    is one, otherwise starts a new coalescing window.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = NotificationEvent.objects.select_for_update().filter(
+            meeting=meeting, sent_at__isnull=True,
+            notification_type__in=COALESCES_INTO.get(notification_type, [notification_type])
+        ).order_by('id').first()
+        if pending is None:
+            return NotificationEvent.objects.create(
+                meeting=meeting,
+                notification_type=notification_type,
+                last_event_at=now,
+                send_after=now + timedelta(minutes=_setting('NOTIFICATION_COALESCE_MINUTES', 15)),
+            )
+
+        if (notification_type in TYPE_PRECEDENCE and pending.notification_type in TYPE_PRECEDENCE
+                and TYPE_PRECEDENCE.index(notification_type) < TYPE_PRECEDENCE.index(pending.notification_type)):
+            pending.notification_type = notification_type
+        pending.count += 1
+        pending.last_event_at = now
+        pending.save(update_fields=['notification_type', 'count', 'last_event_at'])
+        return pending
+
+
+def dispatch_due_notifications() -> int:
+    """
+    Fan out events whose coalescing window has passed; returns how many.
+
+    An event is claimed in the same transaction that queues its emails, so
+    an event whose emails could not be queued is tried again on the next
+    run.
+    """
+    from .services import send_meeting_notification
+
+    dispatched = 0
+    due = NotificationEvent.objects.filter(
+        sent_at__isnull=True, send_after__lte=timezone.now()
+    ).select_related('meeting').order_by('send_after', 'id')
+    for event in due:
+        try:
+            with transaction.atomic():
+                # Only one worker's UPDATE can match while the event is unsent
+                if not NotificationEvent.objects.filter(
+                    pk=event.pk, sent_at__isnull=True
+                ).update(sent_at=timezone.now()):
+                    continue
+                queued = send_meeting_notification(event.meeting, event.notification_type)
+        except Exception:
+            logger.exception(f"Notification event {event.id} could not be queued")
+            continue
+        logger.info(f"Notification {event.notification_type} for meeting {event.meeting_id} queued for {queued}")
+        dispatched += 1
+    return dispatched
+
+
+def render_digest(events: list, unsubscribe_url: str):
+    """
+    Render a digest email of ``events``.
+
+    Returns:
+        (subject, plain text body, HTML body)
+    """
+    labels = {
+        'published': 'Published',
+        'updated': 'Updated',
+        'minutes_approved': 'Minutes approved',
+    }
+    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://escribe-frontend.onrender.com')
+    subject = f"Meeting updates: {len(events)} {'change' if len(events) == 1 else 'changes'}"
+
+    lines = ['Meeting updates since the last digest:', '']
+    rows = []
+    for event in events:
+        meeting = event.meeting
+        label = labels.get(event.notification_type, event.notification_type.title())
+        url = f"{frontend_url}/meetings/{meeting.id}"
+        lines.append(f"- {label}: {meeting.title} ({meeting.date}) {url}")
+        rows.append(
+            f'<li><strong>{label}:</strong> <a href="{url}">{escape(meeting.title)}</a> ({meeting.date})</li>'
+        )
+    lines += ['', f"Unsubscribe: {unsubscribe_url}"]
+
+    html_message = f"""
+        <html>
+        <body>
+            <h2>Meeting updates</h2>
+            <ul>{''.join(rows)}</ul>
+            <p style="font-size: small"><a href="{unsubscribe_url}">Unsubscribe</a></p>
+        </body>
+        </html>
+        """
+    return subject, '\n'.join(lines), html_message
+
+
+def send_daily_digests(now=None) -> int:
+    """
+    Queue digest emails of the events recorded before today.
+
+    Does nothing before ``NOTIFICATION_DIGEST_HOUR``, when email is not
+    configured or when there are no undigested events. Events are claimed
+    in the transaction that queues the digests, so the digest goes out once
+    however many workers call this, and is tried again if queuing fails.
+
+    Returns:
+        Number of digest emails queued
+    """
+    from .outbox import queue_messages
+    from .services import get_unsubscribe_url
+
+    now = timezone.localtime(now)
+    if now.hour < _setting('NOTIFICATION_DIGEST_HOUR', 7) or not _setting('EMAIL_HOST', ''):
+        return 0
+    start_of_today = timezone.make_aware(datetime.combine(now.date(), datetime.min.time()))
+
+    candidates = NotificationEvent.objects.filter(
+        digested_at__isnull=True, created_at__lt=start_of_today,
+        notification_type__in=EmailSubscription.DIGEST_TYPES,
+    )
+    ids = list(candidates.values_list('id', flat=True))
+    if not ids:
+        return 0
+    with transaction.atomic():
+        claimed_at = timezone.now()
+        NotificationEvent.objects.filter(pk__in=ids, digested_at__isnull=True).update(digested_at=claimed_at)
+        events = list(NotificationEvent.objects.filter(
+            pk__in=ids, digested_at=claimed_at
+        ).select_related('meeting').order_by('meeting__date', 'meeting_id', 'created_at'))
+        if not events:
+            return 0
+
+        # One query for every digest subscriber's types, in subscriber order
+        rows = EmailSubscriptionType.objects.filter(
+            subscription__is_active=True, subscription__types__subscription_type='daily_digest'
+        ).order_by('subscription_id').values_list(
+            'subscription_id', 'subscription__email', 'subscription__unsubscribe_token', 'subscription_type'
+        )
+
+        queued = 0
+        messages = []
+        for (subscription_id, email, token), group in groupby(
+            rows.iterator(chunk_size=DIGEST_CHUNK_SIZE), key=lambda row: row[:3]
+        ):
+            types = {row[3] for row in group} - {'daily_digest'}
+            # A digest on its own means every kind of update
+            wanted = [
+                event for event in events
+                if not types or EmailSubscription.NOTIFICATION_TYPES.get(event.notification_type) in types
+            ]
+            if not wanted:
+                continue
+            unsubscribe_url = get_unsubscribe_url(EmailSubscription(unsubscribe_token=token))
+            subject, plain_message, html_message = render_digest(wanted, unsubscribe_url)
+            messages.append(OutboxMessage(
+                to_email=email,
+                subscription_id=subscription_id,
+                notification_type='daily_digest',
+                subject=subject,
+                body_text=plain_message,
+                body_html=html_message,
+                headers={
+                    'List-Unsubscribe': f'<{unsubscribe_url}>',
+                    'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+                },
+            ))
+            if len(messages) >= DIGEST_CHUNK_SIZE:
+                queued += queue_messages(messages)
+                messages = []
+        queued += queue_messages(messages)
+    logger.info(f"Daily digest of {len(events)} events queued for {queued} subscribers")
+    return queued
+
+
+def dispatch_reminders(now=None) -> list:
+    """
+    Queue reminder emails for published meetings starting within
+    ``settings.MEETING_REMINDER_HOURS``.
+
+    Candidates come from a date-range query on the ``(date, status)`` index,
+    so the cost depends on the meetings in the window, not on the table.
+    Each meeting start is reminded once: a MeetingReminder row (unique per
+    meeting and start) is claimed in the same transaction that queues its
+    emails, so a start whose emails could not be queued is tried again on
+    the next run. Nothing is claimed while email is not configured.
+
+    Returns:
+        The MeetingReminders created
+    """
+    from .services import send_meeting_notification
+
+    if not getattr(settings, 'EMAIL_HOST', None):
+        return []
+
+    now = timezone.localtime(now)
+    until = now + timedelta(hours=_setting('MEETING_REMINDER_HOURS', 24))
+    candidates = []
+    for meeting in Meeting.objects.filter(
+        date__gte=now.date(), date__lte=until.date(), status='published'
+    ):
+        starts_at = timezone.make_aware(datetime.combine(meeting.date, meeting.time))
+        if now <= starts_at <= until:
+            candidates.append((meeting, starts_at))
+    if not candidates:
+        return []
+
+    already_sent = set(MeetingReminder.objects.filter(
+        meeting__in=[meeting for meeting, starts_at in candidates]
+    ).values_list('meeting_id', 'starts_at'))
+
+    reminders = []
+    for meeting, starts_at in candidates:
+        if (meeting.id, starts_at) in already_sent:
+            continue
+        try:
+            with transaction.atomic():
+                reminder = MeetingReminder.objects.create(meeting=meeting, starts_at=starts_at)
+                reminder.queued = send_meeting_notification(meeting, 'reminder')
+                reminder.save(update_fields=['queued'])
+        except IntegrityError:
+            continue  # Another dispatcher got there first
+        logger.info(f"Reminder for meeting {meeting.id} queued for {reminder.queued}")
+        reminders.append(reminder)
+    return reminders
@@ -0,0 +1,97 @@
+"""
+Fractional ordering for agenda sections and items
+
+Sections and items carry a float ``order``. Moving a row gives it a value
+between its new neighbours, so only the moved row is written. When two
+neighbours share a value (or float precision runs out) the sibling set is
+respaced once and the move retried.
+"""
+
+ORDER_STEP = 1024.0
+MIN_GAP = 1e-9
+
+
+def order_between(lower=None, upper=None):
+    """
+    Get an order value strictly between two neighbours.
+    
+    Either neighbour may be None (start or end of the list). Returns None
+    when there is no room left between them.
+    """
+    if lower is None and upper is None:
+        return ORDER_STEP
+    if upper is None:
+        return lower + ORDER_STEP
+    if lower is None:
+        lower = 0.0
+    if upper - lower < MIN_GAP:
+        return None
+    value = (lower + upper) / 2
+    if not lower < value < upper:
+        return None
+    return value
+
+
+def rebalance(siblings):
+    """Respace a sibling set ORDER_STEP apart, keeping its current order."""
+    rows = list(siblings.order_by('order', 'id'))
+    for index, row in enumerate(rows, start=1):
+        row.order = index * ORDER_STEP
+    siblings.model.objects.bulk_update(rows, ['order'])
+    return rows
+
+
+def place_after(obj, siblings, after=None):
+    """
+    Set ``obj.order`` so it sorts right after ``after`` among ``siblings``.
+    
+    ``after`` of None moves ``obj`` to the top. Only ``obj`` is changed
+    (and not saved) unless the siblings have to be respaced first.
+    
+    Returns True if the siblings were respaced.
+    """
+    siblings = siblings.exclude(pk=obj.pk)
+    rebalanced = False
+    while True:
+        if after is None:
+            lower = None
+            upper = siblings.order_by('order', 'id').values_list('order', flat=True).first()
+            tied = False
+        else:
+            lower = siblings.filter(pk=after.pk).values_list('order', flat=True).get()
+            upper = siblings.filter(order__gt=lower).order_by('order').values_list('order', flat=True).first()
+            tied = siblings.filter(order=lower).count() > 1
+        
+        value = None if tied else order_between(lower, upper)
+        if value is not None or rebalanced:
+            obj.order = value if value is not None else ORDER_STEP
+            return rebalanced
+        rebalance(siblings)
+        rebalanced = True
+
+
+def apply_moves(meeting, model, moves):
+    """
+    Apply a drag-and-drop session to one meeting's sections or items.
+    
+    ``moves`` are applied in order; each is a dict with ``id``, ``after``
+    (the sibling to follow, or None for the top) and, for items, an
+    optional ``section`` to move into. Callers validate the ids and run
+    this inside a transaction.
+    """
+    has_sections = model._meta.model_name == 'agendaitem'
+    ids = {move['id'] for move in moves} | {move['after'] for move in moves if move.get('after')}
+    rows = model.objects.filter(meeting=meeting).in_bulk(ids)
+    
+    for move in moves:
+        obj = rows[move['id']]
+        fields = ['order']
+        siblings = model.objects.filter(meeting=meeting)
+        if has_sections:
+            if 'section' in move:
+                obj.section_id = move['section']
+                fields.append('section')
+            siblings = siblings.filter(section_id=obj.section_id)
+        after = rows[move['after']] if move.get('after') else None
+        place_after(obj, siblings, after)
+        obj.save(update_fields=fields)
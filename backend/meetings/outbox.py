@@ -0,0 +1,143 @@
+"""
+Email outbox
+
+Notifications are written to the ``email_outbox`` table, one row per
+recipient, so the request that triggers them returns as soon as the rows
+exist. ``manage.py send_outbox`` delivers them:
+
+- in batches of ``settings.EMAIL_OUTBOX_BATCH_SIZE`` over one SMTP
+  connection, kept open across batches while there is mail to send
+- at most ``settings.EMAIL_OUTBOX_RATE_LIMIT`` messages per second
+- retrying failed sends with exponential backoff up to each message's
+  ``max_attempts``; addresses the server refuses, and messages that cannot
+  be built (e.g. a header with a newline), are not retried
+- claiming batches with a conditional UPDATE, so several workers can share
+  the table; a batch whose worker died is released after
+  ``settings.EMAIL_OUTBOX_TIMEOUT`` seconds
+"""
+import logging
+import smtplib
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db.models import F
+from django.utils import timezone
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def queue_messages(messages: list) -> int:
+    """Write unsaved OutboxMessages to the outbox and return how many."""
+    max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    for message in messages:
+        message.max_attempts = max_attempts
+    return len(OutboxMessage.objects.bulk_create(messages, batch_size=500))
+
+
+def requeue_stale_messages() -> int:
+    """Release messages claimed by a worker that stopped responding."""
+    cutoff = timezone.now() - timedelta(seconds=_setting('EMAIL_OUTBOX_TIMEOUT', 10 * 60))
+    stale = OutboxMessage.objects.filter(status='sending', claimed_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(status='failed', error='Timed out')
+    retried = stale.update(status='pending', error='Timed out')
+    return failed + retried
+
+
+def claim_batch(worker: str, size: int) -> list:
+    """Claim up to ``size`` messages that are due for ``worker``."""
+    now = timezone.now()
+    ids = list(OutboxMessage.objects.filter(
+        status='pending', send_after__lte=now
+    ).order_by('send_after', 'id').values_list('id', flat=True)[:size])
+    if not ids:
+        return []
+    # Rows another worker claimed in the meantime no longer match
+    OutboxMessage.objects.filter(pk__in=ids, status='pending').update(
+        status='sending', worker=worker, claimed_at=now, attempts=F('attempts') + 1
+    )
+    return list(OutboxMessage.objects.filter(
+        pk__in=ids, status='sending', worker=worker, claimed_at=now
+    ).order_by('send_after', 'id'))
+
+
+class RateLimiter:
+    """Space calls to ``wait()`` at most ``rate`` per second apart (0: no limit)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+
+    def wait(self):
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def build_email(message: OutboxMessage, connection=None) -> EmailMultiAlternatives:
+    email = EmailMultiAlternatives(
+        subject=message.subject,
+        body=message.body_text,
+        from_email=_setting('DEFAULT_FROM_EMAIL', 'noreply@example.com'),
+        to=[message.to_email],
+        headers=message.headers,
+        connection=connection,
+    )
+    if message.body_html:
+        email.attach_alternative(message.body_html, 'text/html')
+    return email
+
+
+def _failed(message: OutboxMessage, error: str, retry: bool = True):
+    message.error = error
+    if retry and message.attempts < message.max_attempts:
+        message.status = 'pending'
+        message.send_after = timezone.now() + timedelta(seconds=60 * 2 ** (message.attempts - 1))
+    else:
+        message.status = 'failed'
+
+
+def send_batch(messages: list, connection, rate_limiter: RateLimiter = None) -> dict:
+    """
+    Send claimed ``messages`` over ``connection`` and record each outcome.
+
+    The connection is opened if needed and left open for the next batch.
+    After a connection-level error it is closed, and reopened for the next
+    message.
+
+    Returns:
+        Dict with 'sent', 'retrying' and 'failed' counts
+    """
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+    for message in messages:
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        try:
+            connection.open()
+            build_email(message, connection).send()
+        except smtplib.SMTPRecipientsRefused as e:
+            # The server will not take this address; retrying cannot help
+            _failed(message, str(e), retry=False)
+        except (smtplib.SMTPException, OSError) as e:
+            logger.warning(f"Sending outbox message {message.id} failed on attempt {message.attempts}: {e}")
+            _failed(message, str(e))
+            connection.close()
+        except Exception as e:
+            # Not a delivery problem (e.g. BadHeaderError); the same message would fail again
+            logger.exception(f"Outbox message {message.id} could not be sent")
+            _failed(message, str(e), retry=False)
+        else:
+            message.status = 'sent'
+            message.sent_at = timezone.now()
+            message.error = ''
+
+        counts['sent' if message.status == 'sent' else 'retrying' if message.status == 'pending' else 'failed'] += 1
+        message.save(update_fields=['status', 'error', 'send_after', 'sent_at'])
+    return counts
@@ -0,0 +1,391 @@
+"""
+Agenda packet assembly
+
+A packet is the agenda followed by each agenda item's PDF attachments:
+
+    Contents | Agenda | Item divider, item attachments | Item divider, ...
+
+The agenda is one flowing document in which several items share a page,
+so each item's attachments follow it in agenda order after the agenda,
+introduced by a divider page, rather than being spliced into the agenda's
+pages. The contents pages and PDF bookmarks point at each item and
+attachment.
+
+Everything after the agenda is built per section as a fragment cached by
+the section's content hash (see meetings.render_cache), so a change to one
+item re-renders one section and the rest are concatenated from cache.
+
+Pages are copied with PdfStreamWriter, which writes each page's objects to
+the output as soon as they are copied, and sources are opened one at a
+time and released once copied. Memory therefore depends on the largest
+single page, not on the size of the packet.
+"""
+import logging
+from collections import deque
+from contextlib import ExitStack
+from io import BytesIO
+from PyPDF2 import PdfReader
+from PyPDF2.errors import PyPdfError
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject,
+    StreamObject, TextStringObject,
+)
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from documents.models import Attachment
+from .render_cache import open_or_render
+from .styles import get_pdf_styles, get_fonts, draw_letterhead
+
+logger = logging.getLogger(__name__)
+
+
+class PdfStreamWriter:
+    """
+    Write a PDF to a binary file a page at a time.
+
+    PyPDF2's PdfWriter holds every copied page until ``write()``, so its
+    memory grows with the output. This writer serializes each copied page
+    and the objects it uses as soon as they are copied and keeps only their
+    byte offsets, plus a map of copied object numbers per source. Outline
+    items are collected and written by ``close()``.
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.position = 0
+        self.offsets = {}
+        self.next_id = 1
+        self.pages_id = self._reserve()
+        self.page_ids = []
+        self.outline = []  # (title, page index, parent outline index)
+        self._write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _reserve(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+    def _write_object(self, idnum: int, obj):
+        buffer = BytesIO()
+        buffer.write(f'{idnum} 0 obj\n'.encode('ascii'))
+        obj.write_to_stream(buffer, None)
+        buffer.write(b'\nendobj\n')
+        self.offsets[idnum] = self.position
+        self._write(buffer.getvalue())
+
+    def _ref(self, idnum: int) -> IndirectObject:
+        return IndirectObject(idnum, 0, self)
+
+    def _convert(self, obj, ids: dict, pending: deque):
+        """Copy ``obj``, renumbering references into this file and queueing their targets."""
+        if isinstance(obj, IndirectObject):
+            if obj.idnum not in ids:
+                ids[obj.idnum] = self._reserve()
+                pending.append(obj)
+            return self._ref(ids[obj.idnum])
+        if isinstance(obj, StreamObject):
+            copy = obj.__class__()
+            copy._data = obj._data
+        elif isinstance(obj, DictionaryObject):
+            copy = DictionaryObject()
+        elif isinstance(obj, ArrayObject):
+            return ArrayObject(self._convert(value, ids, pending) for value in obj)
+        else:
+            return obj
+        for key, value in obj.items():
+            copy[NameObject(key)] = self._convert(value, ids, pending)
+        return copy
+
+    def add_pages(self, reader: PdfReader):
+        """Append every page of ``reader``."""
+        ids = {}  # Source object number -> ours
+        page_refs = {page.indirect_reference.idnum for page in reader.pages}
+        for page in reader.pages:
+            pending = deque()
+            if page.indirect_reference.idnum not in ids:
+                ids[page.indirect_reference.idnum] = self._reserve()
+            idnum = ids[page.indirect_reference.idnum]
+            copy = self._convert(
+                DictionaryObject({key: value for key, value in page.items() if key != '/Parent'}), ids, pending
+            )
+            copy[NameObject('/Parent')] = self._ref(self.pages_id)
+            self._write_object(idnum, copy)
+            self.page_ids.append(idnum)
+
+            while pending:
+                ref = pending.popleft()
+                if ref.idnum in page_refs:
+                    continue  # Another page (e.g. a link target); written in its turn
+                obj = ref.get_object()
+                if isinstance(obj, DictionaryObject) and obj.get('/Type') in ('/Pages', '/Catalog'):
+                    obj = NullObject()  # Never pull in the source's page tree
+                self._write_object(ids[ref.idnum], self._convert(obj, ids, pending))
+            # Drop the objects PyPDF2 parsed for this page; later pages reread what they share
+            reader.resolved_objects.clear()
+
+    def add_outline_item(self, title: str, page_index: int, parent: int = None) -> int:
+        """Bookmark ``page_index``; returns the item's index for use as ``parent``."""
+        self.outline.append((title, page_index, parent))
+        return len(self.outline) - 1
+
+    def _write_outline(self):
+        if not self.outline:
+            return None
+        root_id = self._reserve()
+        item_ids = [self._reserve() for _ in self.outline]
+        children = {None: []}
+        for index, (title, page_index, parent) in enumerate(self.outline):
+            children.setdefault(parent, []).append(index)
+            children.setdefault(index, [])
+
+        def link(node, parent_id):
+            # First/Last/Count for a node's children, Prev/Next between them
+            kids = children[node]
+            for position, index in enumerate(kids):
+                title, page_index, parent = self.outline[index]
+                item = DictionaryObject({
+                    NameObject('/Title'): TextStringObject(title),
+                    NameObject('/Parent'): self._ref(parent_id),
+                    NameObject('/Dest'): ArrayObject([self._ref(self.page_ids[page_index]), NameObject('/Fit')]),
+                })
+                if position:
+                    item[NameObject('/Prev')] = self._ref(item_ids[kids[position - 1]])
+                if position < len(kids) - 1:
+                    item[NameObject('/Next')] = self._ref(item_ids[kids[position + 1]])
+                item.update(link(index, item_ids[index]))
+                self._write_object(item_ids[index], item)
+            if not kids:
+                return {}
+            return {
+                NameObject('/First'): self._ref(item_ids[kids[0]]),
+                NameObject('/Last'): self._ref(item_ids[kids[-1]]),
+                NameObject('/Count'): NumberObject(len(kids)),
+            }
+
+        root = DictionaryObject({NameObject('/Type'): NameObject('/Outlines')})
+        root.update(link(None, root_id))
+        self._write_object(root_id, root)
+        return root_id
+
+    def close(self):
+        """Write the page tree, outline, cross-reference table and trailer."""
+        self._write_object(self.pages_id, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(self._ref(idnum) for idnum in self.page_ids),
+            NameObject('/Count'): NumberObject(len(self.page_ids)),
+        }))
+        catalog = DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): self._ref(self.pages_id),
+        })
+        outline_id = self._write_outline()
+        if outline_id is not None:
+            catalog[NameObject('/Outlines')] = self._ref(outline_id)
+            catalog[NameObject('/PageMode')] = NameObject('/UseOutlines')
+        catalog_id = self._reserve()
+        self._write_object(catalog_id, catalog)
+
+        xref_at = self.position
+        rows = [f'xref\n0 {self.next_id}\n', '0000000000 65535 f \n']
+        for idnum in range(1, self.next_id):
+            offset = self.offsets.get(idnum)
+            # Objects referenced but never written (e.g. a link to a page
+            # that was not copied) read as null
+            rows.append(f'{offset:010d} 00000 n \n' if offset is not None else '0000000000 00000 f \n')
+        rows.append(f'trailer\n<< /Size {self.next_id} /Root {catalog_id} 0 R >>\n')
+        rows.append(f'startxref\n{xref_at}\n%%EOF\n')
+        self._write(''.join(rows).encode('ascii'))
+
+
+def is_pdf_attachment(attachment: dict) -> bool:
+    return (
+        attachment['mime_type'] == 'application/pdf'
+        or attachment['file_type'] == 'pdf'
+        or str(attachment['file']).lower().endswith('.pdf')
+    )
+
+
+def _check_attachment(attachment: dict) -> bool:
+    """Whether an attachment's PDF can be read; logs why not."""
+    storage = Attachment._meta.get_field('file').storage
+    try:
+        with storage.open(attachment['file'], 'rb') as file:
+            len(PdfReader(file).pages)  # Parse the page tree so broken files fail here
+        return True
+    except (OSError, PyPdfError, ValueError) as e:
+        logger.warning(f"Skipping attachment {attachment['id']} in agenda packet: {e}")
+        return False
+
+
+def _append_attachment(writer: PdfStreamWriter, attachment: dict):
+    """Copy an attachment's pages into ``writer``, holding only this attachment open."""
+    storage = Attachment._meta.get_field('file').storage
+    with storage.open(attachment['file'], 'rb') as file:
+        writer.add_pages(PdfReader(file))
+
+
+def _item_label(item: dict) -> str:
+    return f"{item['number'] or item['order']}. {item['title']}"
+
+
+def _render(story) -> PdfReader:
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(
+        story, onFirstPage=draw_letterhead, onLaterPages=draw_letterhead
+    )
+    buffer.seek(0)
+    return PdfReader(buffer)
+
+
+def _render_divider(item: dict, attachments: list) -> PdfReader:
+    """Render the page introducing an item's attachments."""
+    styles = get_pdf_styles()
+    story = [Paragraph(_item_label(item), styles['heading1'])]
+    if item['description']:
+        story.append(Paragraph(item['description'], styles['normal']))
+    story.append(Spacer(1, 0.3 * inch))
+    story.append(Paragraph('Attachments', styles['heading3']))
+    for attachment, included in attachments:
+        note = '' if included else ' (not included)'
+        story.append(Paragraph(f"{attachment['name']}{note}", styles['normal']))
+    return _render(story)
+
+
+def _render_contents(meeting_title: str, entries: list) -> PdfReader:
+    """
+    Render the contents pages.
+
+    ``entries`` are (level, title, page number) rows.
+    """
+    styles = get_pdf_styles()
+    row_styles = [styles['contents_row'], styles['contents_subrow']]
+    rows = [[Paragraph(title, row_styles[level]), str(page)] for level, title, page in entries]
+    table = Table(rows, colWidths=[5.5 * inch, 0.8 * inch])
+    table.setStyle(TableStyle([
+        ('FONTNAME', (1, 0), (1, -1), get_fonts()[0]),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    return _render([
+        Paragraph(meeting_title, styles['packet_title']),
+        Paragraph('Contents', styles['heading2']),
+        table,
+    ])
+
+
+def _build_fragment(items: list, output):
+    """
+    Write the dividers and attachments of ``items`` to ``output``.
+
+    The fragment's bookmarks (an item, then its attachments) are how the
+    assembled packet finds the pages to list in its contents.
+    """
+    writer = PdfStreamWriter(output)
+    for item in items:
+        attachments = [
+            (attachment, _check_attachment(attachment))
+            for attachment in item['attachments'] if is_pdf_attachment(attachment)
+        ]
+        start = len(writer)
+        writer.add_pages(_render_divider(item, attachments))
+        parent = writer.add_outline_item(_item_label(item), start)
+        for attachment, included in attachments:
+            if not included:
+                continue
+            start = len(writer)
+            _append_attachment(writer, attachment)
+            writer.add_outline_item(attachment['name'], start, parent=parent)
+    writer.close()
+
+
+def _read_outline(reader: PdfReader) -> list:
+    """Get a fragment's bookmarks as (level, title, page index) rows."""
+    # One page lookup table instead of get_destination_page_number(), which
+    # rebuilds it on every call
+    page_numbers = {page.indirect_reference.idnum: index for index, page in enumerate(reader.pages)}
+    entries = []
+    for node in reader.outline:
+        if isinstance(node, list):
+            entries.extend((1, child.title, page_numbers[child.page.idnum]) for child in node)
+        else:
+            entries.append((0, node.title, page_numbers[node.page.idnum]))
+    return entries
+
+
+def open_fragments(stack: ExitStack, agenda: dict) -> list:
+    """
+    Open the cached packet fragment of each section that has PDF attachments.
+
+    A fragment is keyed by the content of its section's items, so editing
+    one section re-renders only that section's fragment. Each file is opened
+    as soon as it is ready so pruning the cache cannot remove it mid-build.
+    """
+    groups = agenda['sections'] if agenda['sections'] else [{'items': agenda['items']}]
+    fragments = []
+    for group in groups:
+        items = [
+            item for item in group['items']
+            if any(is_pdf_attachment(attachment) for attachment in item['attachments'])
+        ]
+        if items:
+            file = open_or_render(
+                {'items': items}, 'pdf', lambda output, items=items: _build_fragment(items, output),
+                fragment=True
+            )
+            fragments.append(PdfReader(stack.enter_context(file)))
+    return fragments
+
+
+def build_pdf_packet(meeting, agenda: dict, output):
+    """
+    Write the agenda packet for ``agenda`` to ``output``.
+
+    The agenda and each section's attachments come from the render cache;
+    only the contents pages are rendered on every build. Falls back to the
+    plain agenda PDF when no item has a PDF attachment.
+    """
+    from .utils import generate_agenda_pdf
+
+    with ExitStack() as stack:
+        readers = open_fragments(stack, agenda)
+        if not readers:
+            return generate_agenda_pdf(meeting, agenda, output)
+
+        agenda_file = open_or_render(agenda, 'pdf', lambda file: generate_agenda_pdf(meeting, agenda, file))
+        agenda_reader = PdfReader(stack.enter_context(agenda_file))
+
+        # Lay out pages after the contents, whose own length depends on the
+        # page numbers it lists; settle it by re-rendering until stable
+        contents_pages = 1
+        while True:
+            start = contents_pages + len(agenda_reader.pages)
+            outline = [(0, 'Agenda', contents_pages)]
+            for reader in readers:
+                outline.extend((level, title, start + index) for level, title, index in _read_outline(reader))
+                start += len(reader.pages)
+            entries = [(level, title, index + 1) for level, title, index in outline]
+            contents = _render_contents(agenda['meeting']['title'], entries)
+            if len(contents.pages) == contents_pages:
+                break
+            contents_pages = len(contents.pages)
+
+        writer = PdfStreamWriter(output)
+        for reader in [contents, agenda_reader, *readers]:
+            writer.add_pages(reader)
+
+        parent = None
+        writer.add_outline_item('Contents', 0)
+        for level, title, page_index in outline:
+            if level == 0:
+                parent = writer.add_outline_item(title, page_index)
+            else:
+                writer.add_outline_item(title, page_index, parent=parent)
+        writer.close()
+    return output
@@ -0,0 +1,80 @@
+"""
+Pagination classes for meetings app
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class PageSizePagination(PageNumberPagination):
+    """Page-number pagination with a client-selectable ?page_size= (max 500)."""
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination.
+    
+    Views with an OrderingFilter are paged on their own ordering; the first
+    ordering field should be indexed so every page is a range scan. It must
+    not be nullable, since a cursor cannot hold a null position: such an
+    ``?ordering=`` is refused with a 400.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        name = ordering[0].lstrip('-')
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return ordering
+        if field.null:
+            raise ValidationError({'ordering': f'Cursor pagination cannot order by {name}, which may be empty'})
+        return ordering
+
+
+class AccessLogPagination(KeysetPagination):
+    """Keyset pagination over the accessed_at index."""
+    ordering = '-accessed_at'
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    Page-number pagination by default, keyset pagination on request.
+    
+    Clients opt in with ?pagination=cursor; the next/previous links then
+    carry ?cursor= and stay on keyset pagination.
+    """
+    page_number_class = PageSizePagination
+    cursor_class = KeysetPagination
+    
+    def __init__(self):
+        self.paginator = self.page_number_class()
+    
+    def use_cursor(self, request):
+        return (
+            self.cursor_class.cursor_query_param in request.query_params
+            or request.query_params.get('pagination') == 'cursor'
+        )
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = self.cursor_class()
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+    
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+    
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+    
+    def to_html(self):
+        return self.paginator.to_html()
+    
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
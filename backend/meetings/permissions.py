@@ -28,6 +28,17 @@ class CanSubmitAgendaItems(permissions.BasePermission):
         return request.user.can_submit_agenda_items()
 
 
+def is_clerk_or_admin(user):
+    """Whether ``user`` administers the system: clerks, IT admins and Django staff accounts."""
+    return user.is_authenticated and (user.is_staff or user.role in ['clerk', 'it_admin'])
+
+
+class IsClerkOrAdmin(permissions.BasePermission):
+    """Permission for administrative data such as access logs."""
+    def has_permission(self, request, view):
+        return is_clerk_or_admin(request.user)
+
+
 class IsPublicOrAuthenticated(permissions.BasePermission):
     """Allow public read access or authenticated access."""
     def has_permission(self, request, view):
@@ -0,0 +1,175 @@
+"""
+On-disk cache for rendered agenda documents
+
+Rendered PDFs and DOCX files are stored under
+``settings.AGENDA_RENDER_CACHE_DIR`` with the file name taken from a hash of
+the agenda tree, the format and the render options. An edited agenda hashes
+differently, so stale files are never served and need no invalidation; they
+just age out. Hits refresh the file's mtime and the directory is pruned
+oldest-first once it grows past ``settings.AGENDA_RENDER_CACHE_MAX_BYTES``.
+
+Another worker may prune a file at any moment, so code that reads a cached
+file should get it already open from ``open_cached``/``open_or_render``:
+an open file stays readable after it is deleted.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from .agenda import hash_agenda_tree
+from .styles import get_style_version
+
+logger = logging.getLogger(__name__)
+
+# Bump when the renderers' output changes so old files are not served
+RENDERER_VERSION = 1
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'zip': 'application/zip',
+}
+
+
+def get_cache_dir() -> Path:
+    return Path(getattr(settings, 'AGENDA_RENDER_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'render_cache'))
+
+
+def render_key(agenda: dict, format: str, **options) -> str:
+    """Get the cache key for rendering ``agenda`` as ``format`` with ``options``."""
+    parts = {
+        'renderer': RENDERER_VERSION,
+        'styles': get_style_version(),
+        'agenda': hash_agenda_tree(agenda),
+        'format': format,
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_cached(agenda: dict, format: str, **options):
+    """Get the path of the cached rendering of ``agenda``, or None on a miss."""
+    path = get_cache_dir() / f'{render_key(agenda, format, **options)}.{format}'
+    try:
+        os.utime(path)  # Mark as recently used
+        return path
+    except FileNotFoundError:
+        return None
+
+
+def _open(path: Path):
+    """Open a cached file and mark it as recently used; None if it is not there."""
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass  # Pruned since opening; the open file is still readable
+    return file
+
+
+def open_cached(agenda: dict, format: str, **options):
+    """Get the cached rendering of ``agenda`` opened for reading, or None on a miss."""
+    return _open(get_cache_dir() / f'{render_key(agenda, format, **options)}.{format}')
+
+
+def open_or_render(agenda: dict, format: str, render, **options):
+    """
+    Like get_or_render, but returns the file opened for reading.
+
+    Re-renders once if another worker prunes the file between rendering
+    and opening it.
+    """
+    path = get_or_render(agenda, format, render, **options)
+    file = _open(path)
+    if file is None:
+        file = _open(get_or_render(agenda, format, render, **options))
+    if file is None:
+        raise FileNotFoundError(f'Rendered file was pruned before it could be read: {path}')
+    return file
+
+
+def get_or_render(agenda: dict, format: str, render, **options) -> Path:
+    """
+    Get the path of the cached rendering of ``agenda``, rendering it first on a miss.
+
+    Args:
+        agenda: Agenda tree (see meetings.agenda)
+        format: File extension, e.g. 'pdf' or 'docx'
+        render: Callable writing the rendered document to the binary file it is given
+        **options: Anything else that changes the output
+
+    Returns:
+        Path to the rendered file
+    """
+    cached = get_cached(agenda, format, **options)
+    if cached is not None:
+        return cached
+
+    cache_dir = get_cache_dir()
+    path = cache_dir / f'{render_key(agenda, format, **options)}.{format}'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Render straight into a temporary file (never holding the document in
+    # memory) and rename it so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            render(tmp)
+        if os.path.getsize(tmp_path) == 0:
+            raise ValueError('Rendered file is empty')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    prune(exclude=path)
+    return path
+
+
+def prune(max_bytes: int = None, exclude: Path = None) -> int:
+    """
+    Delete least recently used files until the cache fits in ``max_bytes``.
+
+    Returns the number of files deleted.
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'AGENDA_RENDER_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+    entries = []
+    total = 0
+    try:
+        with os.scandir(get_cache_dir()) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith('.tmp'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    except FileNotFoundError:
+        return 0
+
+    deleted = 0
+    entries.sort()
+    for _, size, entry_path in entries:
+        if total <= max_bytes:
+            break
+        if exclude is not None and entry_path == str(exclude):
+            continue
+        try:
+            os.unlink(entry_path)
+        except FileNotFoundError:
+            pass  # Pruned concurrently
+        except OSError:
+            continue  # In use (Windows); try again next time
+        total -= size
+        deleted += 1
+
+    if deleted:
+        logger.info(f"Pruned {deleted} rendered agenda files from cache")
+    return deleted
@@ -3,10 +3,13 @@ Serializers for meetings app
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from .models import (
     Meeting, AgendaSection, AgendaItem, Minute, Vote,
-    EmailSubscription, ElectronicSignature
+    EmailSubscription, ElectronicSignature, DocumentAccessLog, Job, allocate_sequence
 )
+from .ordering import ORDER_STEP
+from .signals import meeting_tree_changed
 
 User = get_user_model()
 
@@ -37,8 +40,8 @@ class AgendaSectionSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AgendaSection
-        fields = ['id', 'meeting', 'title', 'order', 'description', 'items']
-        read_only_fields = ['id']
+        fields = ['id', 'meeting', 'title', 'order', 'position', 'description', 'items']
+        read_only_fields = ['id', 'position']
 
 
 class MeetingSerializer(serializers.ModelSerializer):
@@ -65,10 +68,332 @@ class MeetingSerializer(serializers.ModelSerializer):
         return value
 
 
+def get_meeting_detail_prefetches(normalized=False):
+    """
+    Prefetch plan for MeetingSerializer.
+    
+    Sections, their items, the flat item list, minutes and every user the
+    nested serializers name are loaded in a fixed number of queries, however
+    large the agenda is. The normalized shape groups the flat item list by
+    section itself, so it skips the per-section item prefetch.
+    """
+    items = AgendaItem.objects.select_related(
+        'submitted_by', 'minute__created_by', 'minute__approved_by'
+    )
+    if normalized:
+        return [Prefetch('agenda_items', queryset=items), 'sections']
+    return [
+        Prefetch('agenda_items', queryset=items),
+        Prefetch('sections', queryset=AgendaSection.objects.prefetch_related(
+            Prefetch('items', queryset=items)
+        )),
+    ]
+
+
+class NormalizedAgendaItemSerializer(serializers.ModelSerializer):
+    """Agenda item entity for the normalized meeting shape."""
+    minute = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AgendaItem
+        fields = ['id', 'meeting', 'section', 'title', 'description', 'order', 'number',
+                  'submitted_by', 'department', 'priority',
+                  'is_consent', 'requires_vote', 'created_at', 'updated_at', 'minute']
+    
+    def get_minute(self, obj):
+        """Get the id of the associated minute if it exists."""
+        try:
+            return obj.minute.id
+        except Minute.DoesNotExist:
+            return None
+
+
+class NormalizedMinuteSerializer(serializers.ModelSerializer):
+    """Minute entity for the normalized meeting shape."""
+    
+    class Meta:
+        model = Minute
+        fields = ['id', 'agenda_item', 'text', 'status', 'version',
+                  'approved_by', 'approved_at',
+                  'created_by', 'created_at', 'updated_at']
+
+
+class NormalizedMeetingSerializer(serializers.ModelSerializer):
+    """
+    Meeting with its agenda flattened into id-keyed entity maps.
+    
+    Every section, item, minute and user is sent exactly once under
+    ``entities``; the meeting and its sections refer to items by id.
+    """
+    
+    class Meta:
+        model = Meeting
+        fields = ['id', 'title', 'meeting_type', 'status', 'date', 'time', 'location',
+                  'description', 'video_url', 'video_type', 'video_embed_code',
+                  'published_at', 'posting_deadline', 'posted_at',
+                  'created_by', 'created_at', 'updated_at']
+        read_only_fields = fields
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        items = list(instance.agenda_items.all())
+        
+        users = {}
+        
+        def add_user(user):
+            if user is not None and user.id not in users:
+                users[user.id] = {'id': user.id, 'name': user.get_full_name()}
+        
+        add_user(instance.created_by)
+        section_items = {}
+        minutes = []
+        for item in items:
+            section_items.setdefault(item.section_id, []).append(item.id)
+            add_user(item.submitted_by)
+            try:
+                minute = item.minute
+            except Minute.DoesNotExist:
+                continue
+            minutes.append(minute)
+            add_user(minute.created_by)
+            add_user(minute.approved_by)
+        
+        sections = {}
+        for section in instance.sections.all():
+            sections[section.id] = {
+                'id': section.id,
+                'title': section.title,
+                'order': section.order,
+                'position': section.position,
+                'description': section.description,
+                'items': section_items.get(section.id, []),
+            }
+        
+        data['sections'] = list(sections)
+        data['agenda_items'] = [item.id for item in items]
+        data['item_count'] = len(items)
+        data['entities'] = {
+            'sections': sections,
+            'items': {
+                entry['id']: entry
+                for entry in NormalizedAgendaItemSerializer(items, many=True).data
+            },
+            'minutes': {
+                entry['id']: entry
+                for entry in NormalizedMinuteSerializer(minutes, many=True).data
+            },
+            'users': users,
+        }
+        return data
+
+
+class AgendaMoveSerializer(serializers.Serializer):
+    """A single drag-and-drop move of a section or item."""
+    id = serializers.IntegerField()
+    after = serializers.IntegerField(allow_null=True, required=False, default=None)
+    section = serializers.IntegerField(allow_null=True, required=False)
+
+
+class AgendaReorderSerializer(serializers.Serializer):
+    """
+    A drag-and-drop session for one meeting's sections or items.
+    
+    Expects the model being reordered as ``context['model']``.
+    """
+    meeting = serializers.PrimaryKeyRelatedField(queryset=Meeting.objects.all())
+    moves = AgendaMoveSerializer(many=True, allow_empty=False)
+    renumber = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        model = self.context['model']
+        meeting = attrs['meeting']
+        moves = attrs['moves']
+        
+        ids = {move['id'] for move in moves} | {move['after'] for move in moves if move.get('after')}
+        rows = model.objects.filter(meeting=meeting, pk__in=ids)
+        if model is AgendaItem:
+            sections = dict(rows.values_list('pk', 'section_id'))
+        else:
+            sections = dict.fromkeys(rows.values_list('pk', flat=True))
+        if ids - set(sections):
+            raise serializers.ValidationError(
+                {'moves': f"Not part of this meeting: {sorted(ids - set(sections))}"}
+            )
+        
+        section_ids = {move['section'] for move in moves if move.get('section')}
+        if section_ids:
+            if model is not AgendaItem:
+                raise serializers.ValidationError({'moves': 'Only agenda items can change section.'})
+            found = set(meeting.sections.filter(pk__in=section_ids).values_list('pk', flat=True))
+            if section_ids - found:
+                raise serializers.ValidationError(
+                    {'moves': f"Sections not part of this meeting: {sorted(section_ids - found)}"}
+                )
+        
+        # Replay the session: each ``after`` must be a sibling in the section
+        # its row lands in, as of that move
+        for move in moves:
+            if 'section' in move:
+                sections[move['id']] = move['section']
+            after = move.get('after')
+            if after is None:
+                continue
+            if after == move['id']:
+                raise serializers.ValidationError({'moves': f"{move['id']} cannot be placed after itself."})
+            if sections[after] != sections[move['id']]:
+                raise serializers.ValidationError(
+                    {'moves': f"{after} is not in the same section as {move['id']} after its move."}
+                )
+        return attrs
+
+
+class PacketExportSerializer(serializers.Serializer):
+    """
+    A batch packet export: meeting ids or a date range (inclusive).
+    """
+    meetings = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    format = serializers.ChoiceField(choices=['pdf', 'docx'], default='pdf')
+    attachments = serializers.BooleanField(default=True)
+    live = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        if not attrs.get('meetings') and not (attrs.get('start') and attrs.get('end')):
+            raise serializers.ValidationError('Give either meetings or both start and end.')
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'end': 'Must not be before start.'})
+        return attrs
+
+
+class AgendaTreeItemSerializer(serializers.ModelSerializer):
+    """An agenda item in a bulk agenda tree; items with an id are updated."""
+    id = serializers.IntegerField(required=False)
+    order = serializers.FloatField(required=False, min_value=0)
+    
+    class Meta:
+        model = AgendaItem
+        fields = ['id', 'title', 'description', 'order', 'department', 'priority',
+                  'is_consent', 'requires_vote']
+
+
+class AgendaTreeSectionSerializer(serializers.ModelSerializer):
+    """An agenda section and its items in a bulk agenda tree."""
+    id = serializers.IntegerField(required=False)
+    order = serializers.FloatField(required=False, min_value=0)
+    items = AgendaTreeItemSerializer(many=True, required=False, default=list)
+    
+    class Meta:
+        model = AgendaSection
+        fields = ['id', 'title', 'order', 'description', 'items']
+
+
+class AgendaTreeSerializer(serializers.Serializer):
+    """
+    A whole agenda (sections with their items, plus unsectioned items) for
+    one meeting, validated as a batch and written with bulk operations.
+    
+    Entries with an ``id`` update existing rows; the rest are created. A
+    missing ``order`` follows the entry's position in the payload.
+    Expects the Meeting as the serializer instance.
+    """
+    sections = AgendaTreeSectionSerializer(many=True, required=False, default=list)
+    items = AgendaTreeItemSerializer(many=True, required=False, default=list)
+    
+    def validate(self, attrs):
+        meeting = self.instance
+        section_ids = {section['id'] for section in attrs['sections'] if 'id' in section}
+        item_ids = [
+            item['id']
+            for entries in [attrs['items']] + [section['items'] for section in attrs['sections']]
+            for item in entries if 'id' in item
+        ]
+        
+        if len(item_ids) != len(set(item_ids)):
+            raise serializers.ValidationError('An item may only appear once in the tree.')
+        found = set(meeting.sections.filter(pk__in=section_ids).values_list('pk', flat=True))
+        if section_ids - found:
+            raise serializers.ValidationError(
+                {'sections': f"Not part of this meeting: {sorted(section_ids - found)}"}
+            )
+        found = set(meeting.agenda_items.filter(pk__in=item_ids).values_list('pk', flat=True))
+        if set(item_ids) - found:
+            raise serializers.ValidationError(
+                {'items': f"Not part of this meeting: {sorted(set(item_ids) - found)}"}
+            )
+        return attrs
+    
+    def update(self, instance, validated_data):
+        meeting = instance
+        submitted_by = validated_data.get('submitted_by')
+        item_fields = [name for name in AgendaTreeItemSerializer.Meta.fields if name != 'id']
+        
+        def with_order(entries):
+            for index, entry in enumerate(entries, start=1):
+                entry.setdefault('order', index * ORDER_STEP)
+            return entries
+        
+        # Sections first, so new items can point at them
+        section_entries = with_order(validated_data['sections'])
+        existing = meeting.sections.in_bulk([entry['id'] for entry in section_entries if 'id' in entry])
+        new_sections = []
+        sections = []
+        for entry in section_entries:
+            fields = {key: value for key, value in entry.items() if key not in ('id', 'items')}
+            if 'id' in entry:
+                section = existing[entry['id']]
+                for key, value in fields.items():
+                    setattr(section, key, value)
+            else:
+                section = AgendaSection(meeting=meeting, **fields)
+                new_sections.append(section)
+            sections.append(section)
+        
+        if new_sections:
+            positions = allocate_sequence(Meeting, meeting.pk, 'section_sequence', len(new_sections))
+            for section, position in zip(new_sections, positions):
+                section.position = position
+            AgendaSection.objects.bulk_create(new_sections)
+        AgendaSection.objects.bulk_update(
+            [section for section in sections if section not in new_sections],
+            ['title', 'order', 'description']
+        )
+        
+        # Then items, grouped under their (possibly new) sections
+        placed = [(None, entry) for entry in with_order(validated_data['items'])]
+        for section, entry in zip(sections, section_entries):
+            placed += [(section, item) for item in with_order(entry['items'])]
+        
+        existing = meeting.agenda_items.in_bulk([entry['id'] for _, entry in placed if 'id' in entry])
+        new_items = []
+        updated_items = []
+        for section, entry in placed:
+            fields = {key: value for key, value in entry.items() if key != 'id'}
+            if 'id' in entry:
+                item = existing[entry['id']]
+                for key, value in fields.items():
+                    setattr(item, key, value)
+                item.section = section
+                updated_items.append(item)
+            else:
+                new_items.append(AgendaItem(
+                    meeting=meeting, section=section, submitted_by=submitted_by, **fields
+                ))
+        
+        AgendaItem.objects.bulk_update(updated_items, item_fields + ['section'])
+        AgendaItem.objects.bulk_create(new_items)
+        meeting_tree_changed(meeting.pk)
+        return meeting
+
+
 class MeetingListSerializer(serializers.ModelSerializer):
-    """Lightweight serializer for meeting lists."""
+    """
+    Lightweight serializer for meeting lists.
+    
+    Expects ``item_count`` to be annotated on the queryset.
+    """
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    item_count = serializers.IntegerField(source='agenda_items.count', read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Meeting
@@ -107,6 +432,17 @@ class EmailSubscriptionSerializer(serializers.ModelSerializer):
         model = EmailSubscription
         fields = ['id', 'email', 'is_active', 'subscription_types', 'created_at', 'updated_at', 'unsubscribe_token']
         read_only_fields = ['id', 'created_at', 'updated_at', 'unsubscribe_token']
+    
+    def validate_subscription_types(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError('Expected a list of subscription types.')
+        unknown = [
+            subscription_type for subscription_type in value
+            if not EmailSubscription.normalize_types([subscription_type])
+        ]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown subscription types: {', '.join(map(str, unknown))}")
+        return EmailSubscription.normalize_types(value)
 
 
 class ElectronicSignatureSerializer(serializers.ModelSerializer):
@@ -121,6 +457,27 @@ class ElectronicSignatureSerializer(serializers.ModelSerializer):
         read_only_fields = ['signed_by', 'ip_address', 'user_agent', 'signed_at']
 
 
+class DocumentAccessLogSerializer(serializers.ModelSerializer):
+    """Serializer for DocumentAccessLog."""
+    
+    class Meta:
+        model = DocumentAccessLog
+        fields = ['id', 'document_type', 'document_id', 'user', 'ip_address',
+                  'accessed_at', 'access_type']
 
 
-
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for background Job status."""
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'attempts', 'max_attempts', 'error', 'progress',
+                  'created_at', 'started_at', 'finished_at', 'download_url']
+    
+    def get_download_url(self, obj):
+        if obj.status != 'succeeded' or not (obj.result or {}).get('file'):
+            return None
+        path = f'/api/meetings/jobs/{obj.id}/download/'
+        request = self.context.get('request')
+        return request.build_absolute_uri(path) if request else path
@@ -1,128 +1,290 @@
 """
 Services for meetings app - Email notifications, RSS feeds, etc.
 """
-from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from .models import Meeting, EmailSubscription, AgendaItem
+from django.utils.html import escape
+from .models import Meeting, EmailSubscription, AgendaItem, MeetingArtifact
 from django.utils import timezone
 from datetime import timedelta
 
 
-def send_meeting_notification(meeting: Meeting, notification_type: str = 'published'):
+NOTIFICATION_CHUNK_SIZE = 2000
+
+
+def render_meeting_notification(meeting: Meeting, notification_type: str, unsubscribe_url: str):
     """
-    Send email notification about a meeting.
+    Render a meeting notification email.
     
-    Args:
-        meeting: Meeting instance
-        notification_type: Type of notification ('published', 'updated', 'reminder')
+    Returns:
+        (subject, plain text body, HTML body)
     """
-    if not hasattr(settings, 'EMAIL_HOST') or not settings.EMAIL_HOST:
-        # Email not configured, skip
-        return
-    
-    subscriptions = EmailSubscription.objects.filter(
-        is_active=True,
-        subscription_types__contains=[notification_type]
-    )
-    
-    if not subscriptions.exists():
-        return
-    
     subject = f"Meeting {notification_type.title()}: {meeting.title}"
+    meeting_url = f"{getattr(settings, 'FRONTEND_URL', 'https://escribe-frontend.onrender.com')}/meetings/{meeting.id}"
     
-    # Create email content
-    context = {
-        'meeting': meeting,
-        'notification_type': notification_type,
-        'base_url': getattr(settings, 'FRONTEND_URL', 'https://escribe-frontend.onrender.com'),
-    }
-    
-    # Try to render HTML email, fallback to plain text
-    try:
-        html_message = f"""
+    html_message = f"""
         <html>
         <body>
-            <h2>{meeting.title}</h2>
+            <h2>{escape(meeting.title)}</h2>
             <p><strong>Date:</strong> {meeting.date}</p>
             <p><strong>Time:</strong> {meeting.time}</p>
-            <p><strong>Location:</strong> {meeting.location}</p>
+            <p><strong>Location:</strong> {escape(meeting.location)}</p>
             <p><strong>Type:</strong> {meeting.get_meeting_type_display()}</p>
-            {f'<p>{meeting.description}</p>' if meeting.description else ''}
-            <p><a href="{context['base_url']}/meetings/{meeting.id}">View Meeting Details</a></p>
+            {f'<p>{escape(meeting.description)}</p>' if meeting.description else ''}
+            <p><a href="{meeting_url}">View Meeting Details</a></p>
+            <p style="font-size: small"><a href="{unsubscribe_url}">Unsubscribe</a></p>
         </body>
         </html>
         """
-        plain_message = strip_tags(html_message)
-    except:
-        plain_message = f"""
-        Meeting {notification_type.title()}: {meeting.title}
-        
-        Date: {meeting.date}
-        Time: {meeting.time}
-        Location: {meeting.location}
-        Type: {meeting.get_meeting_type_display()}
-        """
-        html_message = None
+    lines = [
+        f"Meeting {notification_type.title()}: {meeting.title}",
+        '',
+        f"Date: {meeting.date}",
+        f"Time: {meeting.time}",
+        f"Location: {meeting.location}",
+        f"Type: {meeting.get_meeting_type_display()}",
+    ]
+    if meeting.description:
+        lines += ['', meeting.description]
+    lines += ['', f"View meeting details: {meeting_url}", '', f"Unsubscribe: {unsubscribe_url}"]
+    plain_message = '\n'.join(lines)
+    return subject, plain_message, html_message
+
+
+def get_unsubscribe_url(subscription: EmailSubscription) -> str:
+    return (
+        f"{settings.PUBLIC_BASE_URL}/api/meetings/email-subscriptions/unsubscribe/"
+        f"?token={subscription.unsubscribe_token}"
+    )
+
+
+def send_meeting_notification(meeting: Meeting, notification_type: str = 'published') -> int:
+    """
+    Queue email notifications about a meeting in the outbox.
     
-    # Send to all subscribers
-    recipient_list = [sub.email for sub in subscriptions]
+    Each subscriber gets their own message with their own unsubscribe
+    link; ``manage.py send_outbox`` sends them (see meetings.outbox).
+    Usually called for a coalesced NotificationEvent (see
+    meetings.notifications) rather than directly.
     
-    if recipient_list:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com'),
-            recipient_list=recipient_list,
-            html_message=html_message if html_message else None,
-            fail_silently=True,  # Don't raise errors if email fails
+    Args:
+        meeting: Meeting instance
+        notification_type: Type of notification ('published', 'updated', 'reminder')
+    
+    Returns:
+        Number of messages queued
+    """
+    from .models import OutboxMessage
+    from .outbox import queue_messages
+    
+    if not hasattr(settings, 'EMAIL_HOST') or not settings.EMAIL_HOST:
+        # Email not configured, skip
+        return 0
+    
+    subscription_type = EmailSubscription.NOTIFICATION_TYPES.get(notification_type, notification_type)
+    subscriptions = EmailSubscription.objects.filter(
+        is_active=True, types__subscription_type=subscription_type
+    ).only('id', 'email', 'unsubscribe_token').order_by()
+    if notification_type in EmailSubscription.DIGEST_TYPES:
+        # Digest subscribers hear about these in their daily email
+        subscriptions = subscriptions.exclude(types__subscription_type='daily_digest')
+    
+    # Stream subscribers and write the outbox in chunks, so fan-out to any
+    # number of subscribers holds one chunk in memory at a time
+    queued = 0
+    messages = []
+    for subscription in subscriptions.iterator(chunk_size=NOTIFICATION_CHUNK_SIZE):
+        unsubscribe_url = get_unsubscribe_url(subscription)
+        subject, plain_message, html_message = render_meeting_notification(
+            meeting, notification_type, unsubscribe_url
         )
+        messages.append(OutboxMessage(
+            to_email=subscription.email,
+            subscription=subscription,
+            meeting=meeting,
+            notification_type=notification_type,
+            subject=subject,
+            body_text=plain_message,
+            body_html=html_message,
+            headers={
+                'List-Unsubscribe': f'<{unsubscribe_url}>',
+                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+            },
+        ))
+        if len(messages) >= NOTIFICATION_CHUNK_SIZE:
+            queued += queue_messages(messages)
+            messages = []
+    return queued + queue_messages(messages)
+
 
+def build_rss_item(meeting, base_url='https://escribe-backend.onrender.com'):
+    """
+    Build the RSS ``<item>`` element for a meeting.
+    
+    Describes the meeting as it was published, not as currently edited.
+    """
+    from xml.etree import ElementTree as ET
+    
+    snapshot = meeting.published_snapshot
+    if snapshot is not None:
+        info = snapshot.data['meeting']
+    else:
+        info = {
+            'title': meeting.title,
+            'description': meeting.description,
+            'meeting_type_display': meeting.get_meeting_type_display(),
+            'date': meeting.date,
+        }
+    
+    item = ET.Element('item')
+    ET.SubElement(item, 'title').text = info['title']
+    ET.SubElement(item, 'link').text = f'{base_url}/api/meetings/{meeting.id}/'
+    ET.SubElement(item, 'description').text = info['description'] or f"{info['meeting_type_display']} on {info['date']}"
+    ET.SubElement(item, 'pubDate').text = (meeting.published_at or meeting.created_at).strftime('%a, %d %b %Y %H:%M:%S %z')
+    ET.SubElement(item, 'guid', isPermaLink='false').text = f'meeting-{meeting.id}'
+    
+    # Add category
+    category = ET.SubElement(item, 'category')
+    category.text = info['meeting_type_display']
+    return item
+
+
+RSS_FEED_SIZE = 20
+
+
+def build_minutes_rss_item(meeting, base_url='https://escribe-backend.onrender.com'):
+    """
+    Build the RSS ``<item>`` announcing a meeting's approved minutes.
+    
+    ``meeting`` must carry ``minutes_approved_at`` (see get_rss_meetings).
+    """
+    from xml.etree import ElementTree as ET
+    
+    item = ET.Element('item')
+    ET.SubElement(item, 'title').text = f'Minutes approved: {meeting.title}'
+    ET.SubElement(item, 'link').text = f'{base_url}/api/meetings/{meeting.id}/'
+    ET.SubElement(item, 'description').text = f"Minutes of the {meeting.get_meeting_type_display()} on {meeting.date}"
+    ET.SubElement(item, 'pubDate').text = meeting.minutes_approved_at.strftime('%a, %d %b %Y %H:%M:%S %z')
+    ET.SubElement(item, 'guid', isPermaLink='false').text = f'meeting-{meeting.id}-minutes'
+    ET.SubElement(item, 'category').text = meeting.get_meeting_type_display()
+    return item
+
+
+def get_rss_meetings(meeting_type=None, minutes=False):
+    """
+    Get the meetings of an RSS channel, newest first.
+    
+    Args:
+        meeting_type: Only meetings of this type
+        minutes: The approved-minutes channel (meetings ordered by their
+            latest minutes approval) instead of published meetings
+    """
+    from django.db.models import Max, Q
+    
+    meetings = Meeting.objects.filter(status='published', published_at__isnull=False)
+    if meeting_type:
+        meetings = meetings.filter(meeting_type=meeting_type)
+    if minutes:
+        meetings = meetings.annotate(minutes_approved_at=Max(
+            'agenda_items__minute__approved_at', filter=Q(agenda_items__minute__status='approved')
+        )).filter(minutes_approved_at__isnull=False).order_by('-minutes_approved_at')
+    else:
+        meetings = meetings.order_by('-date', '-time')
+    return meetings.select_related('published_snapshot')[:RSS_FEED_SIZE]
 
-def generate_rss_feed(meetings=None, base_url='https://escribe-backend.onrender.com'):
+
+def generate_rss_feed(meetings=None, base_url='https://escribe-backend.onrender.com', meeting_type=None,
+                      minutes=False):
     """
     Generate RSS feed XML for meetings.
     
+    Each serialized item is cached until its meeting changes (see
+    meetings.cache.rss_item_key), so every channel listing a meeting
+    shares one rendering of it.
+    
     Args:
-        meetings: QuerySet of meetings (defaults to published meetings)
+        meetings: QuerySet of meetings (defaults to the channel's meetings,
+            see get_rss_meetings)
         base_url: Base URL for the application
+        meeting_type: Channel of one meeting type
+        minutes: Approved-minutes channel
     
     Returns:
         RSS XML string
     """
     from xml.etree import ElementTree as ET
-    from django.utils import timezone
+    from django.core.cache import cache
+    from .cache import rss_item_key, get_cache_timeout
     
     if meetings is None:
-        meetings = Meeting.objects.filter(
-            status='published',
-            published_at__isnull=False
-        ).order_by('-date', '-time')[:20]
+        meetings = get_rss_meetings(meeting_type, minutes)
+    
+    title = 'Escribe Approved Minutes' if minutes else 'Escribe Meeting Notifications'
+    if meeting_type:
+        title = f"{title}: {dict(Meeting.MEETING_TYPES).get(meeting_type, meeting_type)}"
     
     # Create RSS root
     rss = ET.Element('rss', version='2.0')
     channel = ET.SubElement(rss, 'channel')
     
-    ET.SubElement(channel, 'title').text = 'Escribe Meeting Notifications'
+    ET.SubElement(channel, 'title').text = title
     ET.SubElement(channel, 'link').text = base_url
     ET.SubElement(channel, 'description').text = 'Government meeting agendas and minutes'
     ET.SubElement(channel, 'language').text = 'en-us'
     ET.SubElement(channel, 'lastBuildDate').text = timezone.now().strftime('%a, %d %b %Y %H:%M:%S %z')
     
-    for meeting in meetings:
-        item = ET.SubElement(channel, 'item')
-        ET.SubElement(item, 'title').text = meeting.title
-        ET.SubElement(item, 'link').text = f'{base_url}/api/meetings/{meeting.id}/'
-        ET.SubElement(item, 'description').text = meeting.description or f"{meeting.get_meeting_type_display()} on {meeting.date}"
-        ET.SubElement(item, 'pubDate').text = (meeting.published_at or meeting.created_at).strftime('%a, %d %b %Y %H:%M:%S %z')
-        ET.SubElement(item, 'guid', isPermaLink='false').text = f'meeting-{meeting.id}'
-        
-        # Add category
-        category = ET.SubElement(item, 'category')
-        category.text = meeting.get_meeting_type_display()
+    meetings = list(meetings)
+    kind = 'minutes' if minutes else 'meeting'
+    keys = [rss_item_key(meeting, base_url, kind) for meeting in meetings]
+    items = cache.get_many(keys)
+    missing = [(meeting, key) for meeting, key in zip(meetings, keys) if key not in items]
+    
+    # Items pre-rendered at publish time (see meetings.jobs) for this host
+    prerendered = {}
+    if missing and not minutes and base_url == settings.PUBLIC_BASE_URL:
+        prerendered = dict(MeetingArtifact.objects.filter(
+            snapshot__in=[meeting.published_snapshot_id for meeting, key in missing if meeting.published_snapshot_id],
+            kind='rss_item'
+        ).values_list('snapshot_id', 'content'))
+    
+    rendered = {}
+    for meeting, key in missing:
+        content = prerendered.get(meeting.published_snapshot_id)
+        if not content:
+            build = build_minutes_rss_item if minutes else build_rss_item
+            content = ET.tostring(build(meeting, base_url), encoding='unicode')
+        rendered[key] = items[key] = content
+    if rendered:
+        cache.set_many(rendered, timeout=get_cache_timeout())
+    
+    for key in keys:
+        channel.append(ET.fromstring(items[key]))
     
     return ET.tostring(rss, encoding='unicode', xml_declaration=True)
 
 
-
+def get_rss_feed(base_url='https://escribe-backend.onrender.com', meeting_type=None, minutes=False) -> dict:
+    """
+    Get an RSS channel from the cache, rendering it if needed.
+    
+    Cached feeds are keyed by the shared feeds version (see
+    meetings.cache.get_feeds_version), which any meeting change bumps, so
+    serving a cached channel takes no database queries.
+    
+    Returns:
+        Dict with the feed's 'content', 'etag' and 'last_modified'
+    """
+    from .cache import get_feeds_version, make_etag, get_cached_feed, set_cached_feed
+    
+    # Read the version before rendering, so a change that lands mid-render
+    # leaves the entry unreachable instead of stale
+    etag = make_etag('rss', base_url, meeting_type, minutes, get_feeds_version())
+    feed = get_cached_feed(etag)
+    if feed is None:
+        meetings = list(get_rss_meetings(meeting_type, minutes))
+        feed = {
+            'content': generate_rss_feed(meetings, base_url, meeting_type, minutes),
+            'etag': etag,
+            'last_modified': max((meeting.content_updated_at for meeting in meetings), default=None),
+        }
+        set_cached_feed(etag, feed)
+    return feed
@@ -0,0 +1,49 @@
+"""
+Signal handlers for meetings app
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Meeting, AgendaSection, AgendaItem, Minute
+from .cache import bump_meeting_version
+from .jobs import refresh_text_artifacts
+
+
+def meeting_id_for_item(agenda_item_id):
+    """Look up the meeting an agenda item belongs to."""
+    if agenda_item_id is None:
+        return None
+    return AgendaItem.objects.filter(pk=agenda_item_id).values_list('meeting_id', flat=True).first()
+
+
+def meeting_tree_changed(meeting_id):
+    """Record a change to a meeting's agenda in its version marker and the cache."""
+    if meeting_id is None:
+        return
+    Meeting.touch(meeting_id)
+    bump_meeting_version(meeting_id)
+
+
+@receiver([post_save, post_delete], sender=Meeting)
+def meeting_changed(sender, instance, **kwargs):
+    # Meeting.save() already bumped content_updated_at
+    bump_meeting_version(instance.pk)
+
+
+@receiver(post_save, sender=Meeting)
+def meeting_saved(sender, instance, created, **kwargs):
+    # Keep the published calendar entry and RSS item in step with the
+    # meeting's date, time, location and status
+    if not created:
+        refresh_text_artifacts(instance)
+
+
+@receiver([post_save, post_delete], sender=AgendaSection)
+@receiver([post_save, post_delete], sender=AgendaItem)
+def agenda_changed(sender, instance, **kwargs):
+    meeting_tree_changed(instance.meeting_id)
+
+
+@receiver([post_save, post_delete], sender=Minute)
+@receiver([post_save, post_delete], sender='documents.Attachment')
+def agenda_item_child_changed(sender, instance, **kwargs):
+    meeting_tree_changed(meeting_id_for_item(instance.agenda_item_id))
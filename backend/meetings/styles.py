@@ -0,0 +1,149 @@
+"""
+Shared styles and templates for agenda rendering
+
+ReportLab styles, fonts and the DOCX template are built once per process
+and reused by every render; renderers only fill in agenda data.
+
+Settings:
+    AGENDA_LETTERHEAD: Text printed at the top of every agenda page
+    AGENDA_PDF_FONT: Path to a TrueType font used for PDF body text
+    AGENDA_PDF_BOLD_FONT: Path to its bold face
+    AGENDA_DOCX_TEMPLATE: Path to a .docx whose styles, header and
+        letterhead every DOCX agenda starts from
+"""
+import hashlib
+from functools import lru_cache
+from io import BytesIO
+from django.conf import settings
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+
+def _setting(name, default=''):
+    return getattr(settings, name, default) or default
+
+
+@lru_cache(maxsize=None)
+def get_fonts():
+    """
+    Register the configured PDF fonts and return (regular, bold) font names.
+    """
+    regular, bold = 'Helvetica', 'Helvetica-Bold'
+    if _setting('AGENDA_PDF_FONT'):
+        pdfmetrics.registerFont(TTFont('AgendaFont', _setting('AGENDA_PDF_FONT')))
+        regular = bold = 'AgendaFont'
+    if _setting('AGENDA_PDF_BOLD_FONT'):
+        pdfmetrics.registerFont(TTFont('AgendaFont-Bold', _setting('AGENDA_PDF_BOLD_FONT')))
+        bold = 'AgendaFont-Bold'
+    if regular != 'Helvetica':
+        pdfmetrics.registerFontFamily(regular, normal=regular, bold=bold, italic=regular, boldItalic=bold)
+    return regular, bold
+
+
+@lru_cache(maxsize=None)
+def get_pdf_styles() -> dict:
+    """Get the agenda PDF paragraph styles by name."""
+    regular, bold = get_fonts()
+    sample = getSampleStyleSheet()
+    normal = ParagraphStyle('AgendaNormal', parent=sample['Normal'], fontName=regular)
+    heading = dict(fontName=bold)
+    styles = {
+        'normal': normal,
+        'title': ParagraphStyle(
+            'CustomTitle', parent=sample['Heading1'], fontSize=24, textColor='#0c4a6e',
+            spaceAfter=30, alignment=TA_CENTER, **heading
+        ),
+        'info': ParagraphStyle('Info', parent=normal, fontSize=12, alignment=TA_CENTER),
+        'section': ParagraphStyle(
+            'Section', parent=sample['Heading2'], fontSize=16, textColor='#0369a1', spaceAfter=12, **heading
+        ),
+        # Items under a section
+        'item': ParagraphStyle('Item', parent=normal, fontSize=12, leftIndent=0.5 * inch, spaceAfter=6),
+        'description': ParagraphStyle(
+            'Description', parent=normal, fontSize=10, leftIndent=0.7 * inch, spaceAfter=12
+        ),
+        # Items of an agenda without sections
+        'plain_item': ParagraphStyle('PlainItem', parent=normal, fontSize=12, spaceAfter=12),
+        'plain_description': ParagraphStyle(
+            'PlainDescription', parent=normal, fontSize=10, leftIndent=0.3 * inch, spaceAfter=12
+        ),
+        # Packet pages
+        'heading1': ParagraphStyle('AgendaHeading1', parent=sample['Heading1'], **heading),
+        'heading2': ParagraphStyle('AgendaHeading2', parent=sample['Heading2'], **heading),
+        'heading3': ParagraphStyle('AgendaHeading3', parent=sample['Heading3'], **heading),
+        'packet_title': ParagraphStyle('PacketTitle', parent=sample['Title'], **heading),
+        'contents_row': ParagraphStyle('ContentsRow', parent=normal, fontSize=11),
+        'contents_subrow': ParagraphStyle('ContentsSubrow', parent=normal, fontSize=11, leftIndent=0.3 * inch),
+    }
+    return styles
+
+
+def draw_letterhead(canvas, doc):
+    """ReportLab page callback printing the letterhead, if one is configured."""
+    letterhead = _setting('AGENDA_LETTERHEAD')
+    if not letterhead:
+        return
+    regular, bold = get_fonts()
+    canvas.saveState()
+    canvas.setFont(bold, 10)
+    canvas.setFillColor('#0c4a6e')
+    canvas.drawCentredString(doc.pagesize[0] / 2, doc.pagesize[1] - 0.5 * inch, letterhead)
+    canvas.restoreState()
+
+
+@lru_cache(maxsize=None)
+def _get_docx_template_bytes() -> bytes:
+    template = _setting('AGENDA_DOCX_TEMPLATE')
+    if template:
+        with open(template, 'rb') as file:
+            return file.read()
+
+    doc = Document()
+    letterhead = _setting('AGENDA_LETTERHEAD')
+    if letterhead:
+        header = doc.sections[0].header.paragraphs[0]
+        header.text = letterhead
+        header.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def get_docx_document() -> Document:
+    """Get a new DOCX document from the preloaded agenda template."""
+    return Document(BytesIO(_get_docx_template_bytes()))
+
+
+def get_docx_style(doc: Document, name: str):
+    """
+    Look up a paragraph style by name once per document.
+
+    Falls back to the document's default paragraph style when a custom
+    ``AGENDA_DOCX_TEMPLATE`` does not define ``name``.
+    """
+    try:
+        return doc.styles[name]
+    except KeyError:
+        return doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+
+
+@lru_cache(maxsize=None)
+def get_style_version() -> str:
+    """
+    Get a fingerprint of the style settings.
+
+    Part of every render cache key, so changing the letterhead, fonts or
+    template re-renders documents instead of serving old ones.
+    """
+    parts = [_setting(name) for name in
+             ['AGENDA_LETTERHEAD', 'AGENDA_PDF_FONT', 'AGENDA_PDF_BOLD_FONT', 'AGENDA_DOCX_TEMPLATE']]
+    template = _setting('AGENDA_DOCX_TEMPLATE')
+    if template:
+        parts.append(hashlib.sha256(_get_docx_template_bytes()).hexdigest())
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,937 @@
+"""
+Tests for meetings app
+"""
+from datetime import date, time, timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import Meeting, AgendaSection, AgendaItem, Minute, Job
+
+User = get_user_model()
+
+
+class MeetingDetailQueryCountTests(TestCase):
+    """The meeting detail endpoint runs a fixed number of queries however large the agenda is."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_meeting(self, items):
+        meeting = Meeting.objects.create(
+            title=f'Meeting with {items} items',
+            date=date.today() + timedelta(days=7),
+            time=time(19, 0),
+            location='Council Chambers',
+            status='published',
+            published_at=timezone.now(),
+            created_by=self.user,
+        )
+        sections = [
+            AgendaSection.objects.create(meeting=meeting, title=f'Section {index}', order=index)
+            for index in range(3)
+        ]
+        for index in range(items):
+            item = AgendaItem.objects.create(
+                meeting=meeting,
+                section=sections[index % len(sections)],
+                title=f'Item {index}',
+                order=index,
+                submitted_by=self.user,
+            )
+            if index % 2 == 0:
+                Minute.objects.create(
+                    agenda_item=item, text='Approved', created_by=self.user,
+                    approved_by=self.user, status='approved'
+                )
+        return meeting
+
+    def count_detail_queries(self, meeting, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/meetings/meetings/{meeting.id}/', params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_detail_queries_do_not_grow_with_agenda(self):
+        small = self.count_detail_queries(self.create_meeting(items=5))
+        large = self.count_detail_queries(self.create_meeting(items=60))
+        self.assertEqual(small, large)
+
+    def test_normalized_detail_queries_do_not_grow_with_agenda(self):
+        small = self.count_detail_queries(self.create_meeting(items=5), shape='normalized')
+        large = self.count_detail_queries(self.create_meeting(items=60), shape='normalized')
+        self.assertEqual(small, large)
+
+    def test_detail_query_count(self):
+        meeting = self.create_meeting(items=30)
+        # ETag lookup, the meeting, its items, its sections and their items
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/meetings/meetings/{meeting.id}/', secure=True)
+        self.assertEqual(len(response.data['agenda_items']), 30)
+
+
+class AccessLogPermissionTests(TestCase):
+    """Access log entries name users and IP addresses, so only clerks and admins may list them."""
+
+    def get_access_logs(self, role):
+        user = User.objects.create_user(username=role, password=role, role=role)
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/meetings/analytics/access_logs/', secure=True)
+
+    def test_public_and_staff_roles_are_refused(self):
+        self.assertEqual(self.get_access_logs('public').status_code, 403)
+        self.assertEqual(self.get_access_logs('staff').status_code, 403)
+
+    def test_clerks_and_it_admins_may_list(self):
+        self.assertEqual(self.get_access_logs('clerk').status_code, 200)
+        self.assertEqual(self.get_access_logs('it_admin').status_code, 200)
+
+
+class AgendaReorderValidationTests(TestCase):
+    """Reorder sessions whose ``after`` is not a sibling are refused instead of failing mid-transaction."""
+
+    def setUp(self):
+        user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today(), time=time(19, 0),
+            location='Council Chambers', created_by=user,
+        )
+        self.first, self.second = [
+            AgendaSection.objects.create(meeting=self.meeting, title=title, order=index)
+            for index, title in enumerate(['Consent', 'New business'])
+        ]
+        self.item = AgendaItem.objects.create(meeting=self.meeting, section=self.first, title='A', order=1)
+        self.other = AgendaItem.objects.create(meeting=self.meeting, section=self.second, title='B', order=1)
+
+    def reorder(self, *moves):
+        return self.client.post('/api/meetings/items/reorder/', {
+            'meeting': self.meeting.id, 'moves': list(moves)
+        }, format='json', secure=True)
+
+    def test_after_itself_is_refused(self):
+        self.assertEqual(self.reorder({'id': self.item.id, 'after': self.item.id}).status_code, 400)
+
+    def test_after_in_another_section_is_refused(self):
+        self.assertEqual(self.reorder({'id': self.item.id, 'after': self.other.id}).status_code, 400)
+
+    def test_after_in_destination_section_is_accepted(self):
+        response = self.reorder({'id': self.item.id, 'after': self.other.id, 'section': self.second.id})
+        self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.section_id, self.second.id)
+        self.assertGreater(self.item.order, self.other.order)
+
+
+class StaleSaveTests(TestCase):
+    """Saving a stale meeting or section does not roll back its numbering counters."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today(), time=time(19, 0),
+            location='Council Chambers', created_by=self.user,
+        )
+
+    def create_item(self, section=None):
+        return AgendaItem.objects.create(meeting=self.meeting, section=section, title='Item', submitted_by=self.user)
+
+    def test_stale_meeting_save_keeps_item_numbers(self):
+        stale = Meeting.objects.get(pk=self.meeting.pk)
+        numbers = [self.create_item().number for _ in range(3)]
+        stale.title = 'Renamed'
+        stale.save()
+        numbers.append(self.create_item().number)
+        self.assertEqual(numbers, ['1', '2', '3', '4'])
+        self.assertEqual(Meeting.objects.get(pk=self.meeting.pk).title, 'Renamed')
+
+    def test_stale_section_save_keeps_item_numbers(self):
+        section = AgendaSection.objects.create(meeting=self.meeting, title='Consent')
+        stale = AgendaSection.objects.get(pk=section.pk)
+        numbers = [self.create_item(section).number for _ in range(2)]
+        stale.title = 'Consent calendar'
+        stale.save()
+        numbers.append(self.create_item(section).number)
+        self.assertEqual(numbers, ['1.1', '1.2', '1.3'])
+
+    def test_stale_meeting_save_keeps_published_snapshot(self):
+        stale = Meeting.objects.get(pk=self.meeting.pk)
+        snapshot = self.meeting.publish(self.user)
+        stale.description = 'Edited'
+        stale.save()
+        self.assertEqual(Meeting.objects.get(pk=self.meeting.pk).published_snapshot_id, snapshot.id)
+
+
+class PublicReaderAgendaTests(TestCase):
+    """Public-role accounts see the published snapshot, like anonymous readers."""
+
+    def setUp(self):
+        self.clerk = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today(), time=time(19, 0),
+            location='Council Chambers', created_by=self.clerk,
+        )
+        AgendaItem.objects.create(meeting=self.meeting, title='Posted item', submitted_by=self.clerk)
+        self.snapshot = self.meeting.publish(self.clerk)
+        AgendaItem.objects.create(meeting=self.meeting, title='Unposted item', submitted_by=self.clerk)
+
+    def get_render_agenda(self, user):
+        from types import SimpleNamespace
+        from .views import MeetingViewSet
+        view = MeetingViewSet()
+        view.request = SimpleNamespace(user=user)
+        meeting = Meeting.objects.select_related('published_snapshot').get(pk=self.meeting.pk)
+        return view.get_render_agenda(meeting)
+
+    def test_public_role_gets_snapshot(self):
+        public = User.objects.create_user(username='resident', password='resident', role='public')
+        self.assertEqual(self.get_render_agenda(public), self.snapshot.data)
+
+    def test_clerk_gets_live_agenda(self):
+        self.assertNotEqual(self.get_render_agenda(self.clerk), self.snapshot.data)
+
+
+class JobVisibilityTests(TestCase):
+    """Jobs are visible to the user who queued them, anonymous jobs to anonymous users, and all jobs to clerks."""
+
+    def setUp(self):
+        from .jobs import enqueue
+        self.owner = User.objects.create_user(username='staff', password='staff', role='staff')
+        self.job = enqueue('agenda_packet', {'meeting': 1, 'format': 'pdf'}, user=self.owner)
+        self.anonymous_job = enqueue('agenda_packet', {'meeting': 1, 'format': 'pdf'})
+
+    def get_job(self, job, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client.get(f'/api/meetings/jobs/{job.id}/', secure=True).status_code
+
+    def test_identical_jobs_are_not_shared_between_users(self):
+        self.assertNotEqual(self.job.id, self.anonymous_job.id)
+
+    def test_owner_and_clerk_see_job(self):
+        clerk = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.assertEqual(self.get_job(self.job, self.owner), 200)
+        self.assertEqual(self.get_job(self.job, clerk), 200)
+
+    def test_other_users_do_not_see_job(self):
+        resident = User.objects.create_user(username='resident', password='resident', role='public')
+        self.assertEqual(self.get_job(self.job, resident), 404)
+        self.assertEqual(self.get_job(self.job), 404)
+        self.assertEqual(self.get_job(self.anonymous_job, resident), 404)
+        self.assertEqual(self.get_job(self.anonymous_job), 200)
+
+    def test_concurrent_duplicate_is_refused(self):
+        from django.db import IntegrityError, transaction
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind=self.job.kind, params=self.job.params, dedupe_key=self.job.dedupe_key)
+
+
+class UnsubscribeTests(TestCase):
+    """Opening an unsubscribe link only asks for confirmation; the POST unsubscribes."""
+
+    def setUp(self):
+        from .models import EmailSubscription
+        self.subscription = EmailSubscription.objects.create(
+            email='resident@example.com', subscription_types=['meeting_published']
+        )
+        self.url = f'/api/meetings/email-subscriptions/unsubscribe/?token={self.subscription.unsubscribe_token}'
+
+    def is_active(self):
+        self.subscription.refresh_from_db()
+        return self.subscription.is_active
+
+    def test_get_shows_confirmation_without_unsubscribing(self):
+        response = APIClient().get(self.url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<form method="post"')
+        self.assertTrue(self.is_active())
+
+    def test_get_with_unknown_token_is_not_found(self):
+        response = APIClient().get('/api/meetings/email-subscriptions/unsubscribe/?token=nope', secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_one_click_post_unsubscribes(self):
+        response = APIClient().post(self.url, {'List-Unsubscribe': 'One-Click'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.is_active())
+
+    def test_confirmation_form_unsubscribes(self):
+        response = APIClient().post(
+            '/api/meetings/email-subscriptions/unsubscribe/',
+            {'token': self.subscription.unsubscribe_token, 'confirm': '1'}, secure=True
+        )
+        self.assertContains(response, 'You have been unsubscribed')
+        self.assertFalse(self.is_active())
+
+
+class OutboxSendTests(TestCase):
+    """Messages that cannot be sent end up failed instead of stuck in 'sending'."""
+
+    def create_message(self, **fields):
+        from .models import OutboxMessage
+        fields = {
+            'to_email': 'resident@example.com', 'subject': 'Agenda posted', 'body_text': 'Body',
+            'status': 'sending', 'attempts': 1, **fields
+        }
+        return OutboxMessage.objects.create(**fields)
+
+    def test_bad_header_fails_without_retry(self):
+        from django.core.mail import get_connection
+        from .outbox import send_batch
+        bad = self.create_message(subject='Agenda\nposted')
+        good = self.create_message()
+        counts = send_batch([bad, good], get_connection())
+        self.assertEqual(counts, {'sent': 1, 'retrying': 0, 'failed': 1})
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, 'failed')
+
+    def test_stale_messages_out_of_attempts_fail(self):
+        from .outbox import requeue_stale_messages
+        claimed_at = timezone.now() - timedelta(days=1)
+        exhausted = self.create_message(claimed_at=claimed_at, attempts=5, max_attempts=5)
+        retried = self.create_message(claimed_at=claimed_at, attempts=2, max_attempts=5)
+        self.assertEqual(requeue_stale_messages(), 2)
+        exhausted.refresh_from_db()
+        retried.refresh_from_db()
+        self.assertEqual((exhausted.status, retried.status), ('failed', 'pending'))
+
+
+class ReminderDispatchTests(TestCase):
+    """A meeting start is only recorded as reminded once its emails are queued."""
+
+    def setUp(self):
+        from datetime import datetime
+        from .models import EmailSubscription
+        user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.now = timezone.localtime()
+        starts_at = self.now + timedelta(hours=2)
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=starts_at.date(), time=starts_at.time().replace(microsecond=0),
+            location='Council Chambers', status='published', created_by=user,
+        )
+        if datetime.combine(self.meeting.date, self.meeting.time) < self.now.replace(tzinfo=None):
+            self.skipTest('Meeting start falls past midnight')
+        EmailSubscription.objects.create(email='resident@example.com', subscription_types=['meeting_reminder'])
+
+    def test_no_reminder_recorded_without_email(self):
+        from .notifications import dispatch_reminders
+        with self.settings(EMAIL_HOST=''):
+            self.assertEqual(dispatch_reminders(self.now), [])
+        self.assertFalse(self.meeting.reminders.exists())
+
+    def test_failed_queueing_is_retried(self):
+        from unittest import mock
+        from .notifications import dispatch_reminders
+        with self.settings(EMAIL_HOST='smtp.example.com'):
+            with mock.patch('meetings.outbox.queue_messages', side_effect=RuntimeError), \
+                    self.assertRaises(RuntimeError):
+                dispatch_reminders(self.now)
+            self.assertFalse(self.meeting.reminders.exists())
+            [reminder] = dispatch_reminders(self.now)
+        self.assertEqual(reminder.queued, 1)
+
+
+class PublishNotificationTests(TestCase):
+    """Publishing only notifies subscribers about a new or amended agenda."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today() + timedelta(days=7), time=time(19, 0),
+            location='Council Chambers', created_by=self.user,
+        )
+        AgendaItem.objects.create(meeting=self.meeting, title='Call to order', submitted_by=self.user)
+
+    def publish(self):
+        response = self.client.post(f'/api/meetings/meetings/{self.meeting.id}/publish/', secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def events(self):
+        return list(self.meeting.notification_events.values_list('notification_type', 'count'))
+
+    def test_draft_publish_records_published(self):
+        self.publish()
+        self.assertEqual(self.events(), [('published', 1)])
+
+    def test_unchanged_republish_records_nothing(self):
+        self.publish()
+        self.publish()
+        self.assertEqual(self.events(), [('published', 1)])
+
+    def test_amended_republish_records_update(self):
+        self.publish()
+        self.meeting.notification_events.update(sent_at=timezone.now())
+        AgendaItem.objects.create(meeting=self.meeting, title='New business', submitted_by=self.user)
+        self.publish()
+        self.assertEqual(
+            list(self.meeting.notification_events.filter(sent_at__isnull=True).values_list('notification_type', flat=True)),
+            ['updated']
+        )
+
+    def test_completed_and_archived_publish_records_nothing(self):
+        for meeting_status in ['completed', 'archived']:
+            Meeting.objects.filter(pk=self.meeting.pk).update(status=meeting_status)
+            self.publish()
+        self.assertEqual(self.events(), [])
+
+
+class CursorPaginationTests(TestCase):
+    """Cursor pagination pages on non-null orderings and refuses nullable ones."""
+
+    def setUp(self):
+        user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        for index in range(3):
+            Meeting.objects.create(
+                title=f'Meeting {index}', date=date.today() + timedelta(days=index), time=time(19, 0),
+                location='Council Chambers', created_by=user,
+            )
+
+    def list_meetings(self, **params):
+        return self.client.get('/api/meetings/meetings/', {'pagination': 'cursor', 'page_size': 2, **params}, secure=True)
+
+    def test_pages_through_meetings(self):
+        response = self.list_meetings()
+        self.assertEqual(response.status_code, 200)
+        titles = [meeting['title'] for meeting in response.data['results']]
+        response = self.client.get(response.data['next'], secure=True)
+        titles += [meeting['title'] for meeting in response.data['results']]
+        self.assertEqual(titles, ['Meeting 2', 'Meeting 1', 'Meeting 0'])
+
+    def test_nullable_ordering_is_refused(self):
+        self.assertEqual(self.list_meetings(ordering='published_at').status_code, 400)
+
+
+class JobClaimTests(TestCase):
+    """Workers do not run more than JOB_MAX_RUNNING jobs at once."""
+
+    def setUp(self):
+        from .jobs import enqueue
+        self.job = enqueue('agenda_packet', {'meeting': 1, 'format': 'pdf'})
+
+    def test_claims_pending_job(self):
+        from .jobs import claim_job
+        job = claim_job('worker')
+        self.assertEqual((job.id, job.status, job.attempts), (self.job.id, 'running', 1))
+
+    def test_no_claim_at_cap(self):
+        from .jobs import claim_job, enqueue
+        with self.settings(JOB_MAX_RUNNING=1):
+            claim_job('worker')
+            enqueue('agenda_packet', {'meeting': 2, 'format': 'pdf'})
+            self.assertIsNone(claim_job('other'))
+
+    def test_claim_over_cap_is_given_back(self):
+        from unittest import mock
+        from django.db.models.query import QuerySet
+        from .jobs import claim_job
+        # Another worker claimed a job between our count and our claim
+        with self.settings(JOB_MAX_RUNNING=1), mock.patch.object(QuerySet, 'count', side_effect=[0, 2]):
+            self.assertIsNone(claim_job('worker'))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts, self.job.worker), ('pending', 0, ''))
+
+    def test_job_reporting_progress_is_not_requeued(self):
+        from .jobs import claim_job, requeue_stale_jobs
+        claim_job('worker')
+        Job.objects.filter(pk=self.job.pk).update(started_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(requeue_stale_jobs(), 0)
+        Job.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'pending')
+
+    def test_progress_is_a_heartbeat(self):
+        from unittest import mock
+        from .jobs import HANDLERS, claim_job, requeue_stale_jobs, run_job
+        job = claim_job('worker')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        requeued = []
+
+        def handler(params, progress):
+            progress(1, 2)
+            requeued.append(requeue_stale_jobs())
+            return {}
+
+        with mock.patch.dict(HANDLERS, {job.kind: handler}):
+            self.assertEqual(run_job(job).status, 'succeeded')
+        self.assertEqual(requeued, [0])
+
+
+class NotificationDispatchTests(TestCase):
+    """Notification events stay claimable until their emails are queued."""
+
+    def setUp(self):
+        from .models import EmailSubscription, NotificationEvent
+        user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today() + timedelta(days=7), time=time(19, 0),
+            location='Council Chambers', status='published', created_by=user,
+        )
+        EmailSubscription.objects.create(email='resident@example.com', subscription_types=['meeting_published'])
+        EmailSubscription.objects.create(email='digest@example.com', subscription_types=['daily_digest'])
+        self.event = NotificationEvent.objects.create(
+            meeting=self.meeting, notification_type='published', send_after=timezone.now() - timedelta(minutes=1)
+        )
+        NotificationEvent.objects.filter(pk=self.event.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+    def test_failed_queueing_leaves_event_due(self):
+        from unittest import mock
+        from .notifications import dispatch_due_notifications
+        with self.settings(EMAIL_HOST='smtp.example.com'):
+            with mock.patch('meetings.outbox.queue_messages', side_effect=RuntimeError):
+                self.assertEqual(dispatch_due_notifications(), 0)
+            self.event.refresh_from_db()
+            self.assertIsNone(self.event.sent_at)
+            self.assertEqual(dispatch_due_notifications(), 1)
+        self.assertEqual(self.meeting.outbox_messages.count(), 1)
+
+    def test_digest_waits_for_email_configuration(self):
+        from .notifications import send_daily_digests
+        morning = timezone.localtime().replace(hour=9)
+        with self.settings(EMAIL_HOST=''):
+            self.assertEqual(send_daily_digests(morning), 0)
+        self.event.refresh_from_db()
+        self.assertIsNone(self.event.digested_at)
+        with self.settings(EMAIL_HOST='smtp.example.com'):
+            self.assertEqual(send_daily_digests(morning), 1)
+
+
+class ExportStorageTests(TestCase):
+    """Export ZIPs live outside the render cache and expire by age."""
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        settings = self.settings(AGENDA_RENDER_CACHE_DIR=self.root / 'cache', EXPORT_DIR=self.root / 'exports')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_export_result_survives_cache_pruning(self):
+        from .jobs import get_result_path
+        from .render_cache import prune
+        job = Job(kind='export_packets', result={'file': 'export_abc.zip'})
+        path = get_result_path(job)
+        self.assertEqual(path.parent, self.root / 'exports')
+        path.parent.mkdir()
+        path.write_bytes(b'zip')
+        prune(max_bytes=0)
+        self.assertTrue(path.exists())
+
+    def test_old_exports_are_pruned(self):
+        import os
+        from .exports import prune_exports
+        exports = self.root / 'exports'
+        (exports / 'work').mkdir(parents=True)
+        old, new = exports / 'old.zip', exports / 'new.zip'
+        old.write_bytes(b'zip')
+        new.write_bytes(b'zip')
+        week_ago = timezone.now().timestamp() - 8 * 24 * 60 * 60
+        for path in [old, exports / 'work']:
+            os.utime(path, (week_ago, week_ago))
+        self.assertEqual(prune_exports(), 2)
+        self.assertEqual(sorted(path.name for path in exports.iterdir()), ['new.zip'])
+
+
+class SharedCacheCheckTests(TestCase):
+    """Production settings on a per-process cache are flagged by a system check."""
+
+    def test_locmem_without_debug_warns(self):
+        from .checks import check_shared_cache
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        database = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'}}
+        with self.settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['meetings.W001'])
+        with self.settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_shared_cache(None), [])
+        with self.settings(DEBUG=False, CACHES=database):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class PublishedCalendarEntryTests(TestCase):
+    """The published calendar entry follows a meeting rescheduled without re-publishing."""
+
+    def setUp(self):
+        from .jobs import render_text_artifact
+        from .models import MeetingArtifact
+        self.user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today() + timedelta(days=7), time=time(19, 0),
+            location='Council Chambers', created_by=self.user,
+        )
+        snapshot = self.meeting.publish(self.user)
+        self.artifact = MeetingArtifact.objects.create(
+            meeting=self.meeting, snapshot=snapshot, kind='ics',
+            content=render_text_artifact(self.meeting, 'ics')
+        )
+
+    def test_moved_meeting_updates_published_entry(self):
+        from django.test import override_settings
+        meeting = Meeting.objects.get(pk=self.meeting.pk)
+        meeting.location = 'Library Annex'
+        meeting.time = time(18, 30)
+        meeting.save()
+        self.artifact.refresh_from_db()
+        self.assertIn('LOCATION:Library Annex', self.artifact.content)
+        self.assertIn('T183000', self.artifact.content)
+
+        self.artifact.content += 'X-SERVED-FROM-ARTIFACT:1\r\n'
+        self.artifact.save()
+        with override_settings(PUBLIC_BASE_URL='https://testserver'):
+            response = APIClient().get(f'/api/meetings/meetings/{meeting.id}/ics_export/', secure=True)
+        self.assertContains(response, 'X-SERVED-FROM-ARTIFACT')
+        self.assertContains(response, 'LOCATION:Library Annex')
+
+
+class FractionalOrderingTests(TestCase):
+    """Moves write only the moved row, except when a tie forces the siblings to be respaced."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today(), time=time(19, 0),
+            location='Council Chambers', created_by=self.user,
+        )
+        self.items = [
+            AgendaItem.objects.create(meeting=self.meeting, title=title, order=order, submitted_by=self.user)
+            for title, order in [('A', 1024), ('B', 2048), ('C', 3072)]
+        ]
+
+    def titles(self):
+        return list(self.meeting.agenda_items.order_by('order', 'id').values_list('title', flat=True))
+
+    def test_order_between(self):
+        from .ordering import order_between
+        self.assertEqual(order_between(), 1024)
+        self.assertEqual(order_between(1024, None), 2048)
+        self.assertEqual(order_between(None, 1024), 512)
+        self.assertEqual(order_between(1, 2), 1.5)
+        self.assertIsNone(order_between(1, 1 + 1e-12))
+
+    def test_move_takes_midpoint_and_writes_one_row(self):
+        from .ordering import place_after
+        first, second, third = self.items
+        with self.assertNumQueries(3):
+            rebalanced = place_after(third, self.meeting.agenda_items.all(), after=first)
+        self.assertFalse(rebalanced)
+        self.assertEqual(third.order, 1536)
+        third.save(update_fields=['order'])
+        self.assertEqual(self.titles(), ['A', 'C', 'B'])
+        self.assertEqual(AgendaItem.objects.get(pk=second.pk).order, 2048)
+
+    def test_move_to_top(self):
+        from .ordering import place_after
+        third = self.items[2]
+        place_after(third, self.meeting.agenda_items.all())
+        third.save(update_fields=['order'])
+        self.assertEqual(self.titles(), ['C', 'A', 'B'])
+
+    def test_tie_respaces_siblings(self):
+        from .ordering import ORDER_STEP, place_after
+        first, second, third = self.items
+        AgendaItem.objects.filter(pk=second.pk).update(order=1024)
+        self.assertTrue(place_after(third, self.meeting.agenda_items.all(), after=first))
+        third.save(update_fields=['order'])
+        self.assertEqual(self.titles(), ['A', 'C', 'B'])
+        orders = list(self.meeting.agenda_items.order_by('order').values_list('order', flat=True))
+        self.assertEqual(len(set(orders)), 3)
+        self.assertEqual(orders[0], ORDER_STEP)
+
+    def test_renumber_follows_order_and_continues(self):
+        section = AgendaSection.objects.create(meeting=self.meeting, title='Consent', order=1024)
+        sectioned = AgendaItem.objects.create(
+            meeting=self.meeting, section=section, title='D', order=1024, submitted_by=self.user
+        )
+        AgendaItem.objects.filter(pk=self.items[2].pk).update(order=1)
+        self.meeting.renumber_agenda()
+        numbers = dict(self.meeting.agenda_items.values_list('title', 'number'))
+        self.assertEqual(numbers, {'C': '1', 'A': '2', 'B': '3', 'D': '1.1'})
+        later = AgendaItem.objects.create(meeting=self.meeting, title='E', submitted_by=self.user)
+        self.assertEqual(later.number, '4')
+        self.assertEqual(AgendaItem.objects.get(pk=sectioned.pk).number, '1.1')
+
+
+class AgendaTreeTests(TestCase):
+    """The bulk agenda builder numbers items like one-by-one creation, and build_agenda_tree nests them."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today(), time=time(19, 0),
+            location='Council Chambers', created_by=self.user,
+        )
+
+    def post_tree(self, tree):
+        response = self.client.post(
+            f'/api/meetings/meetings/{self.meeting.id}/agenda_tree/', tree, format='json', secure=True
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def numbers(self, tree):
+        return {
+            'sections': [[item['number'] for item in section['items']] for section in tree['sections']],
+            'items': [item['number'] for item in tree['items']],
+        }
+
+    def test_bulk_tree_is_numbered_and_nested(self):
+        from .agenda import build_agenda_tree
+        self.post_tree({
+            'sections': [
+                {'title': 'Consent', 'items': [
+                    {'title': 'Minutes', 'description': 'Details'}, {'title': 'Claims', 'description': 'Details'},
+                ]},
+                {'title': 'New business', 'items': [{'title': 'Budget', 'description': 'Details'}]},
+            ],
+            'items': [{'title': 'Call to order', 'description': 'Details'}],
+        })
+        tree = build_agenda_tree(self.meeting)
+        self.assertEqual([section['title'] for section in tree['sections']], ['Consent', 'New business'])
+        self.assertEqual(
+            [[item['title'] for item in section['items']] for section in tree['sections']],
+            [['Minutes', 'Claims'], ['Budget']]
+        )
+        self.assertEqual(self.numbers(tree), {'sections': [['1.1', '1.2'], ['2.1']], 'items': ['1']})
+
+    def test_later_tree_continues_numbering_and_moved_items_keep_theirs(self):
+        from .agenda import build_agenda_tree
+        self.post_tree({'sections': [{'title': 'Consent', 'items': [{'title': 'Minutes', 'description': 'Details'}]}]})
+        section = self.meeting.sections.get()
+        minutes = self.meeting.agenda_items.get()
+        self.post_tree({
+            'sections': [{'id': section.id, 'title': 'Consent', 'items': [
+                {'title': 'Claims', 'description': 'Details'},
+            ]}],
+            'items': [{'id': minutes.id, 'title': 'Minutes', 'description': 'Details'}],
+        })
+        tree = build_agenda_tree(self.meeting)
+        self.assertEqual([item['title'] for item in tree['items']], ['Minutes'])
+        self.assertEqual(self.numbers(tree), {'sections': [['1.2']], 'items': ['1.1']})
+
+    def test_tree_lists_only_current_public_attachments(self):
+        from documents.models import Attachment
+        from .agenda import build_agenda_tree
+        item = AgendaItem.objects.create(meeting=self.meeting, title='Budget', submitted_by=self.user)
+        for name, is_current, is_public in [('Report', True, True), ('Old report', False, True), ('Memo', True, False)]:
+            Attachment.objects.create(
+                agenda_item=item, name=name, file='attachments/report.pdf', file_type='pdf', file_size=1,
+                mime_type='application/pdf', uploaded_by=self.user, is_current=is_current, is_public=is_public,
+            )
+        [entry] = build_agenda_tree(self.meeting)['items']
+        self.assertEqual([attachment['name'] for attachment in entry['attachments']], ['Report'])
+
+
+def make_pdf(pages: int, label: str = 'Page') -> bytes:
+    """A small PDF with ``pages`` numbered pages."""
+    from io import BytesIO
+    from reportlab.pdfgen import canvas
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for number in range(1, pages + 1):
+        pdf.drawString(72, 720, f'{label} {number}')
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def read_outline(reader) -> list:
+    """(title, page index, child rows) for each top-level bookmark of ``reader``."""
+    rows = []
+    for node in reader.outline:
+        if isinstance(node, list):
+            rows[-1][2].extend((child.title, reader.get_destination_page_number(child)) for child in node)
+        else:
+            rows.append((node.title, reader.get_destination_page_number(node), []))
+    return rows
+
+
+class PdfStreamWriterTests(TestCase):
+    """PdfStreamWriter concatenates pages and nests bookmarks into a valid PDF."""
+
+    def test_pages_and_bookmarks(self):
+        from io import BytesIO
+        from PyPDF2 import PdfReader
+        from .packets import PdfStreamWriter
+        output = BytesIO()
+        writer = PdfStreamWriter(output)
+        writer.add_pages(PdfReader(BytesIO(make_pdf(2, 'First'))))
+        second = len(writer)
+        writer.add_pages(PdfReader(BytesIO(make_pdf(3, 'Second'))))
+        parent = writer.add_outline_item('First', 0)
+        writer.add_outline_item('Second', second)
+        writer.add_outline_item('Second, page 3', second + 2, parent=parent)
+        writer.close()
+
+        reader = PdfReader(BytesIO(output.getvalue()), strict=True)
+        self.assertEqual(len(writer), 5)
+        self.assertEqual(len(reader.pages), 5)
+        self.assertIn('Second 3', reader.pages[4].extract_text())
+        self.assertEqual(read_outline(reader), [('First', 0, [('Second, page 3', 4)]), ('Second', 2, [])])
+
+
+class AgendaPacketTests(TestCase):
+    """Packets put each item's PDF attachments after the agenda, bookmarked, and rebuild one section at a time."""
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        from django.core.files.base import ContentFile
+        from documents.models import Attachment
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        settings = self.settings(MEDIA_ROOT=root / 'media', AGENDA_RENDER_CACHE_DIR=root / 'cache')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.meeting = Meeting.objects.create(
+            title='Regular meeting', date=date.today(), time=time(19, 0),
+            location='Council Chambers', created_by=user,
+        )
+        self.items = {}
+        for position, (section_title, item_title, pages) in enumerate(
+            [('Consent', 'Claims', 2), ('New business', 'Budget', 3)], start=1
+        ):
+            section = AgendaSection.objects.create(meeting=self.meeting, title=section_title, order=position)
+            item = AgendaItem.objects.create(
+                meeting=self.meeting, section=section, title=item_title, description='Details', submitted_by=user
+            )
+            attachment = Attachment(
+                agenda_item=item, name=f'{item_title} report', file_type='pdf', file_size=1,
+                mime_type='application/pdf', uploaded_by=user,
+            )
+            attachment.file.save(f'{item_title}.pdf', ContentFile(make_pdf(pages, item_title)), save=False)
+            attachment.save()
+            self.items[item_title] = item
+
+    def build(self):
+        from io import BytesIO
+        from PyPDF2 import PdfReader
+        from .utils import generate_agenda_packet
+        return PdfReader(BytesIO(generate_agenda_packet(self.meeting, include_attachments=True).getvalue()))
+
+    def test_attachments_follow_agenda_with_bookmarks(self):
+        reader = self.build()
+        outline = read_outline(reader)
+        self.assertEqual([title for title, _, _ in outline], ['Contents', 'Agenda', '1.1. Claims', '2.1. Budget'])
+        (_, _, _), (_, agenda_page, _), (_, claims_page, claims), (_, budget_page, budget) = outline
+        self.assertEqual(claims, [('Claims report', claims_page + 1)])
+        self.assertEqual(budget, [('Budget report', budget_page + 1)])
+        # Divider and two attachment pages, then the next divider and three more
+        self.assertEqual(budget_page, claims_page + 3)
+        self.assertEqual(len(reader.pages), budget_page + 4)
+        self.assertIn('Claims 2', reader.pages[claims_page + 2].extract_text())
+        self.assertIn('Budget 3', reader.pages[-1].extract_text())
+        self.assertIn('Agenda', reader.pages[0].extract_text())
+
+    def test_rebuild_renders_only_changed_section(self):
+        from unittest import mock
+        from . import packets
+        self.build()
+        budget = self.items['Budget']
+        budget.title = 'Annual budget'
+        budget.save()
+        with mock.patch.object(packets, '_build_fragment', wraps=packets._build_fragment) as build_fragment:
+            outline = read_outline(self.build())
+        self.assertEqual(build_fragment.call_count, 1)
+        self.assertEqual([title for title, _, _ in outline][-1], '2.1. Annual budget')
+
+
+class NotificationCoalescingTests(TestCase):
+    """Bursts of events for a meeting send one email; digest subscribers get one email a day."""
+
+    def setUp(self):
+        from .models import EmailSubscription
+        user = User.objects.create_user(username='clerk', password='clerk', role='clerk')
+        self.meetings = [
+            Meeting.objects.create(
+                title=title, date=date.today() + timedelta(days=7), time=time(19, 0),
+                location='Council Chambers', status='published', created_by=user,
+            )
+            for title in ['Council meeting', 'Planning meeting']
+        ]
+        EmailSubscription.objects.create(email='instant@example.com', subscription_types=['meeting_published', 'agenda_updated'])
+        EmailSubscription.objects.create(email='digest@example.com', subscription_types=['daily_digest'])
+        EmailSubscription.objects.create(
+            email='minutes-digest@example.com', subscription_types=['daily_digest', 'minutes_approved']
+        )
+        email = self.settings(EMAIL_HOST='smtp.example.com')
+        email.enable()
+        self.addCleanup(email.disable)
+
+    def outbox(self, **filters):
+        from .models import OutboxMessage
+        return list(OutboxMessage.objects.filter(**filters).order_by('to_email').values_list('to_email', 'notification_type'))
+
+    def test_burst_of_events_merges_into_one(self):
+        from .notifications import record_notification
+        meeting = self.meetings[0]
+        first = record_notification(meeting, 'updated')
+        record_notification(meeting, 'updated')
+        merged = record_notification(meeting, 'published')
+        self.assertEqual(merged.pk, first.pk)
+        self.assertEqual((merged.notification_type, merged.count), ('published', 3))
+        self.assertEqual(record_notification(meeting, 'updated').notification_type, 'published')
+
+    def test_events_for_other_meetings_and_after_sending_are_separate(self):
+        from .notifications import record_notification
+        first = record_notification(self.meetings[0], 'updated')
+        self.assertNotEqual(record_notification(self.meetings[1], 'updated').pk, first.pk)
+        first.sent_at = timezone.now()
+        first.save()
+        self.assertNotEqual(record_notification(self.meetings[0], 'updated').pk, first.pk)
+
+    def test_event_is_sent_once_its_window_passes(self):
+        from .models import NotificationEvent
+        from .notifications import dispatch_due_notifications, record_notification
+        event = record_notification(self.meetings[0], 'published')
+        self.assertEqual(dispatch_due_notifications(), 0)
+        NotificationEvent.objects.filter(pk=event.pk).update(send_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(dispatch_due_notifications(), 1)
+        self.assertEqual(dispatch_due_notifications(), 0)
+        # Digest subscribers hear about it in their digest instead
+        self.assertEqual(self.outbox(), [('instant@example.com', 'published')])
+
+    def test_daily_digest_batches_yesterdays_events(self):
+        from .models import NotificationEvent, OutboxMessage
+        from .notifications import record_notification, send_daily_digests
+        record_notification(self.meetings[0], 'published')
+        record_notification(self.meetings[1], 'updated')
+        record_notification(self.meetings[1], 'minutes_approved')
+        NotificationEvent.objects.update(created_at=timezone.now() - timedelta(days=1))
+        today = timezone.localtime()
+
+        self.assertEqual(send_daily_digests(today.replace(hour=6)), 0)
+        self.assertEqual(send_daily_digests(today.replace(hour=9)), 2)
+        self.assertEqual(send_daily_digests(today.replace(hour=10)), 0)
+        self.assertEqual(self.outbox(), [
+            ('digest@example.com', 'daily_digest'), ('minutes-digest@example.com', 'daily_digest'),
+        ])
+
+        everything = OutboxMessage.objects.get(to_email='digest@example.com')
+        self.assertEqual(everything.subject, 'Meeting updates: 3 changes')
+        self.assertIn('Council meeting', everything.body_text)
+        minutes_only = OutboxMessage.objects.get(to_email='minutes-digest@example.com')
+        self.assertEqual(minutes_only.subject, 'Meeting updates: 1 change')
+        self.assertIn('Minutes approved: Planning meeting', minutes_only.body_text)
+
+    def test_todays_events_wait_for_tomorrows_digest(self):
+        from .notifications import record_notification, send_daily_digests
+        record_notification(self.meetings[0], 'published')
+        self.assertEqual(send_daily_digests(timezone.localtime().replace(hour=23)), 0)
@@ -7,7 +7,7 @@ from .views import (
     MeetingViewSet, AgendaSectionViewSet, AgendaItemViewSet,
     MinuteViewSet, VoteViewSet,
     EmailSubscriptionViewSet, ElectronicSignatureViewSet,
-    AnalyticsViewSet, RSSFeedView
+    AnalyticsViewSet, JobViewSet, RSSFeedView, CalendarFeedView
 )
 
 router = DefaultRouter()
@@ -19,10 +19,13 @@ router.register(r'votes', VoteViewSet, basename='vote')
 router.register(r'email-subscriptions', EmailSubscriptionViewSet, basename='email-subscription')
 router.register(r'signatures', ElectronicSignatureViewSet, basename='signature')
 router.register(r'analytics', AnalyticsViewSet, basename='analytics')
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('rss/', RSSFeedView.as_view(), name='rss-feed'),
+    path('rss/minutes/', RSSFeedView.as_view(minutes=True), name='rss-minutes-feed'),
+    path('calendar.ics', CalendarFeedView.as_view(), name='calendar-feed'),
 ]
 
 
@@ -2,197 +2,183 @@
 Utility functions for meeting management
 """
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
 from .models import Meeting
-from docx import Document
+from .agenda import build_agenda_tree
+from .styles import get_pdf_styles, get_docx_document, get_docx_style, draw_letterhead
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 
-def generate_agenda_pdf(meeting: Meeting) -> BytesIO:
+def generate_agenda_pdf(meeting: Meeting, agenda: dict = None, output=None) -> BytesIO:
     """
     Generate PDF agenda for a meeting.
+    
+    Renders ``agenda`` (an agenda tree, e.g. a published snapshot) if given,
+    otherwise the meeting's live agenda. Writes to ``output`` (a binary file)
+    if given, otherwise to a new buffer.
     """
-    buffer = BytesIO()
+    if agenda is None:
+        agenda = build_agenda_tree(meeting)
+    info = agenda['meeting']
+    
+    buffer = output if output is not None else BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = get_pdf_styles()
     story = []
-    styles = getSampleStyleSheet()
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor='#0c4a6e',
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph(meeting.title, title_style))
+    story.append(Paragraph(info['title'], styles['title']))
     story.append(Spacer(1, 0.2 * inch))
     
     # Meeting info
-    info_style = ParagraphStyle(
-        'Info',
-        parent=styles['Normal'],
-        fontSize=12,
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph(f"Date: {meeting.date}", info_style))
-    story.append(Paragraph(f"Time: {meeting.time}", info_style))
-    story.append(Paragraph(f"Location: {meeting.location}", info_style))
+    story.append(Paragraph(f"Date: {info['date']}", styles['info']))
+    story.append(Paragraph(f"Time: {info['time']}", styles['info']))
+    story.append(Paragraph(f"Location: {info['location']}", styles['info']))
     story.append(Spacer(1, 0.3 * inch))
     
     # Agenda items
-    if meeting.sections.exists():
-        for section in meeting.sections.all().order_by('order'):
-            section_style = ParagraphStyle(
-                'Section',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor='#0369a1',
-                spaceAfter=12
-            )
-            story.append(Paragraph(section.title, section_style))
+    if agenda['sections']:
+        for section in agenda['sections']:
+            story.append(Paragraph(section['title'], styles['section']))
             
-            for item in section.items.all().order_by('order'):
-                item_style = ParagraphStyle(
-                    'Item',
-                    parent=styles['Normal'],
-                    fontSize=12,
-                    leftIndent=0.5 * inch,
-                    spaceAfter=6
-                )
-                item_text = f"<b>{item.number or item.order}. {item.title}</b>"
-                story.append(Paragraph(item_text, item_style))
-                if item.description:
-                    desc_style = ParagraphStyle(
-                        'Description',
-                        parent=styles['Normal'],
-                        fontSize=10,
-                        leftIndent=0.7 * inch,
-                        spaceAfter=12
-                    )
-                    story.append(Paragraph(item.description, desc_style))
+            for item in section['items']:
+                item_text = f"<b>{item['number'] or item['order']}. {item['title']}</b>"
+                story.append(Paragraph(item_text, styles['item']))
+                if item['description']:
+                    story.append(Paragraph(item['description'], styles['description']))
     else:
         # No sections, list items directly
-        for item in meeting.agenda_items.all().order_by('order'):
-            item_style = ParagraphStyle(
-                'Item',
-                parent=styles['Normal'],
-                fontSize=12,
-                spaceAfter=12
-            )
-            item_text = f"<b>{item.number or item.order}. {item.title}</b>"
-            story.append(Paragraph(item_text, item_style))
-            if item.description:
-                desc_style = ParagraphStyle(
-                    'Description',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    leftIndent=0.3 * inch,
-                    spaceAfter=12
-                )
-                story.append(Paragraph(item.description, desc_style))
-    
-    doc.build(story)
-    buffer.seek(0)
+        for item in agenda['items']:
+            item_text = f"<b>{item['number'] or item['order']}. {item['title']}</b>"
+            story.append(Paragraph(item_text, styles['plain_item']))
+            if item['description']:
+                story.append(Paragraph(item['description'], styles['plain_description']))
+    
+    doc.build(story, onFirstPage=draw_letterhead, onLaterPages=draw_letterhead)
+    if output is None:
+        buffer.seek(0)
     return buffer
 
 
-def generate_agenda_docx(meeting: Meeting) -> BytesIO:
+def generate_agenda_docx(meeting: Meeting, agenda: dict = None, output=None) -> BytesIO:
     """
     Generate DOCX agenda for a meeting.
+    
+    Renders ``agenda`` (an agenda tree, e.g. a published snapshot) if given,
+    otherwise the meeting's live agenda. Writes to ``output`` (a binary file)
+    if given, otherwise to a new buffer.
     """
-    doc = Document()
+    if agenda is None:
+        agenda = build_agenda_tree(meeting)
+    info = agenda['meeting']
+    
+    doc = get_docx_document()
+    bullet_style = get_docx_style(doc, 'List Bullet')
+    section_style = get_docx_style(doc, 'Heading 1')
     
     # Title
-    title = doc.add_heading(meeting.title, 0)
+    title = doc.add_paragraph(info['title'], get_docx_style(doc, 'Title'))
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
     # Meeting info
     info_para = doc.add_paragraph()
-    info_para.add_run(f"Date: {meeting.date}\n").bold = True
-    info_para.add_run(f"Time: {meeting.time}\n")
-    info_para.add_run(f"Location: {meeting.location}\n")
-    info_para.add_run(f"Type: {meeting.get_meeting_type_display()}\n")
+    info_para.add_run(f"Date: {info['date']}\n").bold = True
+    info_para.add_run(f"Time: {info['time']}\n")
+    info_para.add_run(f"Location: {info['location']}\n")
+    info_para.add_run(f"Type: {info['meeting_type_display']}\n")
     info_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
-    if meeting.description:
-        doc.add_paragraph(meeting.description)
+    if info['description']:
+        doc.add_paragraph(info['description'])
     
     doc.add_paragraph()  # Spacer
     
     # Agenda items
-    if meeting.sections.exists():
-        for section in meeting.sections.all().order_by('order'):
-            doc.add_heading(section.title, level=1)
+    if agenda['sections']:
+        for section in agenda['sections']:
+            doc.add_paragraph(section['title'], section_style)
             
-            for item in section.items.all().order_by('order'):
+            for item in section['items']:
                 item_para = doc.add_paragraph()
-                item_para.add_run(f"{item.number or item.order}. {item.title}").bold = True
+                item_para.add_run(f"{item['number'] or item['order']}. {item['title']}").bold = True
                 
-                if item.description:
-                    desc_para = doc.add_paragraph(item.description, style='List Bullet')
+                if item['description']:
+                    desc_para = doc.add_paragraph(item['description'])
+                    desc_para.style = bullet_style
                     desc_para.paragraph_format.left_indent = Inches(0.5)
     else:
         # No sections, list items directly
-        for item in meeting.agenda_items.all().order_by('order'):
+        for item in agenda['items']:
             item_para = doc.add_paragraph()
-            item_para.add_run(f"{item.number or item.order}. {item.title}").bold = True
+            item_para.add_run(f"{item['number'] or item['order']}. {item['title']}").bold = True
             
-            if item.description:
-                desc_para = doc.add_paragraph(item.description, style='List Bullet')
+            if item['description']:
+                desc_para = doc.add_paragraph(item['description'])
+                desc_para.style = bullet_style
                 desc_para.paragraph_format.left_indent = Inches(0.3)
     
     # Save to BytesIO
-    buffer = BytesIO()
+    buffer = output if output is not None else BytesIO()
     doc.save(buffer)
-    buffer.seek(0)
+    if output is None:
+        buffer.seek(0)
     return buffer
 
 
-def generate_agenda_packet(meeting: Meeting, format: str = 'pdf', include_attachments: bool = True) -> BytesIO:
+def generate_agenda_packet(meeting: Meeting, format: str = 'pdf', include_attachments: bool = True,
+                           agenda: dict = None, output=None) -> BytesIO:
     """
     Generate complete agenda packet (PDF or DOCX) with optional attachments.
     
+    PDF packets with attachments splice each item's current public PDF
+    attachments in after the agenda, with a contents page and bookmarks
+    (see meetings.packets). DOCX packets contain the agenda only.
+    
     Args:
         meeting: Meeting instance
         format: 'pdf' or 'docx'
         include_attachments: Whether to include document attachments
+        agenda: Agenda tree to render (defaults to the live agenda)
+        output: Binary file to write to (defaults to a new buffer)
     
     Returns:
-        BytesIO buffer with the generated packet
+        The file or BytesIO buffer with the generated packet
     """
     if format.lower() == 'docx':
-        return generate_agenda_docx(meeting)
-    else:
-        return generate_agenda_pdf(meeting)
-
-
-def generate_meeting_ics(meeting: Meeting, base_url: str = 'https://escribe-backend.onrender.com') -> str:
-    """
-    Generate ICS (iCalendar) file content for a meeting.
+        return generate_agenda_docx(meeting, agenda, output)
+    if not include_attachments:
+        return generate_agenda_pdf(meeting, agenda, output)
     
-    Args:
-        meeting: Meeting instance
-        base_url: Base URL for the application (for links)
+    from .packets import build_pdf_packet
     
-    Returns:
-        ICS file content as string
-    """
-    from icalendar import Calendar, Event
-    from datetime import datetime, timedelta
-    from django.utils import timezone
+    if agenda is None:
+        agenda = build_agenda_tree(meeting)
+    buffer = output if output is not None else BytesIO()
+    build_pdf_packet(meeting, agenda, buffer)
+    if output is None:
+        buffer.seek(0)
+    return buffer
+
+
+def _new_calendar():
+    from icalendar import Calendar
     
     cal = Calendar()
     cal.add('prodid', '-//Escribe Meeting Management//EN')
     cal.add('version', '2.0')
     cal.add('calscale', 'GREGORIAN')
     cal.add('method', 'PUBLISH')
+    return cal
+
+
+def build_meeting_event(meeting: Meeting, base_url: str = 'https://escribe-backend.onrender.com'):
+    """Build the iCalendar VEVENT for a meeting."""
+    from icalendar import Alarm, Event
+    from datetime import timedelta
+    from django.utils import timezone
     
     event = Event()
     event.add('summary', meeting.title)
@@ -239,17 +225,70 @@ def generate_meeting_ics(meeting: Meeting, base_url: str = 'https://escribe-back
     event.add('categories', [meeting.meeting_type])
     
     # Add alarm/reminder (24 hours before)
-    alarm = Event()
+    alarm = Alarm()
     alarm.add('action', 'DISPLAY')
     alarm.add('description', f'Reminder: {meeting.title}')
     alarm.add('trigger', timedelta(hours=-24))
     event.add_component(alarm)
+    return event
+
+
+def generate_meeting_ics(meeting: Meeting, base_url: str = 'https://escribe-backend.onrender.com') -> str:
+    """
+    Generate ICS (iCalendar) file content for a meeting.
     
-    cal.add_component(event)
+    Args:
+        meeting: Meeting instance
+        base_url: Base URL for the application (for links)
     
+    Returns:
+        ICS file content as string
+    """
+    cal = _new_calendar()
+    cal.add_component(build_meeting_event(meeting, base_url))
     return cal.to_ical().decode('utf-8')
 
 
+def generate_calendar_feed(meetings, base_url: str = 'https://escribe-backend.onrender.com',
+                           name: str = 'Meetings') -> str:
+    """
+    Generate an ICS calendar with one event per meeting, for subscriptions.
+    
+    Each meeting's serialized VEVENT is cached until the meeting changes
+    (see meetings.cache.calendar_event_key), so a feed of mostly unchanged
+    meetings is assembled from the cache with one read.
+    
+    Args:
+        meetings: Meetings to include
+        base_url: Base URL for the application (for links)
+        name: Calendar name shown by calendar apps
+    
+    Returns:
+        ICS file content as string
+    """
+    from django.core.cache import cache
+    from .cache import calendar_event_key, get_cache_timeout
+    
+    meetings = list(meetings)
+    keys = [calendar_event_key(meeting, base_url) for meeting in meetings]
+    events = cache.get_many(keys)
+    missing = {}
+    for meeting, key in zip(meetings, keys):
+        if key not in events:
+            missing[key] = events[key] = build_meeting_event(meeting, base_url).to_ical().decode('utf-8')
+    if missing:
+        cache.set_many(missing, timeout=get_cache_timeout())
+    
+    cal = _new_calendar()
+    cal.add('x-wr-calname', name)
+    cal.add('x-published-ttl', 'PT15M')  # How often subscribers should poll
+    ics = cal.to_ical().decode('utf-8')
+    
+    # Splice the cached events in before END:VCALENDAR
+    end = ics.rindex('END:VCALENDAR')
+    return ics[:end] + ''.join(events[key] for key in keys) + ics[end:]
+
+
 
 
 
@@ -1,26 +1,51 @@
 """
 Views for meetings app
 """
+from pathlib import Path
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
+from rest_framework.renderers import JSONRenderer
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.http import HttpResponse, Http404
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.html import escape
+from django.db.models import Q, Count, Max
 from .models import (
     Meeting, AgendaSection, AgendaItem, Minute, Vote,
-    EmailSubscription, ElectronicSignature, MeetingAttendance, DocumentAccessLog
+    EmailSubscription, ElectronicSignature, MeetingAttendance, DocumentAccessLog, Job,
+    MeetingArtifact
 )
 from .serializers import (
-    MeetingSerializer, MeetingListSerializer,
-    AgendaSectionSerializer, AgendaItemSerializer,
+    MeetingSerializer, MeetingListSerializer, NormalizedMeetingSerializer,
+    get_meeting_detail_prefetches,
+    AgendaSectionSerializer, AgendaItemSerializer, AgendaReorderSerializer,
+    AgendaTreeSerializer, PacketExportSerializer,
     MinuteSerializer, VoteSerializer,
-    EmailSubscriptionSerializer, ElectronicSignatureSerializer
+    EmailSubscriptionSerializer, ElectronicSignatureSerializer,
+    DocumentAccessLogSerializer, JobSerializer
+)
+from .pagination import OptionalCursorPagination, AccessLogPagination
+from .permissions import (
+    CanCreateAgenda, CanApproveMinutes, CanSubmitAgendaItems, IsPublicOrAuthenticated, IsClerkOrAdmin,
+    is_clerk_or_admin
+)
+from .services import get_rss_feed
+from .notifications import record_notification
+from .ordering import apply_moves
+from .agenda import build_agenda_tree
+from .render_cache import open_or_render, open_cached, CONTENT_TYPES
+from .jobs import enqueue, get_result_path
+from .downloads import file_response
+from .cache import (
+    get_meeting_version, get_public_meeting, set_public_meeting,
+    get_cached_feed, set_cached_feed, make_etag, get_not_modified_response, set_validators
 )
-from .permissions import CanCreateAgenda, CanApproveMinutes, CanSubmitAgendaItems, IsPublicOrAuthenticated
-from .services import send_meeting_notification, generate_rss_feed
 
 
 class MeetingViewSet(viewsets.ModelViewSet):
@@ -29,6 +54,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
     """
     queryset = Meeting.objects.all()
     permission_classes = [IsPublicOrAuthenticated]
+    pagination_class = OptionalCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'meeting_type', 'date']
     search_fields = ['title', 'description']
@@ -38,9 +64,19 @@ class MeetingViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'list':
             return MeetingListSerializer
+        if self.is_normalized():
+            return NormalizedMeetingSerializer
         return MeetingSerializer
     
-    def get_queryset(self):
+    def is_normalized(self):
+        """Whether the client asked for the normalized (?shape=normalized) detail shape."""
+        return (
+            self.action == 'retrieve'
+            and self.request.query_params.get('shape') == 'normalized'
+        )
+    
+    def get_visible_queryset(self):
+        """Meetings the current user may see, without any related data loaded."""
         user = self.request.user
         queryset = Meeting.objects.all()
         
@@ -54,13 +90,115 @@ class MeetingViewSet(viewsets.ModelViewSet):
                 Q(status='draft', created_by=user)
             )
         
-        return queryset.select_related('created_by').prefetch_related('agenda_items', 'sections')
+        return queryset
+    
+    def get_queryset(self):
+        queryset = self.get_visible_queryset().select_related('created_by')
+        if self.action == 'list':
+            # Item counts come from the same query as the page rows
+            return queryset.annotate(item_count=Count('agenda_items'))
+        if self.action in ['retrieve', 'create', 'update', 'partial_update', 'publish', 'agenda_tree']:
+            return queryset.prefetch_related(*get_meeting_detail_prefetches(normalized=self.is_normalized()))
+        if self.action in ['agenda_pdf', 'agenda_packet']:
+            return queryset.select_related('published_snapshot')
+        return queryset
+    
+    def get_content_updated_at(self, pk):
+        """Get a visible meeting's content version marker, or raise 404."""
+        if not str(pk).isdigit():
+            raise Http404
+        last_modified = self.get_visible_queryset().filter(pk=pk).values_list(
+            'content_updated_at', flat=True
+        ).first()
+        if last_modified is None:
+            raise Http404
+        return last_modified
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List meetings.
+        
+        The ETag covers the newest content_updated_at and the row count of the
+        filtered set plus the query string, so an unchanged page is answered
+        with 304 before any serialization.
+        """
+        user = request.user
+        if not user.is_authenticated or user.role == 'public':
+            scope = 'public'
+        elif user.role == 'staff':
+            scope = f'staff-{user.id}'
+        else:
+            scope = 'all'
+        
+        state = self.filter_queryset(self.get_visible_queryset()).aggregate(
+            last_modified=Max('content_updated_at'), count=Count('id')
+        )
+        last_modified = state['last_modified']
+        etag = make_etag('meetings', scope, last_modified, state['count'], request.META.get('QUERY_STRING', ''))
+        not_modified = get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Get meeting details.
+        
+        Responses carry an ETag/Last-Modified pair derived from the meeting's
+        content_updated_at, and conditional requests get a 304 without
+        serializing. Public reads are also served from a cache of the rendered
+        JSON, keyed by the meeting's version stamp; a warm hit does not touch
+        the database.
+        """
+        user = request.user
+        meeting_id = str(kwargs.get(self.lookup_field, ''))
+        if not meeting_id.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        
+        variant = 'normalized' if self.is_normalized() else 'full'
+        cacheable = (
+            (not user.is_authenticated or user.role == 'public')
+            and request.accepted_renderer.format == 'json'
+        )
+        if cacheable:
+            cached = get_public_meeting(meeting_id, variant)
+            if cached is not None:
+                content, etag, last_modified = cached
+                not_modified = get_not_modified_response(request, etag, last_modified)
+                if not_modified is not None:
+                    return not_modified
+                return set_validators(
+                    HttpResponse(content, content_type='application/json'), etag, last_modified
+                )
+            version = get_meeting_version(meeting_id)
+        
+        last_modified = self.get_content_updated_at(meeting_id)
+        etag = make_etag('meeting', meeting_id, variant, last_modified)
+        not_modified = get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        response = super().retrieve(request, *args, **kwargs)
+        if cacheable:
+            content = JSONRenderer().render(response.data)
+            set_public_meeting(meeting_id, version, variant, (content, etag, last_modified))
+            response = HttpResponse(content, content_type='application/json')
+        return set_validators(response, etag, last_modified)
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'ics_export', 'deadline_status', 'agenda_packet', 'agenda_pdf']:
+        if self.action in ['list', 'retrieve', 'agenda', 'snapshots', 'ics_export', 'deadline_status',
+                           'agenda_packet', 'agenda_pdf']:
             return [IsPublicOrAuthenticated()]
         return [IsAuthenticated(), CanCreateAgenda()]
     
+    def perform_update(self, serializer):
+        meeting = serializer.save()
+        if meeting.status == 'published':
+            # Coalesced, so a session of edits sends one email
+            record_notification(meeting, 'updated')
+    
     @action(detail=True, methods=['post'])
     def publish(self, request, pk=None):
         """Publish a meeting agenda."""
@@ -72,28 +210,161 @@ class MeetingViewSet(viewsets.ModelViewSet):
         if not meeting.posting_deadline:
             meeting.posting_deadline = meeting.calculate_posting_deadline()
         
-        meeting.publish()
+        was_draft = meeting.status == 'draft'
+        previous_snapshot_id = meeting.published_snapshot_id
+        snapshot = meeting.publish(request.user)
+        if was_draft and meeting.status == 'published':
+            record_notification(meeting, 'published')
+        elif snapshot is not None and snapshot.id != previous_snapshot_id:
+            # Re-published with an amended agenda
+            record_notification(meeting, 'updated')
         serializer = self.get_serializer(meeting)
         return Response(serializer.data)
     
+    def is_public_reader(self):
+        """Whether the requester reads as the public: anonymous or a public-role account."""
+        user = self.request.user
+        return not user.is_authenticated or user.role == 'public'
+    
+    def get_render_agenda(self, meeting):
+        """
+        Get the agenda tree the requester should see for ``meeting``.
+        
+        Public readers get the published snapshot; staff get the live agenda.
+        """
+        snapshot = meeting.published_snapshot
+        if snapshot is not None and self.is_public_reader():
+            return snapshot.data
+        return build_agenda_tree(meeting)
+    
+    def get_public_artifact(self, meeting, kind):
+        """
+        Get the artifact pre-rendered at publish time for a public reader.
+        
+        Returns None for staff, who see the live agenda, or if it has not
+        been rendered yet.
+        """
+        if not self.is_public_reader() or meeting.published_snapshot_id is None:
+            return None
+        return MeetingArtifact.objects.filter(snapshot_id=meeting.published_snapshot_id, kind=kind).first()
+    
+    def artifact_response(self, artifact, filename):
+        extension = filename.rsplit('.', 1)[-1]
+        return file_response(
+            self.request, open(artifact.file.path, 'rb'), filename, CONTENT_TYPES[extension],
+            etag=make_etag('artifact', artifact.id)
+        )
+    
+    @action(detail=True, methods=['get'])
+    def agenda(self, request, pk=None):
+        """
+        Get the agenda as it was published.
+        
+        Served straight from the meeting's published snapshot in a single
+        query; 404 if the meeting has not been published.
+        """
+        meeting = get_object_or_404(
+            self.get_visible_queryset().select_related('published_snapshot'), pk=pk
+        )
+        snapshot = meeting.published_snapshot
+        if snapshot is None:
+            raise Http404('Meeting has no published agenda')
+        return Response(dict(snapshot.data, version=snapshot.version, published_at=snapshot.created_at))
+    
+    @action(detail=True, methods=['get'])
+    def snapshots(self, request, pk=None):
+        """List the published versions of a meeting's agenda."""
+        meeting = self.get_object()
+        return Response(list(
+            meeting.snapshots.order_by('-version').values('version', 'content_hash', 'created_at')
+        ))
+    
+    @action(detail=True, methods=['post'])
+    def agenda_tree(self, request, pk=None):
+        """
+        Create or update a whole agenda (sections with items) in one request.
+        
+        The tree is validated as a batch and written with bulk inserts and
+        updates in a single transaction; the response is the meeting with
+        its full agenda.
+        """
+        meeting = self.get_object()
+        serializer = AgendaTreeSerializer(meeting, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            Meeting.objects.select_for_update().filter(pk=meeting.pk).first()
+            serializer.save(submitted_by=request.user)
+        
+        meeting = self.get_queryset().get(pk=meeting.pk)
+        return Response(MeetingSerializer(meeting, context=self.get_serializer_context()).data)
+    
+    @action(detail=False, methods=['post'])
+    def export_packets(self, request):
+        """
+        Queue a ZIP export of many meetings' agenda packets.
+        
+        Returns 202 with the job; its download is the ZIP.
+        """
+        serializer = PacketExportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        queryset = self.get_visible_queryset()
+        if data.get('meetings'):
+            queryset = queryset.filter(pk__in=data['meetings'])
+        if data.get('start'):
+            queryset = queryset.filter(date__gte=data['start'])
+        if data.get('end'):
+            queryset = queryset.filter(date__lte=data['end'])
+        meeting_ids = list(queryset.order_by('id').values_list('id', flat=True))
+        if not meeting_ids:
+            return Response({'error': 'No meetings match'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job = enqueue('export_packets', {
+            'meetings': meeting_ids,
+            'format': data['format'],
+            'include_attachments': data['attachments'],
+            'live': data['live'],
+        }, user=request.user)
+        response = Response(
+            JobSerializer(job, context=self.get_serializer_context()).data, status=status.HTTP_202_ACCEPTED
+        )
+        response['Location'] = request.build_absolute_uri(f'/api/meetings/jobs/{job.id}/')
+        return response
+    
+    @action(detail=True, methods=['post'])
+    def renumber(self, request, pk=None):
+        """Renumber sections and items to match the current agenda order."""
+        meeting = self.get_object()
+        meeting.renumber_agenda()
+        return Response(list(meeting.agenda_items.values('id', 'section', 'order', 'number')))
+    
     @action(detail=True, methods=['get'])
     def agenda_pdf(self, request, pk=None):
         """Generate PDF of agenda."""
-        from django.http import HttpResponse
         from .utils import generate_agenda_pdf
         
         meeting = self.get_object()
-        pdf_buffer = generate_agenda_pdf(meeting)
+        artifact = self.get_public_artifact(meeting, 'agenda_pdf')
+        if artifact is not None:
+            return self.artifact_response(artifact, f'agenda_{meeting.id}.pdf')
         
-        response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="agenda_{meeting.id}.pdf"'
-        return response
+        agenda = self.get_render_agenda(meeting)
+        file = open_or_render(agenda, 'pdf', lambda output: generate_agenda_pdf(meeting, agenda, output))
+        
+        return file_response(
+            request, file, f'agenda_{meeting.id}.pdf', CONTENT_TYPES['pdf'], etag=f'"{Path(file.name).stem}"'
+        )
     
     @action(detail=True, methods=['get'], url_path='agenda_packet', url_name='agenda-packet')
     def agenda_packet(self, request, pk=None):
-        """Generate complete agenda packet (PDF or DOCX)."""
-        from django.http import HttpResponse
-        from .utils import generate_agenda_packet
+        """
+        Get the complete agenda packet (PDF or DOCX).
+        
+        Serves the packet if it has already been built; otherwise queues a
+        build and answers 202 with the job to poll.
+        """
         import logging
         
         logger = logging.getLogger(__name__)
@@ -109,30 +380,28 @@ class MeetingViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            packet_buffer = generate_agenda_packet(meeting, format=format_type, include_attachments=include_attachments)
-            
-            if not packet_buffer:
-                logger.error(f"Null buffer returned for meeting {meeting.id}")
-                return Response(
-                    {'error': 'Failed to generate agenda packet: Buffer is null'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            # Get buffer value and check if it's empty
-            buffer_value = packet_buffer.getvalue()
-            if not buffer_value or len(buffer_value) == 0:
-                logger.error(f"Empty buffer generated for meeting {meeting.id}")
-                return Response(
-                    {'error': 'Failed to generate agenda packet: Buffer is empty'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+            artifact = include_attachments and self.get_public_artifact(meeting, f'packet_{format_type}')
+            if artifact:
+                return self.artifact_response(artifact, f'agenda_packet_{meeting.id}.{format_type}')
             
-            content_type = 'application/pdf' if format_type == 'pdf' else 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            extension = 'pdf' if format_type == 'pdf' else 'docx'
+            agenda = self.get_render_agenda(meeting)
+            file = open_cached(agenda, format_type, packet=True, include_attachments=include_attachments)
+            if file is None:
+                job = enqueue('agenda_packet', {
+                    'meeting': meeting.id,
+                    'format': format_type,
+                    'include_attachments': include_attachments,
+                    'snapshot': self.is_public_reader(),
+                }, user=request.user)
+                serializer = JobSerializer(job, context=self.get_serializer_context())
+                response = Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+                response['Location'] = request.build_absolute_uri(f'/api/meetings/jobs/{job.id}/')
+                return response
             
-            response = HttpResponse(buffer_value, content_type=content_type)
-            response['Content-Disposition'] = f'attachment; filename="agenda_packet_{meeting.id}.{extension}"'
-            return response
+            return file_response(
+                request, file, f'agenda_packet_{meeting.id}.{format_type}', CONTENT_TYPES[format_type],
+                etag=f'"{Path(file.name).stem}"'
+            )
             
         except Exception as e:
             logger.exception(f"Error generating agenda packet for meeting {pk}: {str(e)}")
@@ -144,19 +413,24 @@ class MeetingViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def ics_export(self, request, pk=None):
         """Export meeting as ICS (iCalendar) file."""
-        from django.http import HttpResponse
         from .utils import generate_meeting_ics
         
-        meeting = self.get_object()
-        
         # Get base URL from request
         base_url = request.build_absolute_uri('/')[:-1]
         
-        ics_content = generate_meeting_ics(meeting, base_url)
+        last_modified = self.get_content_updated_at(pk)
+        etag = make_etag('ics', pk, base_url, last_modified)
+        not_modified = get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        meeting = self.get_object()
+        artifact = self.get_public_artifact(meeting, 'ics') if base_url == settings.PUBLIC_BASE_URL else None
+        ics_content = artifact.content if artifact is not None else generate_meeting_ics(meeting, base_url)
         
         response = HttpResponse(ics_content, content_type='text/calendar')
         response['Content-Disposition'] = f'attachment; filename="meeting_{meeting.id}.ics"'
-        return response
+        return set_validators(response, etag, last_modified)
     
     @action(detail=True, methods=['get'])
     def deadline_status(self, request, pk=None):
@@ -182,7 +456,12 @@ class MeetingViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def send_notification(self, request, pk=None):
-        """Send email notification about meeting."""
+        """
+        Send email notification about meeting.
+        
+        The notification goes out once its coalescing window has passed
+        (see meetings.notifications), merged with any others for the meeting.
+        """
         meeting = self.get_object()
         notification_type = request.data.get('type', 'published')
         
@@ -192,8 +471,16 @@ class MeetingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        send_meeting_notification(meeting, notification_type)
-        return Response({'message': 'Notifications sent'})
+        event = record_notification(meeting, notification_type)
+        return Response(
+            {
+                'message': 'Notification scheduled',
+                'notification_type': event.notification_type,
+                'send_after': event.send_after,
+                'coalesced': event.count > 1,
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class AgendaSectionViewSet(viewsets.ModelViewSet):
@@ -203,6 +490,21 @@ class AgendaSectionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, CanCreateAgenda]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['meeting']
+    
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        """Apply a drag-and-drop session of section moves in one transaction."""
+        serializer = AgendaReorderSerializer(data=request.data, context={'model': AgendaSection})
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            # Lock the meeting so concurrent sessions apply one after another
+            meeting = Meeting.objects.select_for_update().get(pk=serializer.validated_data['meeting'].pk)
+            apply_moves(meeting, AgendaSection, serializer.validated_data['moves'])
+            if serializer.validated_data['renumber']:
+                meeting.renumber_agenda()
+        
+        return Response(list(meeting.sections.values('id', 'order', 'position')))
 
 
 class AgendaItemViewSet(viewsets.ModelViewSet):
@@ -210,6 +512,7 @@ class AgendaItemViewSet(viewsets.ModelViewSet):
     queryset = AgendaItem.objects.all()
     serializer_class = AgendaItemSerializer
     permission_classes = [IsPublicOrAuthenticated]
+    pagination_class = OptionalCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['meeting', 'section', 'priority', 'is_consent']
     search_fields = ['title', 'description', 'department']
@@ -236,6 +539,21 @@ class AgendaItemViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Set submitted_by to current user."""
         serializer.save(submitted_by=self.request.user)
+    
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        """Apply a drag-and-drop session of item moves in one transaction."""
+        serializer = AgendaReorderSerializer(data=request.data, context={'model': AgendaItem})
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            # Lock the meeting so concurrent sessions apply one after another
+            meeting = Meeting.objects.select_for_update().get(pk=serializer.validated_data['meeting'].pk)
+            apply_moves(meeting, AgendaItem, serializer.validated_data['moves'])
+            if serializer.validated_data['renumber']:
+                meeting.renumber_agenda()
+        
+        return Response(list(meeting.agenda_items.values('id', 'section', 'order', 'number')))
 
 
 class MinuteViewSet(viewsets.ModelViewSet):
@@ -243,6 +561,7 @@ class MinuteViewSet(viewsets.ModelViewSet):
     queryset = Minute.objects.all()
     serializer_class = MinuteSerializer
     permission_classes = [IsPublicOrAuthenticated]
+    pagination_class = OptionalCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['agenda_item', 'status']
     search_fields = ['text', 'agenda_item__title']
@@ -272,7 +591,10 @@ class MinuteViewSet(viewsets.ModelViewSet):
         if not request.user.can_approve_minutes():
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
+        was_approved = minute.status == 'approved'
         minute.approve(request.user)
+        if not was_approved and minute.agenda_item.meeting.status == 'published':
+            record_notification(minute.agenda_item.meeting, 'minutes_approved')
         serializer = self.get_serializer(minute)
         return Response(serializer.data)
     
@@ -421,6 +743,10 @@ class EmailSubscriptionViewSet(viewsets.ModelViewSet):
                 {'error': 'Email is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        type_serializer = EmailSubscriptionSerializer(data={'subscription_types': subscription_types}, partial=True)
+        if not type_serializer.is_valid():
+            return Response(type_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        subscription_types = type_serializer.validated_data['subscription_types']
         
         subscription, created = EmailSubscription.objects.get_or_create(
             email=email,
@@ -436,12 +762,29 @@ class EmailSubscriptionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(subscription)
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['get', 'post'], authentication_classes=[])
     def unsubscribe(self, request):
-        """Unsubscribe from email notifications."""
-        token = request.data.get('token')
+        """
+        Unsubscribe from email notifications.
+        
+        The per-recipient links in notification emails (``?token=``) open a
+        GET that only shows a confirmation page, so link scanners and mail
+        clients prefetching the link cannot unsubscribe anyone. The page's
+        button, the one-click POST (RFC 8058) and API clients POST to
+        unsubscribe.
+        """
+        token = request.query_params.get('token') or request.data.get('token')
         email = request.data.get('email')
         
+        if request.method == 'GET':
+            if not token:
+                return unsubscribe_page('This unsubscribe link is incomplete.', status=400)
+            if not EmailSubscription.objects.filter(unsubscribe_token=token).exists():
+                return unsubscribe_page('This unsubscribe link is not valid.', status=404)
+            return unsubscribe_page(
+                'Stop receiving meeting notification emails?', action=request.path, token=token
+            )
+        
         if not token and not email:
             return Response(
                 {'error': 'Token or email is required'},
@@ -457,6 +800,8 @@ class EmailSubscriptionViewSet(viewsets.ModelViewSet):
             subscription.is_active = False
             subscription.save()
             
+            if request.data.get('confirm'):
+                return unsubscribe_page('You have been unsubscribed from meeting notification emails.')
             return Response({'message': 'Successfully unsubscribed'})
         except EmailSubscription.DoesNotExist:
             return Response(
@@ -465,6 +810,27 @@ class EmailSubscriptionViewSet(viewsets.ModelViewSet):
             )
 
 
+def unsubscribe_page(message: str, action: str = None, token: str = None, status: int = 200) -> HttpResponse:
+    """Render the page behind the unsubscribe links in notification emails."""
+    form = ''
+    if action:
+        form = f"""
+            <form method="post" action="{escape(action)}">
+                <input type="hidden" name="token" value="{escape(token)}">
+                <input type="hidden" name="confirm" value="1">
+                <button type="submit">Unsubscribe</button>
+            </form>"""
+    return HttpResponse(f"""
+        <html>
+        <head><meta name="robots" content="noindex"><title>Unsubscribe</title></head>
+        <body>
+            <h2>Meeting notifications</h2>
+            <p>{escape(message)}</p>{form}
+        </body>
+        </html>
+        """, status=status)
+
+
 class ElectronicSignatureViewSet(viewsets.ModelViewSet):
     """ViewSet for managing electronic signatures."""
     queryset = ElectronicSignature.objects.all()
@@ -502,6 +868,49 @@ class ElectronicSignatureViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for polling background jobs and downloading their output.
+    
+    Anonymous users can only see jobs queued anonymously, and other users
+    only their own; clerks and admins see every job.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [AllowAny]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Job.objects.all()
+        if not user.is_authenticated:
+            queryset = queryset.filter(created_by__isnull=True)
+        elif not is_clerk_or_admin(user):
+            queryset = queryset.filter(created_by=user)
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the file a finished job produced."""
+        job = self.get_object()
+        if job.status != 'succeeded' or not (job.result or {}).get('file'):
+            return Response(
+                {'error': f'Job is {job.status}', 'job': JobSerializer(job, context={'request': request}).data},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        path = get_result_path(job)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return Response(
+                {'error': 'File has expired; request it again'},
+                status=status.HTTP_410_GONE
+            )
+        return file_response(
+            request, file, job.result['filename'], CONTENT_TYPES[path.suffix.lstrip('.')],
+            etag=f'"{path.stem}"'
+        )
+
+
 class AnalyticsViewSet(viewsets.ViewSet):
     """ViewSet for analytics endpoints."""
     permission_classes = [IsAuthenticated]
@@ -601,18 +1010,111 @@ class AnalyticsViewSet(viewsets.ViewSet):
         }
         
         return Response(stats)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsClerkOrAdmin])
+    def access_logs(self, request):
+        """
+        List document access log entries, newest first, with cursor pagination.
+        
+        Entries name the user and IP address, so only clerks and admins may list them.
+        """
+        doc_type = request.query_params.get('document_type')
+        doc_id = request.query_params.get('document_id')
+        
+        queryset = DocumentAccessLog.objects.all()
+        
+        if doc_type:
+            queryset = queryset.filter(document_type=doc_type)
+        if doc_id:
+            queryset = queryset.filter(document_id=doc_id)
+        
+        paginator = AccessLogPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = DocumentAccessLogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 # RSS Feed View
 class RSSFeedView(APIView):
-    """RSS feed endpoint for meetings."""
+    """
+    RSS feed endpoint for meetings.
+    
+    Optional ``meeting_type`` filter. With ``minutes=True`` (the
+    ``rss/minutes/`` route) lists meetings whose minutes were approved.
+    """
     permission_classes = [AllowAny]
+    minutes = False
     
     def get(self, request):
-        """Generate and return RSS feed."""
+        """Return the RSS feed from the cache, or 304 if the client's copy is current."""
         base_url = request.build_absolute_uri('/')[:-1]
-        rss_xml = generate_rss_feed(base_url=base_url)
         
-        response = HttpResponse(rss_xml, content_type='application/rss+xml; charset=utf-8')
-        return response
+        meeting_type = request.query_params.get('meeting_type') or None
+        if meeting_type is not None and meeting_type not in dict(Meeting.MEETING_TYPES):
+            return Response(
+                {'error': f'Unknown meeting_type: {meeting_type}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        feed = get_rss_feed(base_url, meeting_type, self.minutes)
+        not_modified = get_not_modified_response(request, feed['etag'], feed['last_modified'])
+        if not_modified is not None:
+            return not_modified
+        
+        response = HttpResponse(feed['content'], content_type='application/rss+xml; charset=utf-8')
+        return set_validators(response, feed['etag'], feed['last_modified'])
+
+
+# Calendar Feed View
+class CalendarFeedView(APIView):
+    """
+    Calendar subscription (webcal) feed of upcoming and recent public meetings.
+    
+    Optional ``meeting_type`` filter, comma-separated. Calendar apps poll
+    this every few minutes, so unchanged feeds answer 304 after one
+    aggregate query, and changed ones are assembled from cached events.
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        from datetime import timedelta
+        from .utils import generate_calendar_feed
+        
+        base_url = request.build_absolute_uri('/')[:-1]
+        
+        meeting_types = sorted({
+            meeting_type.strip()
+            for meeting_type in request.query_params.get('meeting_type', '').split(',') if meeting_type.strip()
+        })
+        valid_types = dict(Meeting.MEETING_TYPES)
+        unknown = [meeting_type for meeting_type in meeting_types if meeting_type not in valid_types]
+        if unknown:
+            return Response(
+                {'error': f"Unknown meeting_type: {', '.join(unknown)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        since = timezone.localdate() - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+        meetings = Meeting.objects.filter(published_at__isnull=False, date__gte=since).exclude(status='draft')
+        if meeting_types:
+            meetings = meetings.filter(meeting_type__in=meeting_types)
+        
+        state = meetings.aggregate(last_modified=Max('content_updated_at'), count=Count('id'))
+        last_modified = state['last_modified']
+        etag = make_etag('calendar', base_url, since, ','.join(meeting_types), last_modified, state['count'])
+        not_modified = get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        ics_content = get_cached_feed(etag)
+        if ics_content is None:
+            name = ', '.join(valid_types[meeting_type] for meeting_type in meeting_types) or 'Meetings'
+            ics_content = generate_calendar_feed(
+                meetings.select_related('created_by').order_by('date', 'time'), base_url, name=name
+            )
+            set_cached_feed(etag, ics_content)
+        
+        response = HttpResponse(ics_content, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="meetings.ics"'
+        return set_validators(response, etag, last_modified)
 
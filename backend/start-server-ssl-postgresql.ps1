@@ -31,6 +31,15 @@ if (-not (Test-Path $certPath) -or -not (Test-Path $keyPath)) {
 }
 
 .\venv\Scripts\Activate.ps1
+# Background workers: queued jobs (agenda packets, exports), the email
+# outbox and meeting reminders. They stop when the server stops.
+Write-Host "Starting background workers (jobs, email outbox, reminders)..."
+$workers = @(
+    Start-Process python -ArgumentList 'manage.py', 'run_jobs' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'send_outbox' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'dispatch_reminders', '--loop' -NoNewWindow -PassThru
+)
+
 Write-Host "================================================"
 Write-Host "Starting Django server with SSL/HTTPS"
 Write-Host "================================================"
@@ -50,7 +59,11 @@ Write-Host "Press CTRL+C to stop the server"
 Write-Host "================================================"
 Write-Host ""
 
-python manage.py runserver_plus --cert-file ssl/cert.pem --key-file ssl/key.pem 0.0.0.0:8000
+try {
+    python manage.py runserver_plus --cert-file ssl/cert.pem --key-file ssl/key.pem 0.0.0.0:8000
+} finally {
+    $workers | Stop-Process -ErrorAction SilentlyContinue
+}
 
 
 
@@ -18,6 +18,12 @@ if not exist "ssl\cert.pem" (
     exit /b 1
 )
 
+REM Background workers: queued jobs (agenda packets, exports), the email
+REM outbox and meeting reminders
+start "Job worker" /b python manage.py run_jobs
+start "Email outbox worker" /b python manage.py send_outbox
+start "Reminder dispatcher" /b python manage.py dispatch_reminders --loop
+
 python manage.py runserver_plus --cert-file ssl/cert.pem --key-file ssl/key.pem 0.0.0.0:8000
 
 
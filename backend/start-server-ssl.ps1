@@ -16,9 +16,22 @@ if (-not (Test-Path $certPath) -or -not (Test-Path $keyPath)) {
 }
 
 .\venv\Scripts\Activate.ps1
+# Background workers: queued jobs (agenda packets, exports), the email
+# outbox and meeting reminders. They stop when the server stops.
+Write-Host "Starting background workers (jobs, email outbox, reminders)..."
+$workers = @(
+    Start-Process python -ArgumentList 'manage.py', 'run_jobs' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'send_outbox' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'dispatch_reminders', '--loop' -NoNewWindow -PassThru
+)
+
 Write-Host "Starting Django server with SSL/HTTPS..."
 Write-Host "Server will be available at: https://localhost:8000/"
 Write-Host "Note: Your browser may show a security warning. Click 'Advanced' and 'Proceed to localhost' to continue."
 Write-Host ""
-python manage.py runserver_plus --cert-file ssl/cert.pem --key-file ssl/key.pem 0.0.0.0:8000
+try {
+    python manage.py runserver_plus --cert-file ssl/cert.pem --key-file ssl/key.pem 0.0.0.0:8000
+} finally {
+    $workers | Stop-Process -ErrorAction SilentlyContinue
+}
 
@@ -35,6 +35,15 @@ if (-not $waitressPort) { $waitressPort = "8000" }
 $waitressThreads = $env:WAITRESS_THREADS
 if (-not $waitressThreads) { $waitressThreads = "4" }
 
+# Background workers: queued jobs (agenda packets, exports), the email
+# outbox and meeting reminders. They stop when the server stops.
+Write-Host "Starting background workers (jobs, email outbox, reminders)..."
+$workers = @(
+    Start-Process python -ArgumentList 'manage.py', 'run_jobs' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'send_outbox' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'dispatch_reminders', '--loop' -NoNewWindow -PassThru
+)
+
 Write-Host "Starting Django with Waitress (Production Server)..."
 Write-Host "Host: $waitressHost"
 Write-Host "Port: $waitressPort"
@@ -45,9 +54,13 @@ Write-Host "Press CTRL+C to stop the server"
 Write-Host ""
 
 # Start Waitress
-python -m waitress `
-    --host=$waitressHost `
-    --port=$waitressPort `
-    --threads=$waitressThreads `
-    escribe.wsgi:application
+try {
+    python -m waitress `
+        --host=$waitressHost `
+        --port=$waitressPort `
+        --threads=$waitressThreads `
+        escribe.wsgi:application
+} finally {
+    $workers | Stop-Process -ErrorAction SilentlyContinue
+}
 
@@ -4,6 +4,13 @@ REM This activates the virtual environment and starts the server
 
 cd /d %~dp0
 call venv\Scripts\activate.bat
+
+REM Background workers: queued jobs (agenda packets, exports), the email
+REM outbox and meeting reminders
+start "Job worker" /b python manage.py run_jobs
+start "Email outbox worker" /b python manage.py send_outbox
+start "Reminder dispatcher" /b python manage.py dispatch_reminders --loop
+
 python manage.py runserver
 
 
@@ -3,10 +3,24 @@
 
 cd $PSScriptRoot
 .\venv\Scripts\Activate.ps1
+
+# Background workers: queued jobs (agenda packets, exports), the email
+# outbox and meeting reminders. They stop when the server stops.
+Write-Host "Starting background workers (jobs, email outbox, reminders)..."
+$workers = @(
+    Start-Process python -ArgumentList 'manage.py', 'run_jobs' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'send_outbox' -NoNewWindow -PassThru
+    Start-Process python -ArgumentList 'manage.py', 'dispatch_reminders', '--loop' -NoNewWindow -PassThru
+)
+
 Write-Host "Starting Django development server..."
 Write-Host "Server will be available at: http://localhost:8000/"
 Write-Host ""
-python manage.py runserver
+try {
+    python manage.py runserver
+} finally {
+    $workers | Stop-Process -ErrorAction SilentlyContinue
+}
 
 
 
@@ -7,6 +7,16 @@ set -o errexit  # Exit on error
 
 echo "Running database migrations..."
 python manage.py migrate --noinput
+python manage.py createcachetable
+
+echo "Starting job worker..."
+python manage.py run_jobs &
+
+echo "Starting email outbox worker..."
+python manage.py send_outbox &
+
+echo "Starting meeting reminder dispatcher..."
+python manage.py dispatch_reminders --loop &
 
 echo "Starting Gunicorn..."
 exec gunicorn escribe.wsgi:application --bind 0.0.0.0:$PORT
@@ -64,6 +64,8 @@ export const EmailSubscription: React.FC = () => {
               { value: 'meeting_published', label: 'Meeting Published' },
               { value: 'agenda_updated', label: 'Agenda Updated' },
               { value: 'minutes_approved', label: 'Minutes Approved' },
+              { value: 'meeting_reminder', label: 'Meeting Reminders' },
+              { value: 'daily_digest', label: 'Daily Digest (one email a day instead)' },
             ].map((type) => (
               <label key={type.value} className="flex items-center">
                 <input
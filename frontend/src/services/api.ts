@@ -1,9 +1,13 @@
 import axios, { AxiosInstance, AxiosError } from 'axios'
-import { User, Meeting, AgendaItem, Minute, Attachment, Vote, PaginatedResponse } from '../types'
+import { User, Meeting, AgendaItem, Minute, Attachment, Vote, Job, PaginatedResponse } from '../types'
 
 // Use relative URL to leverage Vite proxy, or use env var if set
 const API_BASE_URL = import.meta.env.VITE_API_URL || '/api'
 
+// How often and how long to poll a background job before giving up
+const JOB_POLL_INTERVAL_MS = 2000
+const JOB_POLL_TIMEOUT_MS = 10 * 60 * 1000
+
 // #region agent log
 // Log API_BASE_URL configuration
 fetch('http://127.0.0.1:7242/ingest/f48bd063-02a2-4722-8b8e-64687902f213',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({location:'api.ts:4',message:'API_BASE_URL configured',data:{apiBaseUrl:API_BASE_URL,envVar:import.meta.env.VITE_API_URL,windowLocation:window.location.origin},timestamp:Date.now(),sessionId:'debug-session',runId:'run1',hypothesisId:'B'})}).catch(()=>{});
@@ -347,6 +351,32 @@ class ApiService {
     return response.data
   }
 
+  // Background jobs
+  async getJob(jobId: number): Promise<Job> {
+    const response = await this.client.get(`/meetings/jobs/${jobId}/`)
+    return response.data
+  }
+
+  // Poll a job until it finishes, then download its file
+  async downloadJobResult(jobId: number): Promise<Blob> {
+    const deadline = Date.now() + JOB_POLL_TIMEOUT_MS
+    let job = await this.getJob(jobId)
+    while (job.status === 'pending' || job.status === 'running') {
+      if (Date.now() > deadline) {
+        throw new Error('Timed out waiting for the file to be generated')
+      }
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+      job = await this.getJob(jobId)
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to generate file')
+    }
+    const response = await this.client.get(`/meetings/jobs/${jobId}/download/`, {
+      responseType: 'blob',
+    })
+    return response.data
+  }
+
   // Agenda Packet
   async downloadAgendaPacket(meetingId: number, format: 'pdf' | 'docx' = 'pdf', includeAttachments: boolean = true): Promise<Blob> {
     try {
@@ -358,6 +388,12 @@ class ApiService {
         responseType: 'blob',
       })
       
+      // Packets not built yet are queued: 202 with the job to poll
+      if (response.status === 202) {
+        const job: Job = JSON.parse(await response.data.text())
+        return await this.downloadJobResult(job.id)
+      }
+      
       // Check if the response is actually an error (JSON error response might be returned as blob)
       if (response.data.type === 'application/json' || response.data.size < 100) {
         const text = await response.data.text()
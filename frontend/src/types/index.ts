@@ -112,6 +112,20 @@ export interface Vote {
   recorded_at: string
 }
 
+export interface Job {
+  id: number
+  kind: string
+  status: 'pending' | 'running' | 'succeeded' | 'failed'
+  attempts: number
+  max_attempts: number
+  error: string
+  progress?: { done: number; total: number } | null
+  created_at: string
+  started_at?: string | null
+  finished_at?: string | null
+  download_url: string | null
+}
+
 export interface PaginatedResponse<T> {
   count: number
   next: string | null